@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Benchmarks of the database accesses and of the evaluation of expressions.
+
+All measurements are performed with the database in running mode, as during
+a measure.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from atom.api import set_default
+
+from ecpy.tasks.tasks.base_tasks import SimpleTask, ComplexTask
+
+from .harness import benchmark, make_root, time_per_call
+
+
+class EntriesTask(SimpleTask):
+    """Task only declaring database entries.
+
+    """
+    database_entries = set_default({'a': 1, 'b': 2.0, 'c': 'test'})
+
+    def perform(self):
+        pass
+
+
+def build_prepared_tree():
+    """Build a small hierarchy and put its database in running mode.
+
+    The returned task is nested in a complex task so that accesses need to
+    walk the database nodes.
+
+    """
+    root = make_root()
+    comp = ComplexTask(name='Comp')
+    task = EntriesTask(name='T')
+    root.add_child_task(0, comp)
+    comp.add_child_task(0, task)
+    root.prepare()
+    return root, task
+
+
+@benchmark('database')
+def bench_writes(options):
+    """Cost of writing a value in the database.
+
+    """
+    root, task = build_prepared_tree()
+    database = root.database
+    number = options.number(100000)
+    repeat = options.repeat
+
+    def write():
+        task.write_in_database('a', 1)
+    yield 'write_task', 'write', time_per_call(write, number, repeat)
+
+    path = task.path
+
+    def set_value():
+        database.set_value(path, 'T_a', 1)
+    yield 'set_value', 'write', time_per_call(set_value, number, repeat)
+
+    handle = database.create_handle(path, {'a': 'T_a'})
+    slot = handle.slot('a')
+
+    def set_handle():
+        handle.set(slot, 1)
+    yield 'set_handle', 'write', time_per_call(set_handle, number, repeat)
+
+    database.subscribe(['root/Comp/T_a'], lambda news: None)
+    yield ('write_task_observed', 'write',
+           time_per_call(write, number, repeat))
+
+
+@benchmark('database')
+def bench_reads(options):
+    """Cost of reading a value from the database.
+
+    """
+    root, task = build_prepared_tree()
+    database = root.database
+    number = options.number(100000)
+    repeat = options.repeat
+
+    def read():
+        task.get_from_database('T_a')
+    yield 'read_task', 'read', time_per_call(read, number, repeat)
+
+    path = task.path
+
+    def get_value():
+        database.get_value(path, 'T_a')
+    yield 'get_value', 'read', time_per_call(get_value, number, repeat)
+
+
+@benchmark('evaluation')
+def bench_evaluation(options):
+    """Cost of formatting and evaluating strings referencing the database.
+
+    """
+    _, task = build_prepared_tree()
+    number = options.number(20000)
+    repeat = options.repeat
+
+    def format_string():
+        task.format_string('{T_a}_{T_c}')
+    yield ('format_string', 'call',
+           time_per_call(format_string, number, repeat))
+
+    def format_and_eval():
+        task.format_and_eval_string('{T_a}*2 + {T_b}')
+    yield ('format_and_eval', 'call',
+           time_per_call(format_and_eval, number, repeat))
+
+    def constant():
+        task.format_and_eval_string('2.5*4')
+    yield 'eval_constant', 'call', time_per_call(constant, number, repeat)
+
+    evaluate = task.compile_evaluation('{T_a}*2 + {T_b}')
+    yield 'compiled', 'call', time_per_call(evaluate, number*10, repeat)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Benchmarks of the latency of the process engine.
+
+The ProcessEngine itself relies on the application event loop, so the
+subprocess it uses is driven directly using the same protocol.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import shutil
+from tempfile import mkdtemp
+from timeit import default_timer
+from multiprocessing import Pipe, Queue, Event
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+from ecpy.tasks.tasks.logic.loop_task import LoopTask
+from ecpy.tasks.tasks.logic.loop_iterable_interface\
+    import IterableLoopInterface
+from ecpy.measure.engines.process_engine.subprocess import TaskProcess
+
+from .harness import benchmark, make_root, collect_build_dependencies
+
+
+#: Maximal time to wait for an answer of the subprocess.
+TIMEOUT = 60
+
+
+class SubprocessDriver(object):
+    """Drive the subprocess of the process engine.
+
+    Parameters
+    ----------
+    folder : unicode
+        Folder in which the measures write their logs.
+
+    points : int
+        Number of points of the measures.
+
+    """
+
+    def __init__(self, folder, points):
+        root = make_root(default_path=folder)
+        loop = LoopTask(name='Loop',
+                        interface=IterableLoopInterface(
+                            iterable='range(%d)' % points))
+        root.add_child_task(0, loop)
+        root.update_preferences_from_members()
+        self.args = ('bench', root.preferences,
+                     collect_build_dependencies(root), {},
+                     ['root/Loop_value'],
+                     root.database.copy_node_values(), False, [], {})
+        self.process = None
+
+    def start(self):
+        """Start the subprocess.
+
+        """
+        self.pipe, process_pipe = Pipe()
+        self.log_queue = Queue()
+        self.monitor_queue = Queue()
+        self.process_stop = Event()
+        self.process = TaskProcess(process_pipe, self.log_queue,
+                                   self.monitor_queue, Event(), Event(),
+                                   Event(), Event(), self.process_stop)
+        self.process.start()
+
+    def run_measure(self):
+        """Send the measure and wait for it to complete.
+
+        Returns
+        -------
+        first_point : float
+            Time at which the first update of the monitored entry was
+            received.
+
+        done : float
+            Time at which the result of the measure was received.
+
+        """
+        self.pipe.send(self.args)
+        if not self.pipe.poll(TIMEOUT):
+            raise RuntimeError('The subprocess did not receive the measure.')
+        self.pipe.recv()
+        self.monitor_queue.get(timeout=TIMEOUT)
+        first_point = default_timer()
+
+        if not self.pipe.poll(TIMEOUT):
+            raise RuntimeError('The measure did not complete.')
+        result = self.pipe.recv()
+        done = default_timer()
+        if not result[0]:
+            raise RuntimeError('The measure failed : %s' % (result[1],))
+
+        # Wait for the spy to be closed so that the next measure starts with
+        # an empty queue.
+        while self.monitor_queue.get(timeout=TIMEOUT) != ('', ''):
+            pass
+        self._drain_logs()
+        return first_point, done
+
+    def stop(self):
+        """Stop the subprocess and wait for it to exit.
+
+        """
+        self.process_stop.set()
+        while True:
+            try:
+                if self.log_queue.get(timeout=TIMEOUT) is None:
+                    break
+            except Empty:
+                break
+        self.process.join(TIMEOUT)
+        self.pipe.close()
+        self.process = None
+
+    def _drain_logs(self):
+        """Discard the log records sent so far by the subprocess.
+
+        """
+        try:
+            while True:
+                self.log_queue.get_nowait()
+        except Empty:
+            pass
+
+
+@benchmark('engine')
+def bench_subprocess_latency(options):
+    """Latency between the request of a measure and its first point.
+
+    The cold latency includes the start of the subprocess, the warm one is
+    measured on a subprocess which already performed a measure.
+
+    """
+    folder = mkdtemp()
+    driver = SubprocessDriver(folder, options.number(100))
+    cold, warm, round_trip = [], [], []
+    try:
+        for _ in range(options.repeat):
+            start = default_timer()
+            driver.start()
+            first_point, _ = driver.run_measure()
+            cold.append(first_point - start)
+
+            start = default_timer()
+            first_point, done = driver.run_measure()
+            warm.append(first_point - start)
+            round_trip.append(done - start)
+            driver.stop()
+    finally:
+        if driver.process is not None:
+            driver.process.terminate()
+        shutil.rmtree(folder, ignore_errors=True)
+
+    yield 'start_to_first_point', 'measure', cold
+    yield 'send_to_first_point', 'measure', warm
+    yield 'round_trip', 'measure', round_trip
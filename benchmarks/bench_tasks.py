@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Benchmarks of the execution of hierarchies of tasks.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from copy import deepcopy
+
+from ecpy.tasks.tasks.base_tasks import SimpleTask, ComplexTask
+from ecpy.tasks.tasks.logic.loop_task import LoopTask
+from ecpy.tasks.tasks.logic.loop_iterable_interface\
+    import IterableLoopInterface
+from ecpy.tasks.tasks.logic.loop_linspace_interface\
+    import LinspaceLoopInterface
+from ecpy.tasks.api import build_task_from_config
+
+from .harness import (benchmark, make_root, time_run,
+                      collect_build_dependencies)
+
+
+#: Nesting depths of the loops used to measure the loop overhead.
+LOOP_DEPTHS = (1, 2, 3)
+
+
+class NoopTask(SimpleTask):
+    """Task doing nothing.
+
+    """
+    def perform(self):
+        pass
+
+
+def build_nested_loops(depth, points, compiled=False):
+    """Build a hierarchy of empty nested loops.
+
+    """
+    root = make_root(compiled_execution=compiled)
+    parent = root
+    for i in range(depth):
+        loop = LoopTask(name='Loop%d' % i,
+                        interface=IterableLoopInterface(
+                            iterable='range(%d)' % points))
+        parent.add_child_task(0, loop)
+        parent = loop
+    return root
+
+
+def perform_root(root):
+    """Perform a root task and fail loudly if an error occured.
+
+    """
+    if not root.perform():
+        raise RuntimeError('Execution failed : %s' % root.errors)
+
+
+@benchmark('tasks')
+def bench_empty_loops(options):
+    """Iteration rate of empty loops at several nesting depths.
+
+    The total number of iterations of the innermost loop is roughly the same
+    for all depths.
+
+    """
+    total = options.number(20000)
+    for compiled in (False, True):
+        for depth in LOOP_DEPTHS:
+            points = max(2, int(round(total**(1/depth))))
+            samples = time_run(lambda: build_nested_loops(depth, points,
+                                                          compiled),
+                               perform_root, points**depth, options.repeat)
+            name = 'empty_loop_depth%d%s' % (depth,
+                                             '_compiled' if compiled else '')
+            yield name, 'iteration', samples
+
+
+@benchmark('tasks')
+def bench_parallel_pool(options):
+    """Throughput of a pool executing tasks sent from a loop.
+
+    The root task waits for all the pools to be done before returning, so the
+    whole execution is measured.
+
+    """
+    number = options.number(2000)
+
+    def setup():
+        root = make_root()
+        loop = LoopTask(name='Loop',
+                        interface=IterableLoopInterface(
+                            iterable='range(%d)' % number))
+        task = NoopTask(name='Noop')
+        task.parallel = {'activated': True, 'pool': 'bench'}
+        root.add_child_task(0, loop)
+        loop.add_child_task(0, task)
+        return root
+
+    yield ('parallel_pool', 'task',
+           time_run(setup, perform_root, number, options.repeat))
+
+
+def build_large_tree(loops=10, tasks=5):
+    """Build a hierarchy mixing loops, complex tasks and simple tasks.
+
+    """
+    root = make_root()
+    for i in range(loops):
+        interface = (IterableLoopInterface(iterable='range(10)') if i % 2
+                     else LinspaceLoopInterface(start='0', stop='1',
+                                                step='0.1'))
+        loop = LoopTask(name='Loop%d' % i, interface=interface)
+        root.add_child_task(i, loop)
+        comp = ComplexTask(name='Comp%d' % i)
+        loop.add_child_task(0, comp)
+        for j in range(tasks):
+            comp.add_child_task(j, NoopTask(name='Noop%d_%d' % (i, j)))
+    return root
+
+
+@benchmark('tasks')
+def bench_build_from_config(options):
+    """Time necessary to rebuild a hierarchy of tasks from its config.
+
+    """
+    root = build_large_tree()
+    root.update_preferences_from_members()
+    config = root.preferences.dict()
+    deps = collect_build_dependencies(root)
+    number = options.number(20)
+    size = len(list(root.traverse()))
+
+    def setup():
+        return [deepcopy(config) for _ in range(number)]
+
+    def run(configs):
+        for c in configs:
+            build_task_from_config(c, deps, True)
+
+    yield ('build_from_config', 'tree of %d components' % size,
+           time_run(setup, run, number, options.repeat))
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Minimal harness used to declare, run and summarize benchmarks.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import gc
+from collections import OrderedDict
+from itertools import repeat as irepeat
+from timeit import default_timer
+from multiprocessing import Event
+
+from ecpy.tasks.tasks.base_tasks import RootTask
+from ecpy.tasks.tasks.task_interface import DEP_TYPE as INTERFACE_DEP_TYPE
+from ecpy.tasks.tasks.base_tasks import DEP_TYPE as TASK_DEP_TYPE
+
+
+#: Registered benchmarks by group name.
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(group):
+    """Register a benchmark function under a group name.
+
+    A benchmark function is called with a BenchmarkOptions object and must
+    yield tuples (name, unit, samples) where samples are durations in seconds
+    of a single operation (as described by unit). The full name of a result
+    is group.name.
+
+    """
+    def decorator(func):
+        BENCHMARKS.setdefault(group, []).append(func)
+        return func
+
+    return decorator
+
+
+class BenchmarkOptions(object):
+    """Options shared by all benchmarks.
+
+    Parameters
+    ----------
+    repeat : int
+        Number of samples to collect for each result.
+
+    scale : float
+        Factor applied to the number of operations performed per sample.
+
+    """
+
+    __slots__ = ('repeat', 'scale')
+
+    def __init__(self, repeat=5, scale=1.0):
+        self.repeat = repeat
+        self.scale = scale
+
+    def number(self, base):
+        """Scale a number of operations, always returning at least 1.
+
+        """
+        return max(1, int(base*self.scale))
+
+
+def time_per_call(func, number, repeat):
+    """Measure the duration of a call to a function.
+
+    The garbage collector is disabled while measuring, as timeit does.
+
+    Parameters
+    ----------
+    func : callable
+        Function to call without arguments.
+
+    number : int
+        Number of calls per sample.
+
+    repeat : int
+        Number of samples.
+
+    Returns
+    -------
+    samples : list(float)
+        Mean duration of a call, for each sample.
+
+    """
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = default_timer()
+            for _ in irepeat(None, number):
+                func()
+            samples.append((default_timer() - start)/number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples
+
+
+def time_run(setup, run, operations, repeat):
+    """Measure the duration of an operation from a run performing many.
+
+    Parameters
+    ----------
+    setup : callable
+        Function called before each run, its return value is passed to run.
+        It is not timed.
+
+    run : callable
+        Function performing the operations.
+
+    operations : int
+        Number of operations performed by a run.
+
+    repeat : int
+        Number of samples.
+
+    Returns
+    -------
+    samples : list(float)
+        Mean duration of an operation, for each sample.
+
+    """
+    samples = []
+    for _ in range(repeat):
+        state = setup()
+        start = default_timer()
+        run(state)
+        samples.append((default_timer() - start)/operations)
+    return samples
+
+
+def summarize(samples, unit):
+    """Compute the statistics reported for a result.
+
+    """
+    ordered = sorted(samples)
+    length = len(ordered)
+    middle = length//2
+    if length % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle])/2
+    return OrderedDict([('unit', unit), ('samples', length),
+                        ('min', ordered[0]), ('median', median),
+                        ('mean', sum(ordered)/length), ('max', ordered[-1])])
+
+
+def run_benchmarks(options, selection=None, report=None):
+    """Run the registered benchmarks.
+
+    Parameters
+    ----------
+    options : BenchmarkOptions
+        Options to pass to the benchmarks.
+
+    selection : iterable(unicode), optional
+        Only the results whose full names contain one of those strings are
+        kept. The benchmarks whose group or function name contains none of
+        them are not run.
+
+    report : callable, optional
+        Callable called with the name and the summary of each result as soon
+        as it is available.
+
+    Returns
+    -------
+    results : OrderedDict
+        Summary of each result by full name.
+
+    """
+    selection = list(selection or ())
+
+    def selected(name):
+        return not selection or any(s in name for s in selection)
+
+    results = OrderedDict()
+    for group, funcs in BENCHMARKS.items():
+        for func in funcs:
+            if selection and not selected(group) and\
+                    not selected(group + '.' + func.__name__):
+                continue
+            for name, unit, samples in func(options):
+                full_name = group + '.' + name
+                if not selected(full_name):
+                    continue
+                results[full_name] = summarize(samples, unit)
+                if report:
+                    report(full_name, results[full_name])
+
+    return results
+
+
+def make_root(**kwargs):
+    """Create a root task usable outside of a measure.
+
+    """
+    return RootTask(should_stop=Event(), should_pause=Event(),
+                    paused=Event(), resumed=Event(), **kwargs)
+
+
+def collect_build_dependencies(root):
+    """Collect the classes necessary to rebuild a hierarchy from its config.
+
+    """
+    deps = {TASK_DEP_TYPE: {}, INTERFACE_DEP_TYPE: {}}
+    for component in root.traverse():
+        if hasattr(component, 'task_id'):
+            deps[TASK_DEP_TYPE][component.task_id] = type(component)
+        else:
+            deps[INTERFACE_DEP_TYPE][component.interface_id] =\
+                type(component)
+    return deps
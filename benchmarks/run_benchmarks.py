@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Run the benchmarks of the execution core of Ecpy.
+
+The benchmarks do not need a Qt event loop. Results can be saved as JSON and
+compared to the results obtained on another commit, for example::
+
+    python -m benchmarks.run_benchmarks -o base.json
+    git checkout my-branch
+    python -m benchmarks.run_benchmarks -o new.json --compare base.json
+
+When comparing, the exit code is 1 if a result regressed by more than the
+threshold.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import io
+import os
+import sys
+import json
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+from collections import OrderedDict
+
+from .harness import BenchmarkOptions, run_benchmarks
+from . import bench_database, bench_tasks, bench_engine  # noqa
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def format_duration(duration):
+    """Format a duration in seconds using an appropriate unit.
+
+    """
+    for unit, factor in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if duration >= 1/factor:
+            return '%.3g %s' % (duration*factor, unit)
+    return '%.3g ns' % (duration*1e9)
+
+
+def get_commit():
+    """Get the commit of the benchmarked sources if they are in a git repo.
+
+    """
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=HERE, stderr=subprocess.STDOUT)
+    except Exception:
+        return None
+    return output.decode('ascii').strip()
+
+
+def build_metadata(options):
+    """Collect the informations identifying a run.
+
+    """
+    from ecpy.version import __version__
+    return OrderedDict([('commit', get_commit()),
+                        ('ecpy', __version__),
+                        ('date', datetime.now().isoformat()),
+                        ('python', platform.python_version()),
+                        ('implementation', platform.python_implementation()),
+                        ('platform', platform.platform()),
+                        ('repeat', options.repeat),
+                        ('scale', options.scale)])
+
+
+def compare(results, reference, threshold):
+    """Print the ratio between the median of new and reference results.
+
+    Returns
+    -------
+    regressions : list(unicode)
+        Names of the results which are slower than the reference by more than
+        the threshold.
+
+    """
+    regressions = []
+    print('\n%-50s %12s %12s %8s' % ('benchmark', 'reference', 'new',
+                                     'ratio'))
+    for name, summary in results.items():
+        if name not in reference:
+            continue
+        old = reference[name]['median']
+        new = summary['median']
+        ratio = new/old if old else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = ' slower'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = ' faster'
+        print('%-50s %12s %12s %8.2f%s' % (name, format_duration(old),
+                                           format_duration(new), ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    """Parse the command line arguments and run the benchmarks.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-k', '--select', action='append',
+                        help='Only run the benchmarks whose name contains '
+                             'this string (can be repeated).')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Number of samples per result.')
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+                        help='Factor applied to the number of operations '
+                             'per sample.')
+    parser.add_argument('-o', '--output',
+                        help='Path of the JSON file in which to save the '
+                             'results.')
+    parser.add_argument('-c', '--compare',
+                        help='Path of a JSON file holding reference results.')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help='Relative slow down above which a result is '
+                             'considered as a regression.')
+    args = parser.parse_args(argv)
+
+    options = BenchmarkOptions(args.repeat, args.scale)
+
+    def report(name, summary):
+        print('%-50s %12s / %s' % (name, format_duration(summary['median']),
+                                   summary['unit']))
+        sys.stdout.flush()
+
+    results = run_benchmarks(options, args.select, report)
+
+    if args.output:
+        data = OrderedDict([('metadata', build_metadata(options)),
+                            ('results', results)])
+        with io.open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            reference = json.load(f)['results']
+        if compare(results, reference, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
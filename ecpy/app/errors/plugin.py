@@ -21,7 +21,7 @@ from traceback import format_exc
 import enaml
 from atom.api import List, Typed, Int
 from enaml.workbench.api import Plugin
-from enaml.application import deferred_call
+from enaml.application import Application, deferred_call
 
 from .errors import ErrorHandler
 from ...utils.plugin_tools import ExtensionsCollector, make_extension_validator
@@ -86,6 +86,9 @@ class ErrorsPlugin(Plugin):
         widget = self._handle(kind, kwargs)
 
         if widget:
+            if Application.instance() is None:
+                self._log_errors({kind: kwargs})
+                return
             # Show dialog in application modal mode
             dial = ErrorsDialog(errors={kind: widget})
             deferred_call(dial.exec_)
@@ -144,6 +147,7 @@ class ErrorsPlugin(Plugin):
 
             # Handle all delayed errors
             errors = {}
+            infos = {}
             while self._delayed:
                 delayed = self._delayed.copy()
                 self._delayed.clear()
@@ -151,10 +155,14 @@ class ErrorsPlugin(Plugin):
                     res = self._handle(kind, delayed[kind])
                     if res:
                         errors[kind] = res
+                        infos[kind] = delayed[kind]
 
             self._gathering_counter = 0
 
             if errors:
+                if Application.instance() is None:
+                    self._log_errors(infos)
+                    return
                 dial = ErrorsDialog(errors=errors)
                 deferred_call(dial.exec_)
 
@@ -202,6 +210,17 @@ class ErrorsPlugin(Plugin):
         else:
             return self._handle_unknwon(kind, infos)
 
+    def _log_errors(self, errors):
+        """Log errors which cannot be displayed as no application is running.
+
+        """
+        for kind, infos in errors.items():
+            try:
+                msg = pformat(infos)
+            except Exception:
+                msg = 'Failed to format the errors infos.\n' + format_exc()
+            logger.error('Error of kind "%s" occured:\n%s', kind, msg)
+
     def _handle_unknwon(self, kind, infos):
         """Generic handler for unregistered kind of errors.
 
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Command line script running saved measures without user interface.
+
+The application plugins are started without the ui plugin, so that no
+display and no Qt event loop are needed. Each measure is loaded, its
+dependencies are collected and it is run (checks, pre-execution hooks, main
+task and post-execution hooks) as when the measure is processed from the
+measure workspace, except that monitors are not used. The status of each
+measure is printed on stdout and the exit code is non-zero if a measure did
+not complete.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import sys
+import logging
+from threading import Thread
+from argparse import ArgumentParser
+
+import enaml
+from enaml.workbench.api import Workbench
+
+from .measure.measure import Measure
+from .measure.processor import HeadlessMeasureProcessor, errors_to_msg
+
+with enaml.imports():
+    from enaml.workbench.core.core_manifest import CoreManifest
+    from ecpy.app.app_manifest import AppManifest
+    from ecpy.app.preferences.manifest import PreferencesManifest
+    from ecpy.app.states.manifest import StateManifest
+    from ecpy.app.dependencies.manifest import DependenciesManifest
+    from ecpy.app.errors.manifest import ErrorsManifest
+    from ecpy.app.packages.manifest import PackagesManifest
+    from ecpy.app.log.manifest import LogManifest
+    from ecpy.measure.manifest import MeasureManifest
+    from ecpy.instruments.manifest import InstrumentManagerManifest
+    from ecpy.tasks.manifest import TasksManagerManifest
+
+
+#: Ids of the manifests registered by start_workbench in registering order.
+MANIFESTS = (('enaml.workbench.core', CoreManifest),
+             ('ecpy.app', AppManifest),
+             ('ecpy.app.states', StateManifest),
+             ('ecpy.app.errors', ErrorsManifest),
+             ('ecpy.app.preferences', PreferencesManifest),
+             ('ecpy.app.logging', LogManifest),
+             ('ecpy.app.packages', PackagesManifest),
+             ('ecpy.app.dependencies', DependenciesManifest),
+             ('ecpy.instruments', InstrumentManagerManifest),
+             ('ecpy.tasks', TasksManagerManifest),
+             ('ecpy.measure', MeasureManifest))
+
+
+def build_parser():
+    """Build the parser for the command line arguments.
+
+    """
+    parser = ArgumentParser(description='Run saved Ecpy measures without '
+                                        'user interface.')
+    parser.add_argument('measures', nargs='+', metavar='MEASURE',
+                        help='Path to a .meas.ini file.')
+    parser.add_argument('-e', '--engine',
+                        help='Id of the engine to use. By default the engine '
+                             'selected in the application is used.')
+    parser.add_argument('-n', '--no-checks', action='store_true',
+                        help='Skip the checks of the measures.')
+    parser.add_argument('-x', '--exitfirst', action='store_true',
+                        help='Stop after the first measure which does not '
+                             'complete.')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print the log records on stderr.')
+    return parser
+
+
+def start_workbench(args):
+    """Register the application plugins and run the startup operations.
+
+    """
+    workbench = Workbench()
+    for _, manifest in MANIFESTS:
+        workbench.register(manifest())
+
+    # The streams are never redirected to the log system so that the results
+    # can be printed.
+    args.nocapture = True
+    app = workbench.get_plugin('ecpy.app')
+    app.run_app_startup(args)
+
+    return workbench
+
+
+def stop_workbench(workbench):
+    """Unregister all the plugins.
+
+    """
+    workbench.unregister('ecpy.app.packages')
+    for manifest_id, _ in reversed(MANIFESTS):
+        if manifest_id != 'ecpy.app.packages':
+            workbench.unregister(manifest_id)
+
+
+def run_measure(processor, measure):
+    """Run a measure in a thread so that it can be interrupted using Ctrl-C.
+
+    A first interruption stops the measure, a second one forces the engine to
+    stop.
+
+    """
+    result = []
+    thread = Thread(target=lambda: result.extend(
+        processor.run_measure(measure)))
+    thread.daemon = True
+    thread.start()
+
+    interruptions = 0
+    while thread.is_alive():
+        try:
+            thread.join(0.1)
+        except KeyboardInterrupt:
+            interruptions += 1
+            processor.stop_measure(force=interruptions > 1)
+
+    if not result:
+        return 'FAILED', 'The measure processing stopped unexpectedly.'
+    return result
+
+
+def main(cmd_line_args=None):
+    """Run the measures passed on the command line.
+
+    Returns
+    -------
+    exit_code : int
+        0 if all measures completed, 1 otherwise.
+
+    """
+    args = build_parser().parse_args(cmd_line_args)
+
+    if args.verbose:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s '
+                                               '| %(message)s'))
+        logging.getLogger().addHandler(handler)
+
+    workbench = start_workbench(args)
+    plugin = workbench.get_plugin('ecpy.measure')
+    processor = HeadlessMeasureProcessor(plugin=plugin)
+    plugin.processor = processor
+    if args.engine:
+        if args.engine not in plugin.engines:
+            print('Unknown engine %s, available engines are : %s' %
+                  (args.engine, ', '.join(plugin.engines)))
+            stop_workbench(workbench)
+            return 1
+        plugin.selected_engine = args.engine
+
+    exit_code = 0
+    try:
+        for path in args.measures:
+            measure, errors = Measure.load(plugin, path)
+            if measure is None:
+                status = 'FAILED'
+                infos = ('Failed to load the measure :\n' +
+                         errors_to_msg(errors))
+            else:
+                measure.forced_enqueued = args.no_checks
+                status, infos = run_measure(processor, measure)
+
+            print('%s : %s' % (path, status))
+            if status != 'COMPLETED':
+                print(infos)
+                exit_code = 1
+                if args.exitfirst:
+                    break
+            sys.stdout.flush()
+
+    finally:
+        processor.stop_engine()
+        stop_workbench(workbench)
+
+    return exit_code
+
+
+if __name__ == '__main__':
+
+    sys.exit(main())  # pragma: no cover
@@ -40,6 +40,10 @@ class ExecutionInfos(Atom):
     #: processing.
     observed_entries = List()
 
+    #: List of entries for which all the values written during processing
+    #: should be saved in a file.
+    recorded_entries = List()
+
     #: Boolean indicating whether the engine should run the checks of the task.
     checks = Bool(True)
 
@@ -50,6 +54,19 @@ class ExecutionInfos(Atom):
     #: Errors which occured during the execution of the task if any.
     errors = Dict()
 
+    #: Execution statistics of the tasks by task path, if the task was
+    #: profiled.
+    profile = Dict()
+
+    #: Last values of the entries whose history was kept during the execution
+    #: (see RootTask.history_sizes), by entry path, as tuples of timestamps
+    #: and values arrays.
+    histories = Dict()
+
+    #: Reason for which the recording of some of the recorded entries stopped
+    #: before the end of the execution, by entry.
+    record_issues = Dict()
+
 
 class BaseEngine(Atom):
     """Base class for all engines.
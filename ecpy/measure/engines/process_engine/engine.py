@@ -17,20 +17,39 @@ from multiprocessing import Pipe, Queue, Event
 from threading import Thread
 from threading import Event as tEvent
 
-from atom.api import Typed, Value, Bool
+from atom.api import Typed, Value, Bool, Int, Float
 
 from ....app.log.tools import QueueLoggerThread
+from ....utils.flags import SharedBitFlag
 from ..base_engine import BaseEngine
-from ..utils import ThreadMeasureMonitor
+from ..utils import (ThreadMeasureMonitor, ThreadMirrorMonitor,
+                     SharedDatabaseMirror)
 from .subprocess import TaskProcess
 
 logger = logging.getLogger(__name__)
 
+#: Flags used to control the execution of the current job of the subprocess.
+TASK_FLAGS = ('pause', 'paused', 'resumed', 'stop')
+
 
 class ProcessEngine(BaseEngine):
     """An engine executing the tasks it is sent in a different process.
 
+    By default the values of the monitored entries are sent through a queue.
+    If shared_memory_monitoring is True, the numeric values are instead
+    written by the subprocess into a shared memory mirror which is sampled
+    every mirror_period.
+
     """
+    #: Whether to transmit the numeric values of the monitored entries using
+    #: shared memory. Only taken into account when the subprocess is created.
+    shared_memory_monitoring = Bool().tag(pref=True)
+
+    #: Number of entries which can be transmitted using shared memory.
+    mirror_size = Int(256).tag(pref=True)
+
+    #: Time (in s) between two samplings of the shared memory mirror.
+    mirror_period = Float(0.1).tag(pref=True)
 
     def perform(self, exec_infos):
         """Execute a given task.
@@ -56,10 +75,7 @@ class ProcessEngine(BaseEngine):
         self.status = 'Running'
 
         # Clear all the flags.
-        self._task_pause.clear()
-        self._task_paused.clear()
-        self._task_resumed.clear()
-        self._task_stop.clear()
+        self._task_flags.clear()
         self._force_stop.clear()
         self._stop_requested = False
 
@@ -67,6 +83,8 @@ class ProcessEngine(BaseEngine):
         if not self._process or not self._process.is_alive():
 
             self._process_stop.clear()
+            self._mirror = (SharedDatabaseMirror(self.mirror_size)
+                            if self.shared_memory_monitoring else None)
 
             # Create the subprocess and the pipe.
             self._pipe, process_pipe = Pipe()
@@ -77,7 +95,8 @@ class ProcessEngine(BaseEngine):
                                         self._task_paused,
                                         self._task_resumed,
                                         self._task_stop,
-                                        self._process_stop)
+                                        self._process_stop,
+                                        self._mirror)
             self._process.daemon = True
 
             # Create the logger thread in charge of dispatching log reports.
@@ -99,8 +118,23 @@ class ProcessEngine(BaseEngine):
             logger.debug('Starting subprocess')
             self._process.start()
 
+        # Allocate the slots of the mirror and start sampling it.
+        mirror_slots = {}
+        if self._mirror:
+            self._mirror.clear()
+            entries = sorted(exec_infos.observed_entries)
+            mirror_slots = {e: i for i, e in
+                            enumerate(entries[:self._mirror.size])}
+            self._mirror_thread = ThreadMirrorMonitor(
+                self, self._mirror, {i: e for e, i in mirror_slots.items()},
+                self.mirror_period)
+            self._mirror_thread.daemon = True
+            self._mirror_thread.start()
+            self._monitor_thread.mirror_monitor = self._mirror_thread
+
         # Send the measure.
-        self._pipe.send(self._build_subprocess_args(exec_infos))
+        self._pipe.send(self._build_subprocess_args(exec_infos) +
+                        (mirror_slots,))
         logger.debug('Task {} sent'.format(exec_infos.id))
 
         # Check that the engine did receive the task.
@@ -110,6 +144,7 @@ class ProcessEngine(BaseEngine):
                 logger.debug(msg)
                 self._log_queue.put(None)
                 self._monitor_queue.put((None, None))
+                self._stop_mirror_thread()
                 self._cleanup(process=False)
                 exec_infos.success = False
                 exec_infos.errors['engine'] = msg
@@ -125,6 +160,7 @@ class ProcessEngine(BaseEngine):
             if self._force_stop.is_set():
                 msg = 'Subprocess was terminated by the user.'
                 logger.debug(msg)
+                self._stop_mirror_thread()
                 self._cleanup(process=False)
                 exec_infos.errors['engine'] = msg
                 self.status = 'Stopped'
@@ -135,6 +171,7 @@ class ProcessEngine(BaseEngine):
                 logger.debug(msg)
                 self._log_queue.put(None)
                 self._monitor_queue.put((None, None))
+                self._stop_mirror_thread()
                 self._cleanup(process=False)
                 exec_infos.success = False
                 exec_infos.errors['engine'] = msg
@@ -142,11 +179,15 @@ class ProcessEngine(BaseEngine):
                 return exec_infos
 
         # Here get message from process and react
-        result, errors = self._pipe.recv()
+        result, errors, profile, histories, issues = self._pipe.recv()
         logger.debug('Subprocess done performing measure')
+        self._stop_mirror_thread()
 
         exec_infos.success = result
         exec_infos.errors.update(errors)
+        exec_infos.profile = profile
+        exec_infos.histories = histories
+        exec_infos.record_issues = issues
 
         self.status = 'Waiting'
 
@@ -201,10 +242,11 @@ class ProcessEngine(BaseEngine):
             self._log_thread.join()
             self._monitor_thread.join()
 
-            # Discard the queues as they may have been corrupted when the
-            # process was terminated.
+            # Discard the queues and flags as they may have been corrupted
+            # when the process was terminated.
             self._log_queue = Queue()
             self._monitor_queue = Queue()
+            self._task_flags = SharedBitFlag(TASK_FLAGS)
 
             self.status = 'Stopped'
 
@@ -237,17 +279,21 @@ class ProcessEngine(BaseEngine):
     #: Boolean indicating that the user requested the job to stop.
     _stop_requested = Bool()
 
+    #: Interprocess flags, stored in shared memory, used to control the
+    #: subprocess current job. The events below are views on those flags.
+    _task_flags = Value(factory=lambda: SharedBitFlag(TASK_FLAGS))
+
     #: Interprocess event used to pause the subprocess current job.
-    _task_pause = Value(factory=Event)
+    _task_pause = Value()
 
     #: Interprocess event signaling the subprocess current job is paused.
-    _task_paused = Value(factory=Event)
+    _task_paused = Value()
 
     #: Interprocess event signaling the subprocess current job has resumed.
-    _task_resumed = Value(factory=Event)
+    _task_resumed = Value()
 
     #: Interprocess event used to stop the subprocess current measure.
-    _task_stop = Value(factory=Event)
+    _task_stop = Value()
 
     #: Interprocess event used to stop the subprocess.
     _process_stop = Value(factory=Event)
@@ -277,10 +323,38 @@ class ProcessEngine(BaseEngine):
     #: entries.
     _monitor_thread = Typed(Thread)
 
+    #: Shared memory mirror used to transmit the numeric values of the
+    #: monitored entries. None if shared memory monitoring is not used.
+    _mirror = Typed(SharedDatabaseMirror)
+
+    #: Thread sampling the mirror during the execution of a job.
+    _mirror_thread = Typed(Thread)
+
     #: Thread in charge of notifying the engine that the engine did
     #: pause/resume after being asked to do so.
     _pause_thread = Typed(Thread)
 
+    def _default__task_pause(self):
+        return self._task_flags.event('pause')
+
+    def _default__task_paused(self):
+        return self._task_flags.event('paused')
+
+    def _default__task_resumed(self):
+        return self._task_flags.event('resumed')
+
+    def _default__task_stop(self):
+        return self._task_flags.event('stop')
+
+    def _post_setattr__task_flags(self, old, new):
+        """Update the events when the flags are replaced.
+
+        """
+        self._task_pause = new.event('pause')
+        self._task_paused = new.event('paused')
+        self._task_resumed = new.event('resumed')
+        self._task_stop = new.event('stop')
+
     def _cleanup(self, process=True):
         """ Helper method taking care of making sure that everybody stops.
 
@@ -311,6 +385,18 @@ class ProcessEngine(BaseEngine):
 
         self.status = 'Stopped'
 
+    def _stop_mirror_thread(self):
+        """Stop the thread sampling the mirror after a last sampling.
+
+        """
+        if self._mirror_thread:
+            if self._monitor_thread:
+                self._monitor_thread.mirror_monitor = None
+            self._mirror_thread.stop()
+            self._mirror_thread.join()
+            self._mirror_thread = None
+            logger.debug('Mirror thread joined')
+
     def _build_subprocess_args(self, exec_infos):
         """Build the tuple to send to the subprocess.
 
@@ -323,7 +409,8 @@ class ProcessEngine(BaseEngine):
                 exec_infos.runtime_deps,
                 exec_infos.observed_entries,
                 database_root_state,
-                exec_infos.checks
+                exec_infos.checks,
+                exec_infos.recorded_entries
                 )
 
     def _wait_for_pause(self):
@@ -20,7 +20,7 @@ from multiprocessing import Process
 
 from ....app.log.tools import (StreamToLogRedirector, DayRotatingTimeHandler)
 from ....tasks.api import build_task_from_config
-from ..utils import MeasureSpy
+from ..utils import MeasureSpy, MeasureRecorder
 from ...processor import errors_to_msg
 
 
@@ -33,7 +33,8 @@ class TaskProcess(Process):
     measures through the pipe. Upon reception of the `ConfigObj` object
     describing the measure it rebuilds it, set up a logger for that specific
     measure and if necessary starts a spy transmitting the value of all
-    monitored entries to the main process. It finally run the checks of the
+    monitored entries to the main process and a recorder saving all the
+    values of the recorded entries. It finally run the checks of the
     measure and run it. It can be interrupted by setting an event and upon
     exit close the communication pipe and signal all listeners that it is
     closing.
@@ -64,6 +65,10 @@ class TaskProcess(Process):
     process_stop :
         Event set when the user asked the process to stop.
 
+    mirror : SharedDatabaseMirror, optional
+        Shared memory mirror in which to write the numeric values of the
+        monitored entries which were allocated a slot.
+
     Attributes
     ----------
     meas_log_handler : log handler
@@ -79,7 +84,7 @@ class TaskProcess(Process):
     """
 
     def __init__(self, pipe, log_queue, monitor_queue, task_pause, task_paused,
-                 task_resumed, task_stop, process_stop):
+                 task_resumed, task_stop, process_stop, mirror=None):
         super(TaskProcess, self).__init__(name='ecpy.MeasureProcess')
         self.daemon = True
         self.task_pause = task_pause
@@ -90,6 +95,7 @@ class TaskProcess(Process):
         self.pipe = pipe
         self.log_queue = log_queue
         self.monitor_queue = monitor_queue
+        self.mirror = mirror
         self.meas_log_handler = None
 
     def run(self):
@@ -125,8 +131,8 @@ class TaskProcess(Process):
                     break
 
                 # Get the measure.
-                name, config, build, runtime, entries, database, checks =\
-                    self.pipe.recv()
+                (name, config, build, runtime, entries, database, checks,
+                 recorded, mirror_slots) = self.pipe.recv()
                 self.pipe.send(True)
 
                 # Build it by using the given build dependencies.
@@ -141,12 +147,6 @@ class TaskProcess(Process):
 
                 logger.info('Task built')
 
-                # There are entries in the database we are supposed to
-                # monitor start a spy to do it.
-                if entries:
-                    spy = MeasureSpy(self.monitor_queue, entries,
-                                     root.database)
-
                 # Set up the logger for this specific measurement.
                 if self.meas_log_handler is not None:
                     logger.removeHandler(self.meas_log_handler)
@@ -168,32 +168,63 @@ class TaskProcess(Process):
                 root.should_stop = self.task_stop
                 root.resumed = self.task_resumed
 
-                # Perform the checks.
-                if checks:
-                    check, errors = root.check()
-                else:
-                    logger.info('Tests skipped')
-                    check = True
-
-                # If checks pass perform the measure.
-                if check:
-                    logger.info('Check successful')
-                    result = root.perform()
-
-                    self.pipe.send((result, root.errors))
-
-                # They fail, mark the measure as failed and go on.
-                else:
-                    self.pipe.send((False, errors))
-
-                    # Log the tests that failed.
-                    msg = 'Some test failed:\n' + errors_to_msg(errors)
-                    logger.debug(msg)
-
-                # If a spy was started kill it
+                # There are entries in the database we are supposed to
+                # monitor start a spy to do it.
                 if entries:
-                    spy.close()
-                    del spy
+                    spy = MeasureSpy(self.monitor_queue, entries,
+                                     root.database, self.mirror,
+                                     mirror_slots)
+
+                # Record all the values written in the recorded entries in
+                # a file next to the measure log.
+                if recorded:
+                    record_path = os.path.join(root.default_path,
+                                               name + '_record.npz')
+                    recorder = MeasureRecorder(record_path, recorded,
+                                               root.database)
+
+                try:
+                    # Perform the checks.
+                    if checks:
+                        check, errors = root.check()
+                    else:
+                        logger.info('Tests skipped')
+                        check = True
+
+                    # If checks pass perform the measure.
+                    if check:
+                        logger.info('Check successful')
+                        result = root.perform()
+                        answer = (result, root.errors, root.execution_profile,
+                                  root.entries_history)
+
+                    # They fail, mark the measure as failed and go on.
+                    else:
+                        answer = (False, errors, {}, {})
+
+                        # Log the tests that failed.
+                        msg = 'Some test failed:\n' + errors_to_msg(errors)
+                        logger.debug(msg)
+
+                finally:
+                    # If a spy was started kill it
+                    if entries:
+                        spy.close()
+                        del spy
+
+                    # If a recorder was started save the recorded values.
+                    record_issues = {}
+                    if recorded:
+                        try:
+                            record_issues = recorder.finalize()
+                        except Exception:
+                            logger.exception('Failed to save the recorded '
+                                             'values')
+                            msg = 'The recorded values could not be saved.'
+                            record_issues = dict.fromkeys(recorded, msg)
+                        del recorder
+
+                self.pipe.send(answer + (record_issues,))
 
             except Exception:
                 logger.exception('Error occured during processing')
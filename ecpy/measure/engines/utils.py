@@ -12,21 +12,349 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
+import os
 import logging
-from threading import Thread
+from shutil import rmtree
+from tempfile import mkdtemp
+from zipfile import ZipFile, ZIP_STORED
+from threading import Thread, Event, Lock
 from queue import Empty  # This is allowed thanks to the future package
 from multiprocessing.queues import Queue
+from multiprocessing.sharedctypes import RawArray
 
-from atom.api import Atom, Coerced, Typed
+import numpy as np
+from past.builtins import long
+from atom.api import Atom, Coerced, Typed, Dict, Unicode, List, Int
 
 from ...tasks.tasks.database import TaskDatabase
+from ...utils.npy_writer import NpyArrayWriter
+
+
+#: Kinds of the values which can be stored in a SharedDatabaseMirror slot,
+#: associated with the types of the values.
+MIRROR_KINDS = ((1, (bool, np.bool_)),
+                (2, (int, long, np.int64, np.int32)),
+                (3, (float, np.float64, np.float32)))
+
+
+class SharedDatabaseMirror(object):
+    """Shared memory copy of some numeric database entries.
+
+    Each slot holds a version counter, the kind of the value (bool, int or
+    float) and 8 bytes of data. The process writing into a slot follows a
+    seqlock protocol : the version is odd while the slot is being updated so
+    that readers can detect torn reads and retry, without any lock. Each slot
+    must be written by a single thread. The mirror should be passed to the
+    processes using it when they are created.
+
+    Parameters
+    ----------
+    size : int
+        Number of slots of the mirror.
+
+    """
+
+    __slots__ = ('size', '_versions', '_kinds', '_data', '_views')
+
+    def __init__(self, size):
+        self.size = size
+        self._versions = RawArray('l', size)
+        self._kinds = RawArray('b', size)
+        self._data = RawArray('d', size)
+        self._views = None
+
+    def publish(self, slot, value):
+        """Write a value in a slot.
+
+        Returns
+        -------
+        published : bool
+            False if the value cannot be stored in the mirror (non numeric
+            value or integer too large).
+
+        """
+        vtype = type(value)
+        for kind, types in MIRROR_KINDS:
+            if vtype in types:
+                break
+        else:
+            return False
+        if kind == 2 and not -2**63 <= value < 2**63:
+            return False
+
+        versions, kinds, floats, ints = self._get_views()
+        version = versions[slot]
+        versions[slot] = version + 1
+        kinds[slot] = kind
+        if kind == 3:
+            floats[slot] = value
+        else:
+            ints[slot] = value
+        versions[slot] = version + 2
+        return True
+
+    def read(self, slot):
+        """Read the value of a slot.
+
+        Returns
+        -------
+        state : tuple or None
+            Version of the slot (0 if the slot was never written) and value
+            stored in it. None if the slot was being written, in which case
+            the read should be attempted again later.
+
+        """
+        versions, kinds, floats, ints = self._get_views()
+        version = versions[slot]
+        if version % 2:
+            return None
+        kind = kinds[slot]
+        value = (floats[slot].item() if kind == 3 else
+                 bool(ints[slot]) if kind == 1 else
+                 ints[slot].item() if kind == 2 else None)
+        if versions[slot] != version:
+            return None
+        return int(version), value
+
+    def versions(self):
+        """Get a snapshot of the versions of all slots.
+
+        """
+        return self._get_views()[0].copy()
+
+    def clear(self):
+        """Reset all slots. No process should be writing into the mirror.
+
+        """
+        versions, kinds, _, ints = self._get_views()
+        versions[:] = 0
+        kinds[:] = 0
+        ints[:] = 0
+
+    def _get_views(self):
+        """Get numpy views on the shared arrays.
+
+        """
+        if self._views is None:
+            floats = np.ctypeslib.as_array(self._data)
+            self._views = (np.ctypeslib.as_array(self._versions),
+                           np.ctypeslib.as_array(self._kinds),
+                           floats, floats.view(np.int64))
+        return self._views
+
+    def __getstate__(self):
+        return (self.size, self._versions, self._kinds, self._data)
+
+    def __setstate__(self, state):
+        self.size, self._versions, self._kinds, self._data = state
+        self._views = None
+
+
+#: Data types of the record columns, from the narrowest to the widest, with
+#: the types of the scalars and the kinds of the arrays they are used for.
+COLUMN_KINDS = (('q', (bool, np.bool_, int, long, np.int64, np.int32), 'bi'),
+                ('d', (float, np.float64, np.float32), 'uf'),
+                ('D', (complex, np.complex128, np.complex64), 'c'))
+
+#: Position in COLUMN_KINDS of the kind of column used by scalar types.
+SCALAR_RANKS = {t: i for i, (_, types, _) in enumerate(COLUMN_KINDS)
+                for t in types}
+
+#: Position in COLUMN_KINDS of the kind of column used by array kinds.
+ARRAY_RANKS = {k: i for i, (_, _, kinds) in enumerate(COLUMN_KINDS)
+               for k in kinds}
+
+
+class RecordColumn(object):
+    """Column storing all the values written in an entry into a .npy file.
+
+    Scalars are stored as integers, floats or complex and numeric arrays as
+    arrays of the same kinds whose shape is the one of the first recorded
+    value. When a value of a wider kind is recorded (e.g. a float in an
+    integer column), the values recorded so far are converted. A value which
+    does not match the column stops the recording of the entry, the values
+    recorded so far being kept and the reason being stored in issue.
+
+    Parameters
+    ----------
+    entry : unicode
+        Full path of the recorded entry.
+
+    path : unicode
+        Path of the file in which to write the values.
+
+    chunk_size : int
+        Number of values accumulated in memory before being written.
+
+    """
+
+    __slots__ = ('entry', 'path', 'chunk_size', 'failed', 'issue', 'writer',
+                 '_rank', '_shape')
+
+    def __init__(self, entry, path, chunk_size):
+        self.entry = entry
+        self.path = path
+        self.chunk_size = chunk_size
+        self.failed = False
+        self.issue = ''
+        self.writer = None
+
+    def append(self, value):
+        """Record a value.
+
+        """
+        if self.failed:
+            return
+        rank = SCALAR_RANKS.get(type(value))
+        shape = ()
+        if rank is None and type(value) is np.ndarray:
+            rank = ARRAY_RANKS.get(value.dtype.kind)
+            shape = value.shape
+
+        writer = self.writer
+        if rank is None or (writer is not None and shape != self._shape):
+            self._fail(value)
+            return
+        if writer is None:
+            self._shape = shape
+            writer = self._create_writer(rank)
+        elif rank > self._rank:
+            writer = self._promote(rank)
+
+        try:
+            writer.append(value)
+        except OverflowError:
+            self._promote(SCALAR_RANKS[float]).append(value)
+
+    def close(self):
+        """Close the file in which the values are written.
+
+        """
+        if self.writer is not None:
+            self.writer.close()
+
+    def _create_writer(self, rank):
+        """Create the writer for the given kind of column.
+
+        """
+        self._rank = rank
+        self.writer = NpyArrayWriter(self.path, COLUMN_KINDS[rank][0],
+                                     self._shape, chunk_size=self.chunk_size)
+        return self.writer
+
+    def _promote(self, rank):
+        """Rewrite the values recorded so far in a column of a wider kind.
+
+        """
+        self.writer.close()
+        values = np.load(self.path)
+        writer = self._create_writer(rank)
+        writer.write_block(values.astype(writer.dtype))
+        return writer
+
+    def _fail(self, value):
+        """Stop recording the entry.
+
+        """
+        self.failed = True
+        count = self.writer.count if self.writer is not None else 0
+        self.issue = ('Recording stopped after {} values as the value {!r} '
+                      'cannot be stored in the column.'.format(count, value))
+        logger = logging.getLogger(__name__)
+        logger.warning('Stopped recording %s as the value %r cannot be '
+                       'stored in the column.', self.entry, value)
+
+
+class MeasureRecorder(Atom):
+    """Recorder saving all the values written in some database entries.
+
+    The values are appended to columns, accumulated by chunks and streamed to
+    temporary .npy files, without going through notifications. Once the
+    measure is over, finalize should be called to gather the columns in a
+    single .npz file in which the arrays are named after the entries.
+
+    """
+    #: Path of the .npz file in which to save the recorded values.
+    path = Unicode()
+
+    #: Full paths of the entries to record.
+    recorded_entries = List()
+
+    #: Reference to the database whose entries are recorded.
+    observed_database = Typed(TaskDatabase)
+
+    #: Number of values of an entry accumulated before being written.
+    chunk_size = Int(1000)
+
+    def __init__(self, path, recorded_entries, observed_database, **kwargs):
+        super(MeasureRecorder, self).__init__(
+            path=path, recorded_entries=recorded_entries,
+            observed_database=observed_database, **kwargs)
+        folder = mkdtemp(prefix='.record-', dir=os.path.dirname(path) or None)
+        self._folder = folder
+        for i, entry in enumerate(self.recorded_entries):
+            column = RecordColumn(entry, os.path.join(folder, '%d.npy' % i),
+                                  self.chunk_size)
+            self._columns.append(column)
+            self.observed_database.attach_recorder(entry, column)
+
+    def finalize(self):
+        """Stop recording and write the .npz file.
+
+        Entries for which no value was recorded are not saved, and the file
+        is not created if no value was recorded at all.
+
+        Returns
+        -------
+        issues : dict
+            Reason for which the recording of some entries stopped before
+            the end of the measure, by entry.
+
+        """
+        if not self._folder:
+            return {}
+
+        for column in self._columns:
+            self.observed_database.detach_recorder(column.entry)
+            column.close()
+
+        try:
+            columns = [c for c in self._columns if c.writer is not None]
+            if columns:
+                with ZipFile(self.path, 'w', ZIP_STORED,
+                             allowZip64=True) as f:
+                    for column in columns:
+                        f.write(column.path, column.entry + '.npy')
+        finally:
+            rmtree(self._folder, ignore_errors=True)
+            self._folder = ''
+
+        return {c.entry: c.issue for c in self._columns if c.issue}
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Columns in which the values are recorded.
+    _columns = List()
+
+    #: Temporary folder in which the columns are written.
+    _folder = Unicode()
 
 
 class MeasureSpy(Atom):
     """Spy observing a task database and sending values update into a queue.
 
-    All updates are sent immediatly as no issues have been detected so far.
-    Using a timer based implementation would complicate things.
+    The spy subscribes to the observed entries so that the updates of other
+    entries are not notified. Updates are sent as soon as the database
+    notifies them. When the database coalesces its notifications, the batch
+    of updates is sent as a single list of (entry, value) tuples.
+
+    If a shared memory mirror is provided, the numeric values of the entries
+    which were allocated a slot in it are written into the mirror instead of
+    being sent through the queue. Each entry uses a single channel at a
+    time: once a value of an entry cannot be written in the mirror, all the
+    following updates of the entry are sent through the queue.
 
     """
     #: Set of entries for which to send notifications.
@@ -38,39 +366,82 @@ class MeasureSpy(Atom):
     #: Queue in which to send the updates.
     queue = Typed(Queue)
 
-    def __init__(self, queue, observed_entries, observed_database):
+    #: Shared memory mirror in which to write the numeric values.
+    mirror = Typed(SharedDatabaseMirror)
+
+    #: Slots of the mirror allocated to the entries.
+    mirror_slots = Dict()
+
+    def __init__(self, queue, observed_entries, observed_database,
+                 mirror=None, mirror_slots=None):
         super(MeasureSpy, self).__init__(queue=queue,
                                          observed_database=observed_database,
-                                         observed_entries=observed_entries)
-        self.observed_database.observe('notifier', self.enqueue_update)
+                                         observed_entries=observed_entries,
+                                         mirror=mirror,
+                                         mirror_slots=mirror_slots or {})
+        self.observed_database.subscribe(self.observed_entries,
+                                         self.enqueue_update)
 
-    def enqueue_update(self, change):
+    def enqueue_update(self, news):
         """Put an update in the queue.
 
         Notes
         -----
-        Change is a tuple as this is connected to a Signal.
+        News is a tuple (path, value) or a list of such tuples as this is
+        called by the database on update of the subscribed entries.
 
         """
-        if change[0] in self.observed_entries:
-            self.queue.put_nowait(change)
+        if self.mirror_slots:
+            news = self._publish(news)
+            if not news:
+                return
+        self.queue.put_nowait(news)
 
     def close(self):
         """Put a dummy object signaling that no more updates will be sent.
 
         """
+        self.observed_database.unsubscribe(self.enqueue_update)
         self.queue.put(('', ''))
 
+    def _publish(self, news):
+        """Write the news in the mirror and return the ones which could not.
+
+        """
+        if isinstance(news, list):
+            return [n for n in news if not self._publish_one(*n)]
+
+        return None if self._publish_one(*news) else news
+
+    def _publish_one(self, entry, value):
+        """Write a value in the mirror, if it fails use the queue from now.
+
+        """
+        slots = self.mirror_slots
+        if entry not in slots:
+            return False
+        if self.mirror.publish(slots[entry], value):
+            return True
+        del slots[entry]
+        return False
+
 
 class ThreadMeasureMonitor(Thread):
     """Thread sending a queue content to the news signal of an engine.
 
+    News are either (entry, value) tuples or lists of such tuples.
+
+    If a ThreadMirrorMonitor is sampling a mirror, it should be referenced by
+    mirror_monitor, so that the entries whose values are sent through the
+    queue are no longer sampled in the mirror.
+
     """
 
     def __init__(self, engine, queue):
         super(ThreadMeasureMonitor, self).__init__()
         self.queue = queue
         self.engine = engine
+        self.mirror_monitor = None
 
     def run(self):
         """Send the news received from the queue to the engine news signal.
@@ -80,6 +451,11 @@ class ThreadMeasureMonitor(Thread):
             try:
                 news = self.queue.get()
                 if news not in [(None, None), ('', '')]:
+                    mirror_monitor = self.mirror_monitor
+                    if mirror_monitor is not None:
+                        mirror_monitor.retire([n[0] for n in news]
+                                              if isinstance(news, list)
+                                              else [news[0]])
                     # Here news is a Signal not Event hence the syntax.
                     self.engine.progress(news)
                 elif news == ('', ''):
@@ -90,3 +466,76 @@ class ThreadMeasureMonitor(Thread):
 
             except Empty:  # pragma: no cover
                 continue
+
+
+class ThreadMirrorMonitor(Thread):
+    """Thread periodically sampling a shared memory mirror and sending the
+    updated values to the news signal of an engine.
+
+    News are lists of (entry, value) tuples.
+
+    Parameters
+    ----------
+    engine : BaseEngine
+        Engine whose progress signal should be used.
+
+    mirror : SharedDatabaseMirror
+        Mirror to sample.
+
+    entries : dict
+        Mapping between the slots of the mirror and the entries.
+
+    period : float
+        Time (in s) between two samplings.
+
+    """
+
+    def __init__(self, engine, mirror, entries, period):
+        super(ThreadMirrorMonitor, self).__init__()
+        self.engine = engine
+        self.mirror = mirror
+        self.entries = entries
+        self.period = period
+        self._stop_event = Event()
+        self._retired = set()
+        self._lock = Lock()
+
+    def run(self):
+        """Sample the mirror till asked to stop.
+
+        """
+        mirror = self.mirror
+        slots = np.array(sorted(self.entries), dtype=int)
+        seen = np.zeros(len(slots), dtype=np.int64)
+        stopping = False
+        while not stopping:
+            stopping = self._stop_event.wait(self.period)
+            # Hold the lock while emitting so that a value read in the mirror
+            # cannot be emitted after a later value sent through the queue.
+            with self._lock:
+                current = mirror.versions()[slots]
+                news = []
+                for i in np.nonzero(current != seen)[0]:
+                    slot = int(slots[i])
+                    entry = self.entries[slot]
+                    if entry in self._retired:
+                        continue
+                    state = mirror.read(slot)
+                    if state is not None:
+                        seen[i] = state[0]
+                        news.append((entry, state[1]))
+                if news:
+                    self.engine.progress(news)
+
+    def retire(self, entries):
+        """Stop sampling entries whose values are sent through the queue.
+
+        """
+        with self._lock:
+            self._retired.update(entries)
+
+    def stop(self):
+        """Ask the thread to perform a last sampling and exit.
+
+        """
+        self._stop_event.set()
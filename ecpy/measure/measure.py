@@ -21,7 +21,7 @@ from datetime import date
 
 from future.builtins import str as text
 from atom.api import (Atom, Dict, Unicode, Typed, ForwardTyped, Bool, Enum,
-                      Value)
+                      Value, List, Int, Float)
 from configobj import ConfigObj
 
 from ..tasks.api import RootTask
@@ -292,6 +292,19 @@ class Measure(HasPrefAtom):
     #: Dict of post-measure execution routines.
     post_hooks = Typed(OrderedDict, ())
 
+    #: Full paths of the database entries whose values should all be saved
+    #: during the execution of the main task (if supported by the engine).
+    recorded_entries = List().tag(pref=True)
+
+    #: Priority of the measure in the queue. Measures with a higher priority
+    #: are run first.
+    priority = Int().tag(pref=True)
+
+    #: Estimated duration of the measure in seconds used to run short
+    #: measures first among those of same priority. Updated each time the
+    #: measure completes.
+    estimated_duration = Float().tag(pref=True)
+
     #: Reference to the measure plugin managing this measure.
     plugin = ForwardTyped(measure_plugin)
 
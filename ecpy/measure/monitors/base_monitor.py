@@ -75,7 +75,8 @@ class BaseMonitor(BaseMeasureTool):
 
         This method will be connected to the news signal of the engine when
         the measure is started. The value received will be a tuple containing
-        the name of the updated database entry and its new value.
+        the name of the updated database entry and its new value, or a list
+        of such tuples when the updates are batched.
 
         This method is susceptible to be called in a thread that is not the GUI
         thread. Any update of members that are connected to the view should be
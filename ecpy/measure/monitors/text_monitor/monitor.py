@@ -67,11 +67,23 @@ class TextMonitor(BaseMonitor):
     def process_news(self, news):
         """Handle a news by calling every related entrt updater.
 
+        Batched news are processed at once and each updater is called a single
+        time.
+
         """
-        key, value = news
         values = self._database_values
-        values[key] = value
-        for updater in self.updaters[key]:
+        if isinstance(news, list):
+            updaters = []
+            for key, value in news:
+                values[key] = value
+                updaters.extend(u for u in self.updaters[key]
+                                if u not in updaters)
+        else:
+            key, value = news
+            values[key] = value
+            updaters = self.updaters[key]
+
+        for updater in updaters:
             updater(values)
 
     def refresh_monitored_entries(self, entries=None):
@@ -16,16 +16,20 @@ import logging
 import os
 from functools import partial
 
-from atom.api import Typed, Unicode, List, ForwardTyped, Enum, Bool
+from atom.api import (Typed, Unicode, List, ForwardTyped, Enum, Bool, Int,
+                      Dict)
 
 from ..utils.plugin_tools import (HasPrefPlugin, ExtensionsCollector,
                                   make_extension_validator)
+from ..utils.atom_util import (preferences_from_members,
+                               update_members_from_preferences)
 from .engines.api import Engine
 from .monitors.api import Monitor
 from .hooks.api import PreExecutionHook, PostExecutionHook
 from .editors.api import Editor
 from .processor import MeasureProcessor
 from .container import MeasureContainer
+from .scheduler import MeasureScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +69,9 @@ class MeasurePlugin(HasPrefPlugin):
     #: Measure processor responsible for measure execution.
     processor = Typed(MeasureProcessor)
 
+    #: Scheduler selecting the next measure to run among the enqueued ones.
+    scheduler = Typed(MeasureScheduler)
+
     #: List of currently available engines.
     engines = List()
 
@@ -74,6 +81,15 @@ class MeasurePlugin(HasPrefPlugin):
     #: What to do of the engine when there is no more measure to perform.
     engine_policy = Enum('stop', 'sleep').tag(pref=True)
 
+    #: Maximal number of enqueued measures run simultaneously, each using its
+    #: own engine, when processing continuously. Measures whose runtime
+    #: dependencies are unavailable wait for the running ones to complete.
+    max_concurrent_measures = Int(1).tag(pref=True)
+
+    #: Preferences of the engines by engine id, applied when creating an
+    #: engine without default parameters.
+    engines_preferences = Dict().tag(pref=True)
+
     #: List of currently available pre-execution hooks.
     pre_hooks = List()
 
@@ -150,6 +166,10 @@ class MeasurePlugin(HasPrefPlugin):
         # before discovering the contributions (would be an issue for engine).
         super(MeasurePlugin, self).start()
 
+        self.scheduler = MeasureScheduler(container=self.enqueued_measures,
+                                          workbench=self.workbench)
+        self.scheduler.start()
+
         if not os.path.isdir(self.path):
             core = self.workbench.get_plugin('enaml.workbench.core')
             state = core.invoke_command('ecpy.app.states.get',
@@ -181,11 +201,10 @@ class MeasurePlugin(HasPrefPlugin):
         """Stop the plugin and remove all observers.
 
         """
-        # Close the monitors window.
-        if self.processor.monitors_window:
-            self.processor.monitors_window.hide()
-            self.processor.monitors_window.close()
-            self.processor.monitors_window = None
+        # Close the monitors windows.
+        self.processor.close_monitors_windows()
+
+        self.scheduler.stop()
 
         for contrib in ('engines', 'editors', 'pre_hooks', 'monitors',
                         'post_hooks'):
@@ -255,32 +274,43 @@ class MeasurePlugin(HasPrefPlugin):
         if id not in decls:
             raise ValueError('Unknown {} : {}'.format(kind, id))
 
-        return decls[id].new(self.workbench, default)
+        obj = decls[id].new(self.workbench, default)
+        if kind == 'engine' and not default and id in self.engines_preferences:
+            update_members_from_preferences(obj, self.engines_preferences[id])
+        return obj
+
+    def save_engine_preferences(self, engine):
+        """Save the preferences of an engine.
+
+        Those are applied to the engines of the same kind created without
+        default parameters.
+
+        Parameters
+        ----------
+        engine : BaseEngine
+            Engine whose members tagged with pref should be saved.
+
+        """
+        prefs = dict(self.engines_preferences)
+        prefs[engine.declaration.id] = dict(preferences_from_members(engine))
+        self.engines_preferences = prefs
 
     def find_next_measure(self):
         """Find the next runnable measure in the queue.
 
+        Measures are ordered by the scheduler according to their priority,
+        estimated duration and position in the queue. Measures waiting for
+        their runtime dependencies are only considered if no other measure
+        can run.
+
         Returns
         -------
         measure : Measure|None
-            First valid measurement in the queue or None if there is no
+            Best valid measurement in the queue or None if there is no
             available measure.
 
         """
-        enqueued_measures = self.enqueued_measures.measures
-        i = 0
-        measure = None
-        # Look for a measure not being currently edited. (Can happen if the
-        # user is editing the second measure when the first measure ends).
-        while i < len(enqueued_measures):
-            measure = enqueued_measures[i]
-            if measure.status != 'READY':
-                i += 1
-                measure = None
-            else:
-                break
-
-        return measure
+        return self.scheduler.next_measure()
 
     # =========================================================================
     # --- Private API ---------------------------------------------------------
@@ -308,8 +338,9 @@ class MeasurePlugin(HasPrefPlugin):
         This is always called before notifying the workspace of the change.
 
         """
-        # Destroy old instance if any.
+        # Destroy old instances if any.
         self.processor.engine = None
+        self.processor.discard_workers_engines()
 
         if old in self.engines:
             engine = self._engines.contributions[old]
@@ -18,12 +18,12 @@ from __future__ import (division, unicode_literals, print_function,
 
 import os
 import logging
-from time import sleep
+from time import sleep, time
 from traceback import format_exc
-from threading import Thread, RLock
+from threading import Thread, RLock, Event
 
 import enaml
-from atom.api import Atom, Typed, ForwardTyped, Value, Bool
+from atom.api import Atom, Typed, ForwardTyped, Value, Bool, List
 from enaml.widgets.api import Window
 from enaml.layout.api import InsertTab, FloatItem
 from enaml.application import deferred_call, schedule
@@ -31,6 +31,7 @@ from enaml.application import deferred_call, schedule
 from .engines.api import BaseEngine, ExecutionInfos
 from .measure import Measure
 from ..utils.flags import BitFlag
+from ..tasks.tasks.profiler import write_profile
 
 
 logger = logging.getLogger(__name__)
@@ -97,6 +98,9 @@ class MeasureProcessor(Atom):
         """Pause the currently active measure.
 
         """
+        if self._delegate_to_workers('pause_measure'):
+            return
+
         logger.info('Pausing measure {}.'.format(self.running_measure.name))
         self.running_measure.status = 'PAUSING'
         self._state.set('pause_attempt')
@@ -112,6 +116,9 @@ class MeasureProcessor(Atom):
         """Resume the currently paused measure.
 
         """
+        if self._delegate_to_workers('resume_measure'):
+            return
+
         logger.info('Resuming measure {}.'.format(self.running_measure.name))
         self.running_measure.status = 'RESUMING'
         self._state.clear('paused')
@@ -129,6 +136,9 @@ class MeasureProcessor(Atom):
         """Stop the currently active measure.
 
         """
+        if self._delegate_to_workers('stop_measure', no_post_exec, force):
+            return
+
         if no_post_exec or force:
             self._state.set('no_post_exec')
 
@@ -153,12 +163,37 @@ class MeasureProcessor(Atom):
             self._state.set('no_post_exec')
         self._state.set('stop_attempt', 'stop_processing')
         self._state.clear('processing')
+        if self._delegate_to_workers('stop_measure', no_post_exec, force):
+            return
         if self._state.test('running_main'):
             self.engine.stop(force)
         else:
             if self._active_hook:
                 self._active_hook.stop(force)
 
+    def close_monitors_windows(self):
+        """Close the monitors windows of the processor and of its workers.
+
+        """
+        with self._lock:
+            workers = self._idle_workers + list(self._running_workers.values())
+        for processor in [self] + workers:
+            if processor.monitors_window:
+                processor.monitors_window.hide()
+                processor.monitors_window.close()
+                processor.monitors_window = None
+
+    def discard_workers_engines(self):
+        """Discard the engines of the idle workers.
+
+        New engines are created from the selected engine the next time the
+        workers are used.
+
+        """
+        with self._lock:
+            for worker in self._idle_workers:
+                worker.engine = None
+
     # =========================================================================
     # --- Private API ---------------------------------------------------------
     # =========================================================================
@@ -181,6 +216,22 @@ class MeasureProcessor(Atom):
     #: Lock to avoid race condition when pausing.
     _lock = Value(factory=RLock)
 
+    #: Lock used to serialize the collection and release of the runtime
+    #: dependencies. Shared with the workers.
+    _runtimes_lock = Value(factory=RLock)
+
+    #: Workers (processors) running a measure in concurrent mode by measure.
+    _running_workers = Typed(dict, ())
+
+    #: Idle workers kept to reuse their engine and monitors window.
+    _idle_workers = List()
+
+    #: Measures dispatched to a worker since the processing started.
+    _dispatched = Typed(set, ())
+
+    #: Event set each time a worker is done processing a measure.
+    _worker_done = Value(factory=Event)
+
     def _run_measures(self, measure):
         """Run measures (either all enqueued or only one)
 
@@ -193,10 +244,17 @@ class MeasureProcessor(Atom):
             appearance in the queue if the user enable continuous processing.
 
         """
-        # If the engine does not exist, create one.
         plugin = self.plugin
+        self._dispatched = set()
+        if (self._state.test('continuous_processing') and
+                plugin.max_concurrent_measures > 1):
+            self._run_measures_concurrently(measure)
+            return
+
+        # If the engine does not exist, create one.
         if not self.engine:
-            self.engine = plugin.create('engine', plugin.selected_engine)
+            self.engine = plugin.create('engine', plugin.selected_engine,
+                                        default=False)
 
         # Mark that we started processing measures.
         self._state.set('processing')
@@ -215,34 +273,18 @@ class MeasureProcessor(Atom):
             else:
                 meas = self.plugin.find_next_measure()
 
-            # If there is a measure register it as the running one, update its
-            # status and log its execution.
+            # If there is a measure run it, unless it has to wait for its
+            # runtime dependencies.
             if meas is not None:
-
-                meas_id = meas.name + '_' + meas.id
-                self._set_measure_state('RUNNING', 'The measure is being run.',
-                                        meas)
-
-                msg = 'Starting execution of measure %s'
-                logger.info(msg % meas.name + meas.id)
-
-                status, infos = self._run_measure(meas)
-                # Release runtime dependencies.
-                meas.dependencies.release_runtimes()
+                if (self._state.test('continuous_processing') and
+                        self._should_wait_for_runtimes(meas)):
+                    continue
+                self._process_measure(meas)
 
             # If no measure remains stop.
             else:
                 break
 
-            # Log the result.
-            mess = 'Measure %s processed, status : %s' % (meas_id, status)
-            if infos:
-                mess += '\n' + infos
-            logger.info(mess)
-
-            # Update the status and infos.
-            self._set_measure_state(status, infos, clear=True)
-
             # If we are supposed to stop, stop.
             if (not self._state.test('continuous_processing') or
                     self._state.test('stop_processing')):
@@ -254,6 +296,210 @@ class MeasureProcessor(Atom):
         self._state.clear('processing')
         deferred_call(setattr, self, 'active', False)
 
+    def _run_measures_concurrently(self, measure):
+        """Run the enqueued measures using several workers simultaneously.
+
+        Each worker is a processor with its own engine and monitors window.
+        Measures are dispatched in their order in the queue (the first measure
+        being dispatched first) as long as the maximal number of concurrent
+        measures is not reached. A measure whose runtime dependencies are
+        unavailable while other measures are running is left in the queue and
+        dispatched once a worker is done.
+
+        This code is executed by a thread (stored in _thread)
+
+        """
+        plugin = self.plugin
+        self._state.set('processing')
+
+        while not self._state.test('stop_processing'):
+            self._worker_done.clear()
+
+            for meas in self._list_dispatchable_measures(measure):
+                if (len(self._running_workers) >=
+                        plugin.max_concurrent_measures or
+                        self._state.test('stop_processing')):
+                    break
+                self._dispatch_measure(meas)
+            measure = None
+
+            # If nothing could be dispatched and nothing is running, no
+            # measure remains.
+            if not self._running_workers:
+                break
+
+            self._worker_done.wait(0.5)
+
+        # Wait for the running measures to complete.
+        while self._running_workers:
+            self._worker_done.wait(0.1)
+            self._worker_done.clear()
+
+        if plugin.engine_policy == 'stop':
+            for worker in self._idle_workers:
+                if worker.engine:
+                    worker._stop_engine()
+
+        self._state.clear('processing')
+        deferred_call(setattr, self, 'running_measure', None)
+        deferred_call(setattr, self, 'active', False)
+
+    def _list_dispatchable_measures(self, first=None):
+        """List the enqueued measures which have not yet been dispatched.
+
+        """
+        measures = [m for m in self.plugin.scheduler.list_measures()
+                    if m not in self._dispatched]
+        if first is not None and first not in self._dispatched:
+            if first in measures:
+                measures.remove(first)
+            measures.insert(0, first)
+        return measures
+
+    def _dispatch_measure(self, measure):
+        """Start running a measure using an idle or a new worker.
+
+        Returns
+        -------
+        dispatched : bool
+            False if the measure conflicts with the running measures and
+            should be dispatched later.
+
+        """
+        if self._should_wait_for_runtimes(measure):
+            return False
+
+        plugin = self.plugin
+        with self._lock:
+            if self._idle_workers:
+                worker = self._idle_workers.pop()
+            else:
+                worker = type(self)(plugin=plugin,
+                                    continuous_processing=False,
+                                    _runtimes_lock=self._runtimes_lock)
+            self._running_workers[measure] = worker
+        self._dispatched.add(measure)
+
+        if not worker.engine:
+            worker.engine = plugin.create('engine', plugin.selected_engine,
+                                          default=False)
+
+        worker._thread = Thread(target=self._run_worker,
+                                args=(worker, measure))
+        worker._thread.daemon = True
+        worker._thread.start()
+        deferred_call(setattr, self, 'running_measure', measure)
+        return True
+
+    def _should_wait_for_runtimes(self, measure):
+        """Collect the runtimes of a measure and check if it should wait.
+
+        A measure whose runtimes are unavailable waits, if another measure is
+        running or can run in the meantime. It is then set aside by the
+        scheduler till some runtimes are released. Otherwise it is run (and
+        will be skipped if its runtimes are still unavailable).
+
+        """
+        with self._runtimes_lock:
+            deps = measure.dependencies
+            res, msg, _ = deps.collect_runtimes()
+            if res:
+                return False
+            deps.release_runtimes()
+
+        scheduler = self.plugin.scheduler
+        excluded = set(self._dispatched)
+        excluded.add(measure)
+        if 'unavailable' not in msg or not (
+                self._running_workers or
+                scheduler.has_runnable_measure(excluded)):
+            return False
+
+        logger.debug('Delaying measure %s, some of its runtime dependencies '
+                     'are used.', measure.name + '_' + measure.id)
+        scheduler.block(measure)
+        return True
+
+    def _run_worker(self, worker, measure):
+        """Process a measure using a worker and make the worker idle again.
+
+        This code is executed by the thread of the worker.
+
+        """
+        worker._clear_state()
+        worker._state.set('processing')
+        try:
+            worker._process_measure(measure)
+        except Exception:
+            logger.exception('Failed to process measure %s',
+                             measure.name + '_' + measure.id)
+        finally:
+            worker._state.clear('processing')
+            with self._lock:
+                del self._running_workers[measure]
+                self._idle_workers.append(worker)
+            self._worker_done.set()
+
+    def _delegate_to_workers(self, method, *args):
+        """Call a method of all the workers running a measure.
+
+        Returns
+        -------
+        delegated : bool
+            Whether some workers are running measures.
+
+        """
+        with self._lock:
+            workers = list(self._running_workers.values())
+        for worker in workers:
+            getattr(worker, method)(*args)
+        return bool(workers)
+
+    def _process_measure(self, measure):
+        """Run a single measure and update its status.
+
+        Returns
+        -------
+        status : {'COMPLETED', 'FAILED', 'SKIPPED', 'INTERRUPTED'}
+            Final status of the measure.
+
+        infos : unicode
+            Message describing the outcome of the measure.
+
+        """
+        # Register the measure as the running one, update its status and log
+        # its execution.
+        meas_id = measure.name + '_' + measure.id
+        self._set_measure_state('RUNNING', 'The measure is being run.',
+                                measure)
+
+        msg = 'Starting execution of measure %s'
+        logger.info(msg % measure.name + measure.id)
+
+        start = time()
+        try:
+            status, infos = self._run_measure(measure)
+        finally:
+            # Release runtime dependencies and give a chance to the measures
+            # waiting for them.
+            with self._runtimes_lock:
+                measure.dependencies.release_runtimes()
+            self.plugin.scheduler.reevaluate()
+
+        if status == 'COMPLETED':
+            measure.estimated_duration = time() - start
+
+        # Log the result.
+        mess = 'Measure %s processed, status : %s' % (meas_id, status)
+        if infos:
+            mess += '\n' + infos
+        logger.info(mess)
+
+        # Update the status and infos.
+        self._set_measure_state(status, infos, clear=True)
+
+        return status, infos
+
     def _run_measure(self, measure):
         """Run a single measure.
 
@@ -264,7 +510,8 @@ class MeasureProcessor(Atom):
         meas_id = measure.name + '_' + measure.id
 
         # Collect runtime dependencies
-        res, msg, errors = measure.dependencies.collect_runtimes()
+        with self._runtimes_lock:
+            res, msg, errors = measure.dependencies.collect_runtimes()
         if not res:
             status = 'SKIPPED' if 'unavailable' in msg else 'FAILED'
             return status, msg + '\n' + errors_to_msg(errors)
@@ -296,6 +543,7 @@ class MeasureProcessor(Atom):
 
         result = True
         errors = {}
+        execution_result = None
         if self._check_for_pause_or_stop():
 
             # Connect new monitors, and start them.
@@ -310,7 +558,8 @@ class MeasureProcessor(Atom):
                 task=measure.root_task,
                 build_deps=deps.get_build_dependencies().dependencies,
                 runtime_deps=deps.get_runtime_dependencies('main'),
-                observed_entries=measure.collect_monitored_entries(),
+                observed_entries=self._collect_observed_entries(measure),
+                recorded_entries=measure.recorded_entries,
                 checks=not measure.forced_enqueued,
                 )
 
@@ -327,6 +576,16 @@ class MeasureProcessor(Atom):
             errors.update(execution_result.errors)
             measure.task_execution_result = execution_result
 
+            # Save the execution statistics next to the measure.
+            if execution_result.profile:
+                profile_path = os.path.join(measure.root_task.default_path,
+                                            meas_id + '.profile.ini')
+                try:
+                    write_profile(execution_result.profile, profile_path)
+                except Exception:
+                    logger.exception('Failed to save the execution profile '
+                                     'of measure %s', meas_id)
+
             # Disconnect monitors.
             logger.debug('Disonnecting monitors for measure %s',
                          meas_id)
@@ -357,7 +616,12 @@ class MeasureProcessor(Atom):
 
             return 'FAILED', msg + errors_to_msg(errors)
 
-        return 'COMPLETED', 'The measure successfully completed.'
+        msg = 'The measure successfully completed.'
+        issues = execution_result.record_issues if execution_result else {}
+        if issues:
+            msg += ('\nSome entries were only partially recorded :\n' +
+                    '\n'.join('- %s : %s' % i for i in sorted(issues.items())))
+        return 'COMPLETED', msg
 
     def _run_pre_execution(self, measure):
         """Run pre measure execution operations.
@@ -448,6 +712,12 @@ class MeasureProcessor(Atom):
 
         return result, full_report
 
+    def _collect_observed_entries(self, measure):
+        """Collect the entries whose updates the engine should send.
+
+        """
+        return measure.collect_monitored_entries()
+
     def _start_monitors(self, measure):
         """Start the monitors attached to a measure and display them.
 
@@ -642,6 +912,84 @@ class MeasureProcessor(Atom):
             self._state.clear('continuous_processing')
 
 
+class HeadlessMeasureProcessor(MeasureProcessor):
+    """Processor running measures synchronously without any event loop.
+
+    Monitors are never started and the engine is not asked to send the
+    updates of the entries they observe.
+
+    """
+
+    def run_measure(self, measure):
+        """Run a single measure in the calling thread.
+
+        The measure can be paused or stopped from another thread.
+
+        Returns
+        -------
+        status : {'COMPLETED', 'FAILED', 'SKIPPED', 'INTERRUPTED'}
+            Final status of the measure.
+
+        infos : unicode
+            Message describing the outcome of the measure.
+
+        """
+        plugin = self.plugin
+        if not self.engine:
+            self.engine = plugin.create('engine', plugin.selected_engine,
+                                        default=False)
+
+        self._clear_state()
+        self._state.set('processing')
+        self.active = True
+        try:
+            return self._process_measure(measure)
+        finally:
+            self._state.clear('processing')
+            self.active = False
+
+    def stop_engine(self):
+        """Stop the engine if one was created.
+
+        """
+        if self.engine:
+            self._stop_engine()
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    def _collect_observed_entries(self, measure):
+        """No entry is observed as the monitors are not started.
+
+        """
+        return []
+
+    def _start_monitors(self, measure):
+        """Monitors are not started when running headless.
+
+        """
+        pass
+
+    def _stop_monitors(self, measure):
+        """Monitors are not started when running headless.
+
+        """
+        pass
+
+    def _set_measure_state(self, status, infos, measure=None, clear=False):
+        """Set the measure status and infos in the calling thread.
+
+        """
+        if measure:
+            self.running_measure = measure
+        measure = self.running_measure
+        measure.status = status
+        measure.infos = infos
+        if clear:
+            self.running_measure = None
+
+
 def errors_to_msg(errors):
     """Convert a dictionary of errors in a well formatted message.
 
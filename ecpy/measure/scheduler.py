@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Scheduler selecting the next measure to run among the enqueued ones.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import logging
+from threading import RLock
+
+from atom.api import Atom, Typed, Value, Int
+
+from ..utils.priority_heap import PriorityHeap
+from .container import MeasureContainer
+
+logger = logging.getLogger(__name__)
+
+
+#: Members of a measure affecting its position in the schedule.
+OBSERVED_MEMBERS = ('status', 'priority', 'estimated_duration')
+
+
+class MeasureScheduler(Atom):
+    """Order the enqueued measures and select the next one to run.
+
+    Measures which are READY are kept in a priority heap sorted by decreasing
+    priority, increasing estimated duration and position in the queue. The
+    heap is updated when the queue or a measure changes, so that the next
+    measure is found in logarithmic time.
+
+    Measures whose runtime dependencies were found unavailable can be set
+    aside using `block`. They are considered again when some runtimes are
+    released by the processor (see `reevaluate`) or when instrument profiles
+    are released.
+
+    """
+    #: Container holding the measures to schedule.
+    container = Typed(MeasureContainer)
+
+    #: Reference to the workbench used to observe the instruments plugin.
+    workbench = Value()
+
+    def start(self):
+        """Start tracking the measures of the container.
+
+        """
+        self.container.observe('changed', self._update_measures)
+        self._rebuild()
+
+    def stop(self):
+        """Stop tracking the measures and the instrument profiles.
+
+        """
+        self.container.unobserve('changed', self._update_measures)
+        with self._lock:
+            for measure in list(self._keys):
+                self._untrack(measure)
+            self._heap = PriorityHeap()
+            self._blocked.clear()
+        if self._instr_plugin is not None:
+            self._instr_plugin.unobserve('used_profiles',
+                                         self._watch_profiles)
+            self._instr_plugin = None
+
+    def next_measure(self):
+        """Get the best measure to run next without removing it.
+
+        Returns
+        -------
+        measure : Measure | None
+            Best READY measure whose runtimes are not known to be unavailable.
+            If all ready measures are blocked, the best blocked measure is
+            returned so that it is given a chance to run. None if no measure
+            is ready.
+
+        """
+        with self._lock:
+            heap = self._heap
+            while True:
+                try:
+                    measure = heap.peek()
+                except IndexError:
+                    break
+                # Measures are pushed back by the status observer when they
+                # become READY again.
+                if measure.status == 'READY':
+                    return measure
+                heap.pop()
+
+            if self._blocked:
+                return min(self._blocked, key=self._keys.__getitem__)
+
+        return None
+
+    def list_measures(self):
+        """List the READY measures in the order in which they should run.
+
+        Blocked measures come after all the other ones.
+
+        """
+        with self._lock:
+            keys = self._keys
+            ready = sorted((m for m in keys
+                            if m.status == 'READY' and m not in self._blocked),
+                           key=keys.__getitem__)
+            blocked = sorted((m for m in self._blocked
+                              if m.status == 'READY'),
+                             key=keys.__getitem__)
+        return ready + blocked
+
+    def has_runnable_measure(self, excluded=()):
+        """Check whether a measure other than the excluded ones can run.
+
+        """
+        with self._lock:
+            return any(m.status == 'READY' and m not in self._blocked and
+                       m not in excluded for m in self._keys)
+
+    def block(self, measure):
+        """Set aside a measure whose runtimes are currently unavailable.
+
+        """
+        with self._lock:
+            if measure not in self._keys:
+                return
+            self._heap.remove(measure)
+            self._blocked.add(measure)
+        logger.debug('Measure %s is waiting for its runtime dependencies',
+                     measure.name + '_' + measure.id)
+        self._connect_profiles_observer()
+
+    def reevaluate(self):
+        """Consider again the measures waiting for their runtimes.
+
+        """
+        with self._lock:
+            blocked = list(self._blocked)
+            self._blocked.clear()
+            for measure in blocked:
+                self._push(measure)
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Heap of the READY and not blocked measures.
+    _heap = Typed(PriorityHeap, ())
+
+    #: Sorting keys of the tracked measures.
+    _keys = Typed(dict, ())
+
+    #: Measures waiting for their runtime dependencies.
+    _blocked = Typed(set, ())
+
+    #: Position given to the next measure appended to the queue.
+    _position = Int()
+
+    #: Lock protecting the heap which is accessed from the processor thread.
+    _lock = Value(factory=RLock)
+
+    #: Instruments plugin whose profiles are observed.
+    _instr_plugin = Value()
+
+    def _key(self, measure, position):
+        """Compute the sorting key of a measure.
+
+        """
+        return (-measure.priority, measure.estimated_duration, position)
+
+    def _push(self, measure):
+        """Push a measure on the heap if it is READY.
+
+        """
+        self._heap.remove(measure)
+        if measure.status == 'READY' and measure not in self._blocked:
+            self._heap.push(self._keys[measure], measure)
+
+    def _track(self, measure, position):
+        """Start tracking a measure.
+
+        """
+        self._keys[measure] = self._key(measure, position)
+        self._push(measure)
+        measure.observe(OBSERVED_MEMBERS, self._update_measure)
+
+    def _untrack(self, measure):
+        """Stop tracking a measure.
+
+        """
+        measure.unobserve(OBSERVED_MEMBERS, self._update_measure)
+        self._heap.remove(measure)
+        self._blocked.discard(measure)
+        del self._keys[measure]
+
+    def _rebuild(self):
+        """Track the measures of the container, recomputing their position.
+
+        """
+        with self._lock:
+            measures = self.container.measures
+            blocked = self._blocked & set(measures)
+            for measure in list(self._keys):
+                self._untrack(measure)
+            self._heap = PriorityHeap()
+            self._blocked = blocked
+            for i, measure in enumerate(measures):
+                self._track(measure, i)
+            self._position = len(measures)
+
+    def _update_measures(self, change):
+        """Update the tracked measures when the container changes.
+
+        Measures appended to the queue are simply pushed, any other change
+        leads to recomputing the positions of all the measures.
+
+        """
+        if (change.collapsed or change.moved or change.removed or
+                any(i < self._position for i, _ in change.added)):
+            self._rebuild()
+            return
+
+        with self._lock:
+            for _, measure in change.added:
+                self._track(measure, self._position)
+                self._position += 1
+
+    def _update_measure(self, change):
+        """Update the position of a measure in the heap when it changes.
+
+        """
+        measure = change['object']
+        with self._lock:
+            if measure not in self._keys:
+                return
+            if change['name'] != 'status':
+                position = self._keys[measure][-1]
+                self._keys[measure] = self._key(measure, position)
+            elif change['value'] != 'READY':
+                self._blocked.discard(measure)
+            self._push(measure)
+
+    def _connect_profiles_observer(self):
+        """Observe the instrument profiles to re-evaluate blocked measures.
+
+        """
+        if self._instr_plugin is not None or self.workbench is None:
+            return
+        try:
+            plugin = self.workbench.get_plugin('ecpy.instruments',
+                                               force_create=False)
+        except ValueError:
+            plugin = None
+        if plugin is not None:
+            self._instr_plugin = plugin
+            plugin.observe('used_profiles', self._watch_profiles)
+
+    def _watch_profiles(self, change):
+        """Re-evaluate the blocked measures when some profiles are released.
+
+        """
+        old = change.get('oldvalue') or {}
+        if set(old) - set(change['value']):
+            self.reevaluate()
@@ -25,21 +25,28 @@ from textwrap import fill
 from copy import deepcopy
 from traceback import format_exc
 from types import MethodType
+from functools import partial
 
 from atom.api import (Atom, Int, Bool, Value, Unicode, List,
                       ForwardTyped, Typed, Callable, Dict, Signal,
-                      Tuple, Coerced, Constant, set_default)
+                      Tuple, Coerced, Constant, Float, Instance,
+                      set_default)
 from configobj import Section, ConfigObj
 
 from ...utils.atom_util import (tagged_members, member_to_pref,
                                 update_members_from_preferences)
 from ...utils.container_change import ContainerChange
+from ...utils.flags import SharedFlagEvent
 from .database import TaskDatabase
 from .decorators import (make_parallel, make_wait, make_stoppable,
-                         smooth_crash)
-from .string_evaluation import safe_eval
+                         make_preresolved, make_profiled, smooth_crash)
+from .string_evaluation import (safe_eval, compile_expression,
+                                compile_formatter)
+from .profiler import ExecutionProfiler
+from .execution_plan import ExecutionPlan
 from .shared_resources import (SharedCounter, ThreadPoolResource,
-                               InstrsResource, FilesResource)
+                               InstrsResource, FilesResource,
+                               AsyncFilesResource)
 
 
 #: Prefix for placeholders in string formatting and evaluation.
@@ -96,6 +103,11 @@ class BaseTask(Atom):
     #: interruption check or parallel, wait features.
     perform_ = Callable()
 
+    #: Unbound method called when the task is asked to process a block of
+    #: loop points at once. Only built for tasks defining a perform_batch
+    #: method and which are not executed in parallel.
+    perform_batch_ = Callable()
+
     #: Flag indicating if this task can be stopped.
     stoppable = Bool(True).tag(pref=True)
 
@@ -114,6 +126,15 @@ class BaseTask(Atom):
     #: by user code.
     access_exs = Dict().tag(pref=True)
 
+    #: Values of the members tagged with 'fmt' and 'feval' computed right
+    #: before calling perform. Only used if preresolve_members is True.
+    resolved_values = Dict()
+
+    #: Class attribute specifying whether the members tagged with 'fmt' and
+    #: 'feval' should be formatted/evaluated right before calling perform and
+    #: stored in resolved_values.
+    preresolve_members = False
+
     def perform(self):
         """ Main method of the task called when the measurement is performed.
 
@@ -128,7 +149,8 @@ class BaseTask(Atom):
 
         By default tries to format all members tagged with 'fmt' and try to
         eval all members tagged with 'feval'. If the tag value is 'Warn', the
-        test will considered passed but a traceback entry will be filled.
+        test will considered passed but a traceback entry will be filled. If
+        it is 'Skip_empty', empty strings are not evaluated.
         The perform_ member is also computed at this time.
 
         """
@@ -147,8 +169,11 @@ class BaseTask(Atom):
                 traceback[err_path + '-' + n] = msg
 
         for n, m in tagged_members(self, 'feval').items():
+            string = getattr(self, n)
+            if not string and m.metadata['feval'] == 'Skip_empty':
+                continue
             try:
-                val = self.format_and_eval_string(getattr(self, n))
+                val = self.format_and_eval_string(string)
                 if n in self.database_entries:
                     self.write_in_database(n, val)
             except Exception:
@@ -164,27 +189,48 @@ class BaseTask(Atom):
 
         This method is called once by the root task before starting the
         execution of its children tasks. By default it simply build the
-        perform_ method by wrapping perform with the appropriate decorators.
+        perform_ method by wrapping perform with the appropriate decorators
+        and compiles the members tagged with 'fmt' and 'feval'.
         This method can be overridden to execute other task, however keep in
         my mind that those task must not depende on the state of the system
         (no link to database).
 
         """
-        perform_func = self.perform.__func__
-        parallel = self.parallel
-        if parallel.get('activated') and parallel.get('pool'):
-            perform_func = make_parallel(perform_func, parallel['pool'])
-
-        wait = self.wait
-        if wait.get('activated'):
-            perform_func = make_wait(perform_func,
-                                     wait.get('wait'),
-                                     wait.get('no_wait'))
+        # Compile ahead of time the strings which will be formatted or
+        # evaluated, errors are reported when the string is actually used.
+        self._clear_running_state()
+        resolvers = []
+        if self.database and self.database.running:
+            # Resolve once the entries of the task so that reading or writing
+            # them does not require to build and look up paths.
+            entries = {name: self._task_entry(name)
+                       for name in self.database_entries}
+            handle = self.database.create_handle(
+                self.path, {e: e for e in entries.values()})
+            self._database_handle = handle
+            self._entry_slots = {name: handle.slots[entry]
+                                 for name, entry in entries.items()}
+
+            for tag in ('fmt', 'feval'):
+                for name in tagged_members(self, tag):
+                    resolvers.append(
+                        (name, self.compile_string(getattr(self, name), tag)))
+
+        self.perform_ = self._wrap_perform(self.perform.__func__, resolvers)
+
+        # Tasks able to process a block of loop points at once get a wrapped
+        # version of perform_batch, which is never executed in parallel.
+        batch = getattr(type(self), 'perform_batch', None)
+        if batch is not None and not self.is_parallel():
+            batch = getattr(batch, '__func__', batch)  # Python 2 compat
+            self.perform_batch_ = self._wrap_perform(batch, resolvers, False)
+
+    def is_parallel(self):
+        """Check whether the task is executed in parallel.
 
-        if self.stoppable:
-            perform_func = make_stoppable(perform_func)
-
-        self.perform_ = MethodType(perform_func, self)
+        """
+        parallel = self.parallel
+        return bool(parallel.get('activated') and parallel.get('pool'))
 
     def register_preferences(self):
         """Create the task entries in the preferences object.
@@ -341,6 +387,10 @@ class BaseTask(Atom):
             Value to give to the entry.
 
         """
+        slot = self._entry_slots.get(name)
+        if slot is not None:
+            self._database_handle.set(slot, value)
+            return False
         value_name = self._task_entry(name)
         return self.database.set_value(self.path, value_name, value)
 
@@ -355,6 +405,9 @@ class BaseTask(Atom):
             the database.
 
         """
+        handle = self._database_handle
+        if handle is not None:
+            return handle.get(handle.slot(full_name))
         return self.database.get_value(self.path, full_name)
 
     def remove_from_database(self, full_name):
@@ -390,38 +443,13 @@ class BaseTask(Atom):
             Formatted version of the input.
 
         """
-        # If a cache evaluation of the string already exists use it.
+        # If a compiled formatter for the string already exists use it.
         if string in self._format_cache:
-            preformatted, ids = self._format_cache[string]
-            vals = self.database.get_values_by_index(ids, PREFIX)
-            return preformatted.format(**vals)
+            return self._format_cache[string]()
 
-        # Otherwise if we are in running mode build a cache formatting.
+        # Otherwise if we are in running mode build a formatter.
         elif self.database.running:
-            database = self.database
-            aux_strings = string.split('{')
-            if len(aux_strings) > 1:
-                elements = [el
-                            for aux in aux_strings
-                            for el in aux.split('}')]
-                database_indexes = database.get_entries_indexes(self.path,
-                                                                elements[1::2])
-                str_to_format = ''
-                length = len(elements)
-                for i in range(0, length, 2):
-                    if i + 1 < length:
-                        repl = PREFIX + str(database_indexes[elements[i + 1]])
-                        str_to_format += elements[i] + '{' + repl + '}'
-                    else:
-                        str_to_format += elements[i]
-
-                indexes = database_indexes.values()
-                self._format_cache[string] = (str_to_format, indexes)
-                vals = self.database.get_values_by_index(indexes, PREFIX)
-                return str_to_format.format(**vals)
-            else:
-                self._format_cache[string] = (string, [])
-                return string
+            return self.compile_formatting(string)()
 
         # In edition mode simply perfom the formatting as execution time is not
         # critical.
@@ -458,38 +486,13 @@ class BaseTask(Atom):
             Formatted version of the input.
 
         """
-        # If a cache evaluation of the string already exists use it.
+        # If a compiled version of the string already exists use it.
         if string in self._eval_cache:
-            preformatted, ids = self._eval_cache[string]
-            vals = self.database.get_values_by_index(ids, PREFIX)
-            return safe_eval(preformatted, vals)
+            return self._eval_cache[string]()
 
-        # Otherwise if we are in running mode build a cache evaluation.
+        # Otherwise if we are in running mode compile the string.
         elif self.database.running:
-            database = self.database
-            aux_strings = string.split('{')
-            if len(aux_strings) > 1:
-                elements = [el
-                            for aux in aux_strings
-                            for el in aux.split('}')]
-                database_indexes = database.get_entries_indexes(self.path,
-                                                                elements[1::2])
-                str_to_eval = ''
-                length = len(elements)
-                for i in range(0, length, 2):
-                    if i + 1 < length:
-                        repl = PREFIX + str(database_indexes[elements[i + 1]])
-                        str_to_eval += elements[i] + repl
-                    else:
-                        str_to_eval += elements[i]
-
-                indexes = database_indexes.values()
-                self._eval_cache[string] = (str_to_eval, indexes)
-                vals = self.database.get_values_by_index(indexes, PREFIX)
-                return safe_eval(str_to_eval, vals)
-            else:
-                self._eval_cache[string] = (string, [])
-                return safe_eval(string, {})
+            return self.compile_evaluation(string)()
 
         # In edition mode simply perfom the evaluation as execution time is not
         # critical and as the database has not been collapsed to an indexed
@@ -517,6 +520,127 @@ class BaseTask(Atom):
             else:
                 return safe_eval(string, {})
 
+    def compile_formatting(self, string):
+        """Build the formatter of a string and cache it.
+
+        Only to be used in running mode. The formatter directly accesses the
+        values in the flat database.
+
+        Parameters
+        ----------
+        string : str
+            The string to format.
+
+        Returns
+        -------
+        formatter : callable
+            Function taking no argument and returning the formatted string.
+
+        """
+        database = self.database
+        aux_strings = string.split('{')
+        indexes = []
+        if len(aux_strings) > 1:
+            elements = [el
+                        for aux in aux_strings
+                        for el in aux.split('}')]
+            database_indexes = database.get_entries_indexes(self.path,
+                                                            elements[1::2])
+            indexes = [database_indexes[e] for e in elements[1::2]]
+            template = ''
+            length = len(elements)
+            for i in range(0, length, 2):
+                if i + 1 < length:
+                    template += elements[i] + '{}'
+                else:
+                    template += elements[i]
+        else:
+            template = string
+
+        formatter = compile_formatter(template, indexes,
+                                      database.get_flat_values())
+        self._format_cache[string] = formatter
+        return formatter
+
+    def compile_evaluation(self, string):
+        """Compile a string to be evaluated and cache the result.
+
+        Only to be used in running mode. Database references are replaced by
+        direct accesses to the flat database so that evaluating the string
+        later on does not require any parsing.
+
+        Parameters
+        ----------
+        string : str
+            The string to compile.
+
+        Returns
+        -------
+        evaluator : callable
+            Function taking no argument and returning the evaluated string.
+
+        """
+        database = self.database
+        aux_strings = string.split('{')
+        if len(aux_strings) > 1:
+            elements = [el
+                        for aux in aux_strings
+                        for el in aux.split('}')]
+            database_indexes = database.get_entries_indexes(self.path,
+                                                            elements[1::2])
+            str_to_eval = ''
+            length = len(elements)
+            for i in range(0, length, 2):
+                if i + 1 < length:
+                    repl = '_db[%d]' % database_indexes[elements[i + 1]]
+                    str_to_eval += elements[i] + repl
+                else:
+                    str_to_eval += elements[i]
+        else:
+            str_to_eval = string
+
+        evaluator = compile_expression(str_to_eval,
+                                       database.get_flat_values())
+        self._eval_cache[string] = evaluator
+        return evaluator
+
+    def compile_string(self, string, tag='feval'):
+        """Compile a string to be formatted or evaluated if possible.
+
+        Only to be used in running mode. Compilation errors are not raised
+        but reported when the string is actually used: if the string cannot
+        be compiled the returned function formats or evaluates it at each
+        call.
+
+        Parameters
+        ----------
+        string : str
+            The string to compile.
+
+        tag : {'fmt', 'feval'}, optional
+            Whether the string should be formatted or evaluated.
+
+        Returns
+        -------
+        resolver : callable
+            Function taking no argument and returning the formatted or
+            evaluated string.
+
+        """
+        if tag == 'fmt':
+            compile_, use = self.compile_formatting, self.format_string
+        else:
+            compile_ = self.compile_evaluation
+            use = self.format_and_eval_string
+        try:
+            return compile_(string)
+        except Exception:
+            logger = logging.getLogger(__name__)
+            logger.debug('Failed to compile %r in %s, it will be resolved at '
+                         'each use', string, self.get_error_path(),
+                         exc_info=True)
+            return partial(use, string)
+
     def get_error_path(self):
         """Build the path to use when reporting errors during checks.
 
@@ -531,10 +655,63 @@ class BaseTask(Atom):
     #: Only used in running mode.
     _format_cache = Dict()
 
-    #: Dictionary storing infos necessary to perform fast evaluation.
+    #: Dictionary storing the compiled version of the evaluated strings.
     #: Only used in running mode.
     _eval_cache = Dict()
 
+    #: Handle giving direct access to the database entries used by the task.
+    #: Only used in running mode.
+    _database_handle = Value()
+
+    #: Slots of the task entries in the database handle by entry name.
+    #: Only used in running mode.
+    _entry_slots = Dict()
+
+    def _wrap_perform(self, perform_func, resolvers, parallel=True):
+        """Wrap a perform function with the appropriate decorators.
+
+        Parameters
+        ----------
+        perform_func : function
+            Unbound function to wrap.
+
+        resolvers : list(tuple)
+            Pairs of member name, function used to pre-resolve members.
+
+        parallel : bool, optional
+            Whether to allow executing the function in parallel.
+
+        Returns
+        -------
+        method : MethodType
+            Wrapped function bound to the task.
+
+        """
+        if self.preresolve_members:
+            perform_func = make_preresolved(perform_func, resolvers)
+
+        # Measure the execution itself, in the thread in which it occurs.
+        profiler = getattr(self.root, 'profiler', None)
+        if profiler is not None:
+            path = self.path + '/' + self.name
+            if perform_func.__name__ != 'perform':
+                path += ':' + perform_func.__name__
+            perform_func = make_profiled(perform_func, profiler, path)
+
+        if parallel and self.is_parallel():
+            perform_func = make_parallel(perform_func, self.parallel['pool'])
+
+        wait = self.wait
+        if wait.get('activated'):
+            perform_func = make_wait(perform_func,
+                                     wait.get('wait'),
+                                     wait.get('no_wait'))
+
+        if self.stoppable:
+            perform_func = make_stoppable(perform_func)
+
+        return MethodType(perform_func, self)
+
     def _default_task_id(self):
         """Default value for the task_id member.
 
@@ -597,6 +774,16 @@ class BaseTask(Atom):
         full_name = self._task_entry(entry)
         self.database.remove_access_exception(parent.path, full_name)
 
+    def _clear_running_state(self):
+        """Discard the objects built by prepare which refer to the running
+        database.
+
+        """
+        self._format_cache = {}
+        self._eval_cache = {}
+        self._database_handle = None
+        self._entry_slots = {}
+
     def _task_entry(self, entry):
         """Build the full name of an entry for a task.
 
@@ -670,6 +857,10 @@ class ComplexTask(BaseTask):
         """Run sequentially all child tasks.
 
         """
+        if self._plan is not None:
+            self._plan.run()
+            return
+
         for child in self.children:
             child.perform_()
 
@@ -698,6 +889,12 @@ class ComplexTask(BaseTask):
         for child in self.gather_children():
             child.prepare()
 
+        root = self.root
+        if root is not None and root.compiled_execution:
+            self._plan = ExecutionPlan(root, self.children)
+        else:
+            self._plan = None
+
     def add_child_task(self, index, child):
         """Add a child task at the given index.
 
@@ -961,6 +1158,9 @@ class ComplexTask(BaseTask):
     # --- Private API ---------------------------------------------------------
     # =========================================================================
 
+    #: Execution plan of the children built in prepare in compiled mode.
+    _plan = Typed(ExecutionPlan)
+
     #: Last removed child and list of database access exceptions attached to
     #: it and necessity to observe its _access_exs.
     _last_removed = Tuple(default=(None, None, False))
@@ -972,6 +1172,23 @@ class ComplexTask(BaseTask):
     #: child disabled some access_exs.
     _disabled_exs = List()
 
+    def _get_children_runner(self):
+        """Get a function executing all the children tasks once.
+
+        Loops should retrieve it before starting to iterate.
+
+        """
+        if self._plan is not None:
+            return self._plan.run
+
+        children = self.children
+
+        def run_children():
+            for child in children:
+                child.perform_()
+
+        return run_children
+
     def _child_path(self):
         """Convenience function returning the path to set for child task.
 
@@ -1033,21 +1250,58 @@ class RootTask(ComplexTask):
     #: Path to which log infos, preferences, etc should be written by default.
     default_path = Unicode('').tag(pref=True)
 
+    #: Maximal number of worker threads used to execute the parallel tasks of
+    #: a pool.
+    threads_per_pool = Int(8).tag(pref=True)
+
+    #: Time window (in s) over which the database notifications are coalesced
+    #: during execution. Zero means that each update is notified immediately.
+    database_notifications_window = Float().tag(pref=True)
+
+    #: Number of values to keep in the history of some database entries
+    #: during execution, by entry full path (see TaskDatabase.history_sizes).
+    history_sizes = Dict().tag(pref=True)
+
+    #: Whether to record the execution time of each task during perform.
+    profile = Bool().tag(pref=True)
+
+    #: Whether to execute the tasks through flat execution plans built in
+    #: prepare (see ExecutionPlan) rather than through nested perform_ calls.
+    compiled_execution = Bool().tag(pref=True)
+
+    #: Profiler collecting the execution times when profile is True. Created
+    #: in prepare.
+    profiler = Typed(ExecutionProfiler)
+
+    #: Execution statistics of the tasks by task path, as dictionaries (see
+    #: TaskStats.to_dict). Filled at the end of perform when profile is True.
+    execution_profile = Dict()
+
+    #: Last values written in the entries listed in history_sizes, by entry
+    #: full path, as tuples of timestamps and values arrays. Filled at the end
+    #: of perform.
+    entries_history = Dict()
+
     #: Dict storing data needed at execution time (ex: drivers classes)
     run_time = Dict()
 
     #: Inter-process event signaling the task it should stop execution.
-    should_stop = Typed(Event)
+    should_stop = Instance((Event, SharedFlagEvent))
 
     #: Inter-process event signaling the task it should pause execution.
-    should_pause = Typed(Event)
+    should_pause = Instance((Event, SharedFlagEvent))
 
     #: Inter-process event signaling the task is paused.
-    paused = Typed(Event)
+    paused = Instance((Event, SharedFlagEvent))
 
     #: Inter-process event signaling the main thread is done, handling the
     #: measure resuming, and hence notifying the task execution has resumed.
-    resumed = Typed(Event)
+    resumed = Instance((Event, SharedFlagEvent))
+
+    #: Function returning a truthy value if should_stop or should_pause is
+    #: set. When both events are views on the same SharedBitFlag, it is built
+    #: in prepare so as to perform a single read of the shared state.
+    interruption_requested = Callable()
 
     #: Dictionary used to store errors occuring during performing.
     errors = Dict()
@@ -1057,11 +1311,13 @@ class RootTask(ComplexTask):
     #: performed.
     #: Each key is associated to a different kind of resource. Resources must
     #: be stored in SharedDict subclass.
-    #: By default three kind of resources exists:
-    #: - threads : currently running threads grouped by pool.
-    #:   ({pool: [threads, releaser]})
+    #: By default four kind of resources exists:
+    #: - threads : futures of the parallel jobs grouped by pool.
+    #:   ({pool: [futures]})
     #: - instrs : used instruments referenced by profiles.
     #: - files : currently opened files by path.
+    #: - async_files : AsyncFileSink by path, whose writes are performed in
+    #:   a background thread.
     resources = Dict()
 
     #: Counter keeping track of the active threads.
@@ -1119,8 +1375,7 @@ class RootTask(ComplexTask):
         self.prepare()
 
         try:
-            for child in self.children:
-                child.perform_()
+            self._get_children_runner()()
         except Exception:
             log = logging.getLogger(__name__)
             msg = 'The following unhandled exception occured :\n'
@@ -1130,6 +1385,14 @@ class RootTask(ComplexTask):
             self.errors['unhandled'] = msg + format_exc()
         finally:
             self.release_resources()
+            self.database.flush_notifications(stop=True)
+            if self.profiler is not None:
+                self.execution_profile = {p: s.to_dict() for p, s
+                                          in self.profiler.merge().items()}
+            database = self.database
+            self.entries_history = {p: database.get_history(p)[:]
+                                    for p in self.history_sizes
+                                    if database.has_history(p)}
 
         if self.should_stop.is_set():
             result = False
@@ -1140,9 +1403,40 @@ class RootTask(ComplexTask):
         """Optimise the database for running state and prepare children.
 
         """
+        if self.database.running:
+            self.leave_running_mode()
+        self.database.notifications_window = self.database_notifications_window
+        self.database.history_sizes = self.history_sizes
         self.database.prepare_to_run()
+        self.resources['threads'].max_workers = self.threads_per_pool
+        self.profiler = ExecutionProfiler() if self.profile else None
+        self.execution_profile = {}
+        self.entries_history = {}
+
+        stop, pause = self.should_stop, self.should_pause
+        if (isinstance(stop, SharedFlagEvent) and
+                isinstance(pause, SharedFlagEvent) and
+                stop.shared_flag is pause.shared_flag):
+            tester = stop.shared_flag.any_tester(stop.flag, pause.flag)
+            self.interruption_requested = tester
+        else:
+            del self.interruption_requested
+
         super(RootTask, self).prepare()
 
+    def leave_running_mode(self):
+        """Bring the database back to edition mode after an execution.
+
+        The tasks discard the database accessors built when preparing so that
+        the hierarchy can be edited, checked and prepared again without being
+        rebuilt.
+
+        """
+        self.database.leave_running_mode()
+        for task in self.traverse():
+            if isinstance(task, BaseTask):
+                task._clear_running_state()
+
     def release_resources(self):
         """Release all the resources used by tasks.
 
@@ -1226,10 +1520,17 @@ class RootTask(ComplexTask):
         if p_count == 0:
             self.paused.clear()
 
+    def _default_interruption_requested(self):
+        """Check the events each time as they can be replaced.
+
+        """
+        return lambda: self.should_stop.is_set() or self.should_pause.is_set()
+
     def _default_resources(self):
         """Default resources.
 
         """
         return {'threads': ThreadPoolResource(),
                 'instrs': InstrsResource(),
-                'files': FilesResource()}
+                'files': FilesResource(),
+                'async_files': AsyncFilesResource()}
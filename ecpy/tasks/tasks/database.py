@@ -15,9 +15,19 @@ ressources can be shared and how preferences are handled.
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
+import logging
+
 from future.builtins import str
-from atom.api import Atom, Dict, Bool, Value, Signal, List, Typed, ForwardTyped
-from threading import Lock
+from past.builtins import long
+from atom.api import (Atom, Dict, Bool, Value, Signal, List, Typed,
+                      ForwardTyped, Float, Int)
+from time import time
+from threading import Lock, Thread, Event
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseNode(Atom):
@@ -34,6 +44,295 @@ class DatabaseNode(Atom):
     meta = Dict()
 
 
+#: Numpy dtype used to store the history of numeric entries, associated with
+#: the exact types of the values which can be stored in such a slot without
+#: loss of information.
+SLOT_TYPES = (('?', (bool, np.bool_)),
+              ('q', (int, long, np.int64, np.int32)),
+              ('d', (float, np.float64, np.float32)),
+              ('D', (complex, np.complex128, np.complex64)))
+
+
+class EntryHistory(object):
+    """Ring buffer keeping the last values of an entry and their timestamps.
+
+    Boolean, integer, float and complex values are stored in a preallocated
+    array of the matching dtype (see SLOT_TYPES), other values in an object
+    array. A numeric value of a wider kind than the array
+    (e.g. a float in an integer history) converts the array to that kind, any
+    other value which cannot be stored converts it to an object array.
+    Samples are accessed by position, the oldest sample being at position 0,
+    and indexing returns a tuple of timestamps and values.
+
+    Each history must be written by a single thread.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximal number of samples kept.
+
+    value : any, optional
+        Value used to determine the kind of array to use.
+
+    """
+
+    __slots__ = ('capacity', 'count', 'times', 'values', '_rank')
+
+    def __init__(self, capacity, value=None):
+        self.capacity = capacity
+        self.count = 0
+        self.times = np.empty(capacity)
+        self._rank = _slot_rank(value)
+        dtype = object if self._rank is None else SLOT_TYPES[self._rank][0]
+        self.values = np.empty(capacity, dtype)
+
+    def append(self, value, timestamp=None):
+        """Add a new sample, overwriting the oldest one if the buffer is full.
+
+        Parameters
+        ----------
+        value : any
+            Value to store.
+
+        timestamp : float, optional
+            Time associated with the value, the current time by default.
+
+        """
+        pos = self.count % self.capacity
+        rank = self._rank
+        if rank is not None:
+            value_rank = _slot_rank(value)
+            if value_rank is None or value_rank > rank:
+                self._promote(value_rank)
+        try:
+            self.values[pos] = value
+        except OverflowError:
+            self._promote(None)
+            self.values[pos] = value
+        self.times[pos] = time() if timestamp is None else timestamp
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def __getitem__(self, index):
+        count = self.count
+        length = min(count, self.capacity)
+        positions = (np.arange(count - length, count)[index] %
+                     self.capacity)
+        return self.times[positions], self.values[positions]
+
+    def _promote(self, rank):
+        """Convert the values to a wider kind, or to objects if rank is None.
+
+        """
+        dtype = object if rank is None else SLOT_TYPES[rank][0]
+        self.values = self.values.astype(dtype)
+        self._rank = rank
+
+
+def _slot_rank(value):
+    """Get the position in SLOT_TYPES of the kind of slot a value fits in.
+
+    Returns None if the value cannot be stored in a typed slot.
+
+    """
+    vtype = type(value)
+    for rank, (_, types) in enumerate(SLOT_TYPES):
+        if vtype in types:
+            return rank
+    return None
+
+
+#: Maximal number of layouts kept in the layouts cache.
+LAYOUT_CACHE_SIZE = 16
+
+
+class DatabaseLayout(object):
+    """Flattened structure of a database hierarchy.
+
+    The layout describes how the entries are ordered in the flat database used
+    in running mode. It depends only on the structure of the hierarchy (nodes,
+    entries names and access exceptions) and not on the values of the entries
+    so that it can be shared between databases with the same structure.
+
+    Parameters
+    ----------
+    signature : tuple
+        Structure of the hierarchy as returned by
+        DatabaseLayout.compute_signature.
+
+    """
+
+    __slots__ = ('signature', 'paths', 'index_map')
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.paths = []
+        self.index_map = {}
+        for node_path, entries, _ in signature:
+            for entry in entries:
+                path = node_path + '/' + entry
+                self.index_map[path] = len(self.paths)
+                self.paths.append(path)
+
+        # Walking a second time to add the exceptions, in reverse order in
+        # case an entry has multiple exceptions.
+        for node_path, _, access in signature[::-1]:
+            for entry, rel_path in access:
+                full_path = node_path + '/' + rel_path + '/' + entry
+                self.index_map[node_path + '/' + entry] = \
+                    self.index_map[full_path]
+
+    @staticmethod
+    def compute_signature(root):
+        """Compute the structural signature of a hierarchy.
+
+        Parameters
+        ----------
+        root : DatabaseNode
+            Root node of the hierarchy.
+
+        Returns
+        -------
+        signature : tuple
+            Tuple of (node path, entries names, access exceptions) for all
+            nodes in breadth first order. Nodes and entries are sorted by
+            name so that hierarchies built in different orders (for example
+            when rebuilding a measure from its configuration) share the same
+            signature.
+
+        """
+        nodes = [('root', root)]
+        signature = []
+        for node_path, node in nodes:
+            entries = []
+            data = node.data
+            for key in sorted(data):
+                val = data[key]
+                if isinstance(val, DatabaseNode):
+                    nodes.append((node_path + '/' + key, val))
+                else:
+                    entries.append(key)
+            access = tuple(sorted(node.meta.get('access', {}).items()))
+            signature.append((node_path, tuple(entries), access))
+
+        return tuple(signature)
+
+    def gather_values(self, nodes):
+        """Collect the values of the entries in flat order.
+
+        Parameters
+        ----------
+        nodes : dict
+            Nodes of the hierarchy by path.
+
+        """
+        values = []
+        for node_path, entries, _ in self.signature:
+            data = nodes[node_path].data
+            values.extend([data[e] for e in entries])
+        return values
+
+    def store_values(self, nodes, values):
+        """Write back values in flat order into the nodes.
+
+        Parameters
+        ----------
+        nodes : dict
+            Nodes of the hierarchy by path.
+
+        values : list
+            Values of the entries in flat order.
+
+        """
+        index = 0
+        for node_path, entries, _ in self.signature:
+            data = nodes[node_path].data
+            for entry in entries:
+                data[entry] = values[index]
+                index += 1
+
+
+#: Layouts of the databases which entered running mode, by signature. Used to
+#: avoid rebuilding the layout of a measure which is run several times.
+_LAYOUTS = OrderedDict()
+
+#: Lock protecting the layouts cache, databases can enter running mode in
+#: different threads.
+_LAYOUTS_LOCK = Lock()
+
+
+class DatabaseHandle(object):
+    """Access to the entries of a running database resolved ahead of time.
+
+    Each entry the handle was created for is given an integer slot. Reading
+    and writing through a slot is a direct access to the flat database.
+    Entries which are read without having been declared are resolved on first
+    access and then cached.
+
+    Parameters
+    ----------
+    database : TaskDatabase
+        Database in running mode to which the handle gives access.
+
+    node_path : unicode
+        Path of the node from which the entries are accessed.
+
+    entries : dict
+        Mapping between the names under which the entries are accessed through
+        the handle and their names in the database.
+
+    """
+
+    __slots__ = ('database', 'node_path', 'slots', '_indexes', '_paths',
+                 '_values')
+
+    def __init__(self, database, node_path, entries):
+        self.database = database
+        self.node_path = node_path
+        self.slots = {}
+        self._indexes = []
+        self._paths = []
+        self._values = database.get_flat_values()
+        for name, entry in entries.items():
+            self._add_slot(name, entry)
+
+    def slot(self, name):
+        """Get the slot associated with a name, resolving it if necessary.
+
+        """
+        try:
+            return self.slots[name]
+        except KeyError:
+            return self._add_slot(name, name)
+
+    def get(self, slot):
+        """Read the value of the entry associated with a slot.
+
+        """
+        return self._values[self._indexes[slot]]
+
+    def set(self, slot, value):
+        """Set the value of the entry associated with a slot.
+
+        """
+        self.database.set_value_by_index(self._indexes[slot],
+                                         self._paths[slot], value)
+
+    def _add_slot(self, name, entry):
+        """Resolve an entry and allocate a slot for it.
+
+        """
+        index = self.database.get_entries_indexes(self.node_path,
+                                                  (entry,))[entry]
+        slot = len(self._indexes)
+        self._indexes.append(index)
+        self._paths.append(self.database.get_entry_path(index))
+        self.slots[name] = slot
+        return slot
+
+
 class TaskDatabase(Atom):
     """ A database for inter tasks communication.
 
@@ -47,6 +346,25 @@ class TaskDatabase(Atom):
       In running mode the database is thread safe but the object it contains
       may not be so (dict, list, etc)
 
+    The hierarchy is preserved in running mode so that the database can go
+    back to edition mode (see leave_running_mode). The layout of the flat
+    database is cached and reused as long as the structure of the hierarchy
+    does not change.
+
+    In running mode, notifications can be coalesced over a time window by
+    setting notifications_window to a positive value. In this case only the
+    last value of each entry written during the window is notified and all
+    updates are emitted at once as a list.
+
+    Objects interested only in some entries should use subscribe rather than
+    observing the notifier signal, so that updates of the other entries are
+    not notified at all.
+
+    The last values of some entries can be kept in running mode by listing
+    them in history_sizes, they can then be accessed using get_history. To
+    keep all the values written in an entry, a recorder can be attached to it
+    using attach_recorder.
+
     """
     #: Signal used to notify a value changed in the database. The update is
     #: passed as a tuple ('added', path, value) for creation, as
@@ -76,6 +394,15 @@ class TaskDatabase(Atom):
     #: running mode the database is flattened into a list for faster acces.
     running = Bool(False)
 
+    #: Number of values to keep in the history of some entries in running
+    #: mode, by entry full path. Can only be changed in edition mode.
+    history_sizes = Dict()
+
+    #: Time window (in s) over which updates are coalesced in running mode. If
+    #: zero, notifications are emitted as soon as a value is set. Can only be
+    #: changed in edition mode.
+    notifications_window = Float()
+
     def set_value(self, node_path, value_name, value):
         """Method used to set the value of the entry at the specified path
 
@@ -102,21 +429,117 @@ class TaskDatabase(Atom):
         """
         new_val = False
         if self.running:
-            full_path = node_path + '/' + value_name
-            index = self._entry_index_map[full_path]
-            with self._lock:
-                self._flat_database[index] = value
-                self.notifier(('added', node_path + '/' + value_name, value))
+            # Notifications always use the path of the node holding the entry.
+            index = self._entry_index_map[node_path + '/' + value_name]
+            self.set_value_by_index(index, self._entry_paths[index], value)
         else:
             node = self.go_to_path(node_path)
             if value_name not in node.data:
                 new_val = True
             node.data[value_name] = value
             if new_val:
-                self.notifier(('added', node_path + '/' + value_name, value))
+                self._invalidate_listings(node_path)
+                full_path = node_path + '/' + value_name
+                self._notify(full_path, value,
+                             self._path_subscribers.get(full_path))
 
         return new_val
 
+    def set_value_by_index(self, index, full_path, value):
+        """Set the value of an entry using its index in the flat database.
+
+        Only to be used in running mode.
+
+        Parameters
+        ----------
+        index : int
+            Index of the entry in the flat database.
+
+        full_path : unicode
+            Full path of the entry, used for notifications.
+
+        value : any
+            Actual value to be stored
+
+        """
+        history = self._index_histories.get(index)
+        if history is not None:
+            history.append(value)
+        recorder = self._index_recorders.get(index)
+        if recorder is not None:
+            recorder.append(value)
+
+        subscribers = self._index_subscribers.get(index)
+        notify = subscribers or self.has_observers('notifier')
+        pending = self._pending_notifications
+        if not notify:
+            self._flat_database[index] = value
+        elif pending is not None:
+            self._flat_database[index] = value
+            pending[full_path] = value
+        else:
+            with self._lock:
+                self._flat_database[index] = value
+                self._notify(full_path, value, subscribers)
+
+    def get_history(self, path):
+        """Access the history of an entry.
+
+        Histories are created when entering running mode for the entries
+        listed in history_sizes and remain available after leaving it, till
+        the next time the database enters running mode.
+
+        Parameters
+        ----------
+        path : unicode
+            Full path of the entry.
+
+        Returns
+        -------
+        history : EntryHistory
+            Ring buffer storing the last values of the entry. It should not
+            be modified.
+
+        """
+        return self._histories[path]
+
+    def has_history(self, path):
+        """Check whether the history of an entry is available.
+
+        """
+        return path in self._histories
+
+    def attach_recorder(self, path, recorder):
+        """Attach an object recording all the values written in an entry.
+
+        The append method of the recorder is called with each value written
+        in the entry in running mode, from the thread writing the value. Only
+        one recorder can be attached to an entry.
+
+        Parameters
+        ----------
+        path : unicode
+            Full path of the entry.
+
+        recorder : object
+            Object with an append method taking the written value as single
+            argument.
+
+        """
+        self._path_recorders[path] = recorder
+        if self.running and path in self._entry_index_map:
+            self._index_recorders[self._entry_index_map[path]] = recorder
+
+    def detach_recorder(self, path):
+        """Detach the recorder attached to an entry, if any.
+
+        """
+        recorder = self._path_recorders.pop(path, None)
+        if self.running and path in self._entry_index_map:
+            index = self._entry_index_map[path]
+            if self._index_recorders.get(index) is recorder:
+                del self._index_recorders[index]
+
     def get_value(self, assumed_path, value_name):
         """Method to get a value from the database from its name and a path
 
@@ -144,24 +567,23 @@ class TaskDatabase(Atom):
 
         else:
             node = self.go_to_path(assumed_path)
+            while node is not None:
+                # First check if the entry is in the current node.
+                if value_name in node.data:
+                    return node.data[value_name]
 
-            # First check if the entry is in the current node.
-            if value_name in node.data:
-                value = node.data[value_name]
-                return value
+                # Second check if there is a special rule about this entry.
+                access = node.meta.get('access')
+                if access and value_name in access:
+                    path = assumed_path + '/' + access[value_name]
+                    return self.get_value(path, value_name)
 
-            # Second check if there is a special rule about this entry.
-            elif 'access' in node.meta and value_name in node.meta['access']:
-                path = assumed_path + '/' + node.meta['access'][value_name]
-                return self.get_value(path, value_name)
+                # Finally go one step up in the node hierarchy.
+                node = node.parent
+                assumed_path = assumed_path.rpartition('/')[0]
 
-            # Finally go one step up in the node hierarchy.
-            else:
-                new_assumed_path = assumed_path.rpartition('/')[0]
-                if assumed_path == new_assumed_path:
-                    mes = "Can't find database entry : {}".format(value_name)
-                    raise KeyError(mes)
-                return self.get_value(new_assumed_path, value_name)
+            mes = "Can't find database entry : {}".format(value_name)
+            raise KeyError(mes)
 
     def rename_values(self, node_path, old, new, access_exs=None):
         """Rename database entries.
@@ -192,6 +614,7 @@ class TaskDatabase(Atom):
         notif = []
         acc_notif = []
         access_exs = access_exs if access_exs else {}
+        modified_path = node_path
 
         for i, old_name in enumerate(old):
             if old_name in node.data:
@@ -212,11 +635,15 @@ class TaskDatabase(Atom):
                     path = n.meta['access'].pop(old_name)
                     n.meta['access'][new[i]] = path
                     acc_notif.append(('renamed', p, path, old_name, new[i]))
+                    if len(p) < len(modified_path):
+                        modified_path = p
             else:
                 err_str = 'No entry {} in node {}'.format(old_name,
                                                           node_path)
                 raise KeyError(err_str)
 
+        self._invalidate_listings(modified_path)
+
         # Avoid sending spurious notifications
         if notif:
             self.notifier(notif)
@@ -247,6 +674,7 @@ class TaskDatabase(Atom):
 
             if value_name in node.data:
                 del node.data[value_name]
+                self._invalidate_listings(node_path)
                 self.notifier(('removed', node_path + '/' + value_name))
             else:
                 err_str = 'No entry {} in node {}'.format(value_name,
@@ -277,6 +705,16 @@ class TaskDatabase(Atom):
         else:
             return {prefix + str(i): self._flat_database[i] for i in indexes}
 
+    def get_flat_values(self):
+        """Access the flat database values.
+
+        Only to be used in running mode. The returned object supports
+        indexing using the indexes returned by get_entries_indexes and must
+        not be modified directly.
+
+        """
+        return self._flat_database
+
     def get_entries_indexes(self, assumed_path, entries):
         """ Access to the index in the flattened database for some entries.
 
@@ -298,6 +736,36 @@ class TaskDatabase(Atom):
         return {name: self._find_index(assumed_path, name)
                 for name in entries}
 
+    def get_entry_path(self, index):
+        """Get the full path of the entry stored at an index.
+
+        Only to be used in running mode.
+
+        """
+        return self._entry_paths[index]
+
+    def create_handle(self, node_path, entries):
+        """Create a handle giving direct access to some entries.
+
+        Only to be used in running mode.
+
+        Parameters
+        ----------
+        node_path : unicode
+            Path of the node from which the entries are accessed.
+
+        entries : dict
+            Mapping between the names under which the entries are accessed
+            through the handle and their names in the database.
+
+        Returns
+        -------
+        handle : DatabaseHandle
+            Handle whose slots map to the requested entries.
+
+        """
+        return DatabaseHandle(self, node_path, entries)
+
     def list_accessible_entries(self, node_path):
         """Method used to get a list of all entries accessible from a node.
 
@@ -316,31 +784,21 @@ class TaskDatabase(Atom):
             List of entries accessible from the specified node
 
         """
-        entries = []
-        while True:
+        cache = self._accessible_entries
+        if node_path not in cache:
             node = self.go_to_path(node_path)
-            keys = node.data.keys()
-            # Looking for the entries in the node.
-            for key in keys:
-                if not isinstance(node.data[key], DatabaseNode):
-                    entries.append(key)
-
-            # Adding the special access if they are not already in the list.
-            for entry in node.meta.get('access', []):
-                if entry not in entries:
-                    entries.append(entry)
-
-            if node_path != 'root':
-                # Going to the next node.
-                node_path = node_path.rpartition('/')[0]
-            else:
-                break
-
-        for entry in self.excluded:
-            if entry in entries:
-                entries.remove(entry)
-
-        return sorted(entries)
+            entries = set()
+            while node is not None:
+                # Looking for the entries in the node and adding the special
+                # access.
+                entries.update(k for k, v in node.data.items()
+                               if not isinstance(v, DatabaseNode))
+                entries.update(node.meta.get('access', ()))
+                node = node.parent
+            cache[node_path] = sorted(entries)
+
+        excluded = self.excluded
+        return [e for e in cache[node_path] if e not in excluded]
 
     def list_all_entries(self, path='root', values=False):
         """List all entries in the database.
@@ -359,30 +817,18 @@ class TaskDatabase(Atom):
             List of all accessible entries with their full path.
 
         """
-        entries = [] if not values else {}
-        node = self.go_to_path(path)
-        for entry in node.data.keys():
-            if isinstance(node.data[entry], DatabaseNode):
-                aux = self.list_all_entries(path=path + '/' + entry,
-                                            values=values)
-                if not values:
-                    entries.extend(aux)
-                else:
-                    entries.update(aux)
-            else:
-                if not values:
-                    entries.append(path + '/' + entry)
-                else:
-                    entries[path + '/' + entry] = node.data[entry]
+        self.go_to_path(path)
+        prefix = path + '/'
+        entries = {}
+        for node_path, node in self._nodes.items():
+            if node_path == path or node_path.startswith(prefix):
+                entries.update((node_path + '/' + k, v)
+                               for k, v in node.data.items()
+                               if not isinstance(v, DatabaseNode))
 
         if path == 'root':
             for entry in self.excluded:
-                aux = path + '/' + entry
-                if aux in entries:
-                    if not values:
-                        entries.remove(aux)
-                    else:
-                        del entries[aux]
+                entries.pop(path + '/' + entry, None)
 
         return sorted(entries) if not values else entries
 
@@ -409,6 +855,7 @@ class TaskDatabase(Atom):
             access_exceptions[entry] = rel_path
         else:
             node.meta['access'] = {entry: rel_path}
+        self._invalidate_listings(node_path)
         self.access_notifier(('added', node_path, rel_path, entry))
 
     def remove_access_exception(self, node_path, entry=None):
@@ -432,6 +879,7 @@ class TaskDatabase(Atom):
         else:
             relative_path = ''
             del node.meta['access']
+        self._invalidate_listings(node_path)
         self.access_notifier(('removed', node_path, relative_path, entry))
 
     def create_node(self, parent_path, node_name):
@@ -457,6 +905,8 @@ class TaskDatabase(Atom):
         parent_node = self.go_to_path(parent_path)
         node = DatabaseNode(parent=parent_node)
         parent_node.data[node_name] = node
+        self._nodes[parent_path + '/' + node_name] = node
+        self._structure_version += 1
         self.nodes_notifier(('added', parent_path, node_name, node))
 
     def rename_node(self, parent_path, old_name, new_name):
@@ -481,6 +931,13 @@ class TaskDatabase(Atom):
         parent_node.data[new_name] = parent_node.data[old_name]
         del parent_node.data[old_name]
 
+        old_path = parent_path + '/' + old_name
+        new_path = parent_path + '/' + new_name
+        nodes = self._nodes
+        for path in self._subtree_paths(old_path):
+            nodes[new_path + path[len(old_path):]] = nodes.pop(path)
+        self._invalidate_listings(parent_path)
+
         while parent_node:
             if 'access' not in parent_node.meta:
                 parent_node = parent_node.parent
@@ -513,6 +970,10 @@ class TaskDatabase(Atom):
         parent_node = self.go_to_path(parent_path)
         if node_name in parent_node.data:
             del parent_node.data[node_name]
+            path = parent_path + '/' + node_name
+            for node_path in self._subtree_paths(path):
+                del self._nodes[node_path]
+            self._invalidate_listings(path)
         else:
             err_str = 'No node {} at the path {}'.format(node_name,
                                                          parent_path)
@@ -544,37 +1005,169 @@ class TaskDatabase(Atom):
         This is used when tasks are executed.
 
         """
+        if self.running:
+            self.leave_running_mode()
+
         self._lock = Lock()
         self.running = True
 
-        # Flattening the database by walking all the nodes.
-        index = 0
-        nodes = [('root', self._database)]
-        mapping = {}
-        datas = []
-        for (node_path, node) in nodes:
-            for key, val in node.data.items():
-                path = node_path + '/' + key
-                if isinstance(val, DatabaseNode):
-                    nodes.append((path, val))
+        layout = self._get_layout()
+        self._flat_database = layout.gather_values(self._nodes)
+        self._entry_paths = layout.paths
+        self._entry_index_map = layout.index_map
+        self._index_subscribers = {layout.index_map[p]: c
+                                   for p, c in self._path_subscribers.items()
+                                   if p in layout.index_map}
+        self._index_recorders = {layout.index_map[p]: r
+                                 for p, r in self._path_recorders.items()
+                                 if p in layout.index_map}
+        self._histories = {}
+        self._index_histories = {}
+        for path, size in self.history_sizes.items():
+            if path not in layout.index_map:
+                logger.warning('Cannot keep the history of %s which is not '
+                               'an entry of the database.', path)
+                continue
+            index = layout.index_map[path]
+            history = EntryHistory(size, self._flat_database[index])
+            self._histories[path] = history
+            self._index_histories[index] = history
+
+        if self.notifications_window > 0:
+            self._pending_notifications = {}
+            self._flusher_stop = Event()
+            self._flusher = Thread(target=self._flush_periodically,
+                                   args=(self.notifications_window,
+                                         self._flusher_stop))
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def leave_running_mode(self):
+        """Go back to edition mode.
+
+        The values of the entries at the end of the execution are written back
+        into the hierarchy. Pending notifications are emitted. When the
+        database belongs to a task hierarchy, RootTask.leave_running_mode
+        should be used instead so that the tasks discard their accessors.
+
+        """
+        if not self.running:
+            return
+
+        self.flush_notifications(stop=True)
+        self._layout.store_values(self._nodes, self._flat_database)
+        self._flat_database = None
+        self._entry_index_map = {}
+        self._entry_paths = []
+        self._index_subscribers = {}
+        self._index_histories = {}
+        self._index_recorders = {}
+        self._pending_notifications = None
+        self._lock = None
+        self.running = False
+
+    def subscribe(self, entries, callback):
+        """Request to be notified of the updates of some entries.
+
+        Contrary to the notifier signal, which is emitted for all entries,
+        only the updates of the subscribed entries have a cost. In running
+        mode the subscriptions are resolved to flat indexes.
+
+        Parameters
+        ----------
+        entries : iterable(unicode)
+            Full paths of the entries to observe.
+
+        callback : callable
+            Callable called with a (path, value) tuple on each update or with
+            a list of such tuples when the notifications are coalesced.
+
+        """
+        subscribers = self._path_subscribers
+        for entry in entries:
+            # Lists are replaced rather than modified in place as they may be
+            # iterated on while a value is set.
+            callbacks = subscribers.get(entry, [])
+            if callback in callbacks:
+                continue
+            callbacks = callbacks + [callback]
+            subscribers[entry] = callbacks
+            if self.running and entry in self._entry_index_map:
+                index = self._entry_index_map[entry]
+                self._index_subscribers[index] = callbacks
+
+    def unsubscribe(self, callback, entries=None):
+        """Stop being notified of the updates of some entries.
+
+        Parameters
+        ----------
+        callback : callable
+            Callable previously passed to subscribe.
+
+        entries : iterable(unicode), optional
+            Full paths of the entries for which to remove the subscription. If
+            omitted all subscriptions of the callback are removed.
+
+        """
+        subscribers = self._path_subscribers
+        for entry in list(subscribers if entries is None else entries):
+            callbacks = [c for c in subscribers.get(entry, ())
+                         if c != callback]
+            if callbacks:
+                subscribers[entry] = callbacks
+            else:
+                subscribers.pop(entry, None)
+            if self.running and entry in self._entry_index_map:
+                index = self._entry_index_map[entry]
+                if callbacks:
+                    self._index_subscribers[index] = callbacks
                 else:
-                    mapping[path] = index
-                    index += 1
-                    datas.append(val)
+                    self._index_subscribers.pop(index, None)
 
-        # Walking a second time to add the exception to the _entry_index_map,
-        # in reverse order in case an entry has multiple exceptions.
-        for (node_path, node) in nodes[::-1]:
-            access = node.meta.get('access', [])
-            for entry in access:
-                short_path = node_path + '/' + entry
-                full_path = node_path + '/' + access[entry] + '/' + entry
-                mapping[short_path] = mapping[full_path]
+    def flush_notifications(self, stop=False):
+        """Emit all pending notifications in running mode.
 
-        self._flat_database = datas
-        self._entry_index_map = mapping
+        This is a no-op if notifications are not coalesced.
+
+        Parameters
+        ----------
+        stop : bool, optional
+            Stop the thread periodically emitting the notifications. This
+            should be done once the execution is over.
 
-        self._database = None
+        """
+        if self._flusher and stop:
+            self._flusher_stop.set()
+            self._flusher.join()
+            self._flusher = None
+
+        pending = self._pending_notifications
+        if not pending:
+            return
+
+        batch = []
+        # popitem is atomic so no update can be lost even if some values are
+        # set concurrently.
+        while True:
+            try:
+                batch.append(pending.popitem())
+            except KeyError:
+                break
+
+        if not batch:
+            return
+
+        if self.has_observers('notifier'):
+            self.notifier([('added', path, value) for path, value in batch])
+
+        subscribers = self._path_subscribers
+        if subscribers:
+            news = {}
+            for update in batch:
+                for callback in subscribers.get(update[0], ()):
+                    news.setdefault(callback, []).append(update)
+            for callback, updates in news.items():
+                callback(updates)
 
     def list_nodes(self):
         """List all the nodes present in the database.
@@ -585,23 +1178,18 @@ class TaskDatabase(Atom):
             Dictionary storing the nodes by path
 
         """
-        nodes = [('root', self._database)]
-        for (node_path, node) in nodes:
-            for key, val in node.data.items():
-                if isinstance(val, DatabaseNode):
-                    path = node_path + '/' + key
-                    nodes.append((path, val))
-
-        return dict(nodes)
+        return dict(self._nodes)
 
     def go_to_path(self, path):
         """Method used to reach a node specified by a path.
 
         """
-        node = self._database
-        if path == 'root':
+        node = self._nodes.get(path)
+        if node is not None or path == 'root':
             return node
 
+        # Unknown path: walk the nodes to report which part is invalid.
+        node = self._database
         # Decompose the path in database keys
         keys = path.split('/')
         # Remove first key (ie 'root' as we are not trying to access it)
@@ -630,16 +1218,126 @@ class TaskDatabase(Atom):
     #: Main container for the database.
     _database = Typed(DatabaseNode, ())
 
+    #: Nodes of the database by path.
+    _nodes = Dict()
+
+    #: Counter incremented each time the structure of the hierarchy changes.
+    _structure_version = Int()
+
+    #: Layout used the last time the database entered running mode.
+    _layout = Typed(DatabaseLayout)
+
+    #: Value of the structure version when the layout was computed.
+    _layout_version = Int(-1)
+
+    #: Sorted names of the entries accessible from a node, by path. Entries
+    #: are listed when first requested and the cached list discarded when the
+    #: entries of the node or of one of its ancestors change. Only used in
+    #: edition mode.
+    _accessible_entries = Dict()
+
     #: Flat version of the database only used in running mode for perfomances
     #: issues.
-    _flat_database = List()
+    _flat_database = Value()
 
     #: Dict mapping full paths to flat database indexes.
     _entry_index_map = Dict()
 
+    #: Full paths of the entries ordered by flat database index.
+    _entry_paths = List()
+
     #: Lock to make the database thread safe in running mode.
     _lock = Value()
 
+    #: Last values of the entries set since the last notification, by path.
+    #: None when notifications are not coalesced.
+    _pending_notifications = Typed(dict)
+
+    #: Callbacks subscribed to the updates of an entry by entry path.
+    _path_subscribers = Dict()
+
+    #: Callbacks subscribed to the updates of an entry by flat index. Only
+    #: used in running mode.
+    _index_subscribers = Dict()
+
+    #: Histories of the entries by path.
+    _histories = Dict()
+
+    #: Histories of the entries by flat index. Only used in running mode.
+    _index_histories = Dict()
+
+    #: Recorders attached to the entries by path.
+    _path_recorders = Dict()
+
+    #: Recorders attached to the entries by flat index. Only used in running
+    #: mode.
+    _index_recorders = Dict()
+
+    #: Thread periodically emitting the coalesced notifications.
+    _flusher = Typed(Thread)
+
+    #: Event used to stop the flusher thread.
+    _flusher_stop = Value()
+
+    def _get_layout(self):
+        """Get the layout matching the current structure of the hierarchy.
+
+        """
+        layout = self._layout
+        if layout is None or self._layout_version != self._structure_version:
+            signature = DatabaseLayout.compute_signature(self._database)
+            with _LAYOUTS_LOCK:
+                layout = _LAYOUTS.pop(signature, None)
+                if layout is None:
+                    layout = DatabaseLayout(signature)
+                _LAYOUTS[signature] = layout
+                while len(_LAYOUTS) > LAYOUT_CACHE_SIZE:
+                    _LAYOUTS.popitem(last=False)
+            self._layout = layout
+            self._layout_version = self._structure_version
+
+        return layout
+
+    def _default__nodes(self):
+        return {'root': self._database}
+
+    def _subtree_paths(self, path):
+        """List the path of the registered nodes below a node (included).
+
+        """
+        prefix = path + '/'
+        return [p for p in self._nodes if p == path or p.startswith(prefix)]
+
+    def _invalidate_listings(self, path):
+        """Discard the listings of accessible entries affected by a change
+        in a node.
+
+        """
+        self._structure_version += 1
+        cache = self._accessible_entries
+        if cache:
+            prefix = path + '/'
+            for p in [p for p in cache if p == path or p.startswith(prefix)]:
+                del cache[p]
+
+    def _notify(self, path, value, subscribers):
+        """Notify the update of an entry.
+
+        """
+        if self.has_observers('notifier'):
+            self.notifier(('added', path, value))
+        if subscribers:
+            news = (path, value)
+            for callback in subscribers:
+                callback(news)
+
+    def _flush_periodically(self, window, stop):
+        """Emit the pending notifications every window seconds till stopped.
+
+        """
+        while not stop.wait(window):
+            self.flush_notifications()
+
     def _find_index(self, assumed_path, entry):
         """Find the index associated with a path.
 
@@ -18,7 +18,8 @@ from __future__ import (division, unicode_literals, print_function,
 import logging
 from functools import update_wrapper
 from time import sleep
-from threading import Thread, current_thread
+from timeit import default_timer
+from threading import current_thread
 from traceback import format_exc
 
 
@@ -40,6 +41,9 @@ def handle_stop_pause(root):
         Whether or not the function returned because should_stop was set.
 
     """
+    if not root.interruption_requested():
+        return
+
     stop_flag = root.should_stop
     if stop_flag.is_set():
         return True
@@ -48,8 +52,21 @@ def handle_stop_pause(root):
     if pause_flag.is_set():
         root.resumed.clear()
         root.paused_threads_counter.increment()
+
+        # When both flags share the same state block till it changes,
+        # otherwise poll.
+        shared = getattr(pause_flag, 'shared_flag', None)
+        if shared is not None and shared is getattr(stop_flag, 'shared_flag',
+                                                    None):
+            def wait_for_change():
+                shared.wait_for(lambda: (stop_flag.is_set() or
+                                         not pause_flag.is_set()))
+        else:
+            def wait_for_change():
+                sleep(0.05)
+
         while True:
-            sleep(0.05)
+            wait_for_change()
             if stop_flag.is_set():
                 root.paused_threads_counter.decrement()
                 return True
@@ -109,11 +126,68 @@ def smooth_crash(function_to_decorate):
     return decorator
 
 
+def make_preresolved(perform, resolvers):
+    """Machinery to resolve the formatted and evaluated members before perform.
+
+    Create a wrapper around a method which stores the values of the members
+    in the resolved_values dict of the task before calling the method.
+
+    Parameters
+    ----------
+    perform : method
+        Method which should be wrapped.
+
+    resolvers : list(tuple)
+        Pairs of member name and function taking no argument returning the
+        value of the member.
+
+    """
+    def wrapper(obj, *args, **kwargs):
+
+        values = obj.resolved_values
+        for name, resolver in resolvers:
+            values[name] = resolver()
+
+        return perform(obj, *args, **kwargs)
+
+    update_wrapper(wrapper, perform)
+    return wrapper
+
+
+def make_profiled(perform, profiler, path):
+    """Machinery to record the execution time of perform.
+
+    Parameters
+    ----------
+    perform : method
+        Method which should be wrapped.
+
+    profiler : ExecutionProfiler
+        Profiler in which to record the duration of each call.
+
+    path : unicode
+        Path under which to record the calls.
+
+    """
+    record = profiler.record
+
+    def wrapper(*args, **kwargs):
+
+        tic = default_timer()
+        try:
+            return perform(*args, **kwargs)
+        finally:
+            record(path, default_timer() - tic)
+
+    update_wrapper(wrapper, perform)
+    return wrapper
+
+
 def make_parallel(perform, pool):
     """Machinery to execute perform in parallel.
 
-    Create a wrapper around a method to execute it in a thread and register the
-    thread.
+    Create a wrapper around a method to execute it in a worker thread of the
+    specified pool.
 
     Parameters
     ----------
@@ -121,31 +195,35 @@ def make_parallel(perform, pool):
         Method which should be wrapped to run in parallel.
 
     pool : str
-        Name of the execution pool to which the created thread belongs.
+        Name of the execution pool to which the job is submitted.
 
     """
-    def wrapper(*args, **kwargs):
-
-        obj = args[0]
-        root = obj.root
-        safe_perform = smooth_crash(perform)
+    safe_perform = smooth_crash(perform)
 
-        def thread_perform(task, *args, **kwargs):
+    def pool_perform(task, *args, **kwargs):
+        try:
             safe_perform(task, *args, **kwargs)
+        finally:
             task.root.active_threads_counter.decrement()
 
-        thread = Thread(group=None,
-                        target=thread_perform,
-                        args=args,
-                        kwargs=kwargs)
-
-        pools = obj.root.resources['threads']
+    def wrapper(*args, **kwargs):
 
-        with pools.safe_access(pool) as threads:
-            threads.append(thread)
+        root = args[0].root
+        threads = root.resources['threads']
+        # A job submitted from a worker of the same pool is executed inline,
+        # the worker being already counted as active.
+        if threads.in_pool(pool):
+            safe_perform(*args, **kwargs)
+            return
 
+        # The job is counted as active as soon as it is submitted so that the
+        # root does not consider the measure paused while jobs are queued.
         root.active_threads_counter.increment()
-        thread.start()
+        try:
+            threads.submit(pool, pool_perform, *args, **kwargs)
+        except Exception:
+            root.active_threads_counter.decrement()
+            raise
 
     update_wrapper(wrapper, perform)
     return wrapper
@@ -154,14 +232,14 @@ def make_parallel(perform, pool):
 def make_wait(perform, wait, no_wait):
     """Machinery to make perform wait on other tasks execution.
 
-    Create a wrapper around a method to wait for some threads to terminate
-    before calling the method. Threads are grouped in execution pools.
-    This method supports new threads being started while it is waiting.
+    Create a wrapper around a method to wait for some jobs to terminate
+    before calling the method. Jobs are grouped in execution pools.
+    This method supports new jobs being submitted while it is waiting.
 
     Parameters
     ----------
     perform : method
-        Method which should be wrapped to wait on threads.
+        Method which should be wrapped to wait on jobs.
 
     wait : list(str)
         Names of the execution pool which should be waited for.
@@ -177,90 +255,19 @@ def make_wait(perform, wait, no_wait):
     if wait:
         def wrapper(obj, *args, **kwargs):
 
-            all_threads = obj.root.resources['threads']
-            while True:
-                threads = []
-                # Get all the threads we should be waiting upon.
-                with all_threads.locked():
-                    for p in wait:
-                        threads.extend(all_threads[p])
-
-                # If there is none break. Use any as threads is an iterator.
-                if not any(threads):
-                    break
-
-                # Else join them.
-                for thread in threads:
-                    thread.join()
-
-                # Make sure nobody modify the pools and update them by removing
-                # the references to the dead threads.
-                with all_threads.locked():
-                    for w in wait:
-                        all_threads[w] = [t for t in all_threads[w]
-                                          if t.is_alive()]
-
-                # Start over till no thread remain in the pools in wait.
-
+            obj.root.resources['threads'].wait(pools=wait)
             return perform(obj, *args, **kwargs)
 
     elif no_wait:
         def wrapper(obj, *args, **kwargs):
 
-            all_threads = obj.root.resources['threads']
-            with all_threads.locked():
-                pools = [k for k in all_threads if k not in no_wait]
-
-            while True:
-                # Get all the threads we should be waiting upon.
-                threads = []
-                with all_threads.locked():
-                    for p in pools:
-                        threads.extend(all_threads[p])
-
-                # If there is None break. Use any as threads is an iterator.
-                if not any(threads):
-                    break
-
-                # Else join them.
-                for thread in threads:
-                    thread.join()
-
-                # Make sure nobody modify the pools and update them by removing
-                # the references to the dead threads.
-                with all_threads.locked():
-                    for p in pools:
-                        all_threads[p] = [t for t in all_threads[p]
-                                          if t.is_alive()]
-
-                # Start over till no thread remain in the pool in wait.
-
+            obj.root.resources['threads'].wait(exclude=no_wait)
             return perform(obj, *args, **kwargs)
+
     else:
         def wrapper(obj, *args, **kwargs):
 
-            all_threads = obj.root.resources['threads']
-            while True:
-                threads = []
-                with all_threads.locked():
-                    # Get all the threads we should be waiting upon.
-                    for p in all_threads:
-                        threads.extend(all_threads[p])
-
-                # If there is none break. Use any as threads is an iterator.
-                if not any(threads):
-                    break
-
-                # Else join them.
-                for thread in threads:
-                    thread.join()
-
-                # Make sure nobody modify the pools and update them by removing
-                # the references to the dead threads.
-                with all_threads.locked():
-                    for p in all_threads:
-                        all_threads[p] = [t for t in all_threads[p]
-                                          if t.is_alive()]
+            obj.root.resources['threads'].wait()
             return perform(obj, *args, **kwargs)
 
     update_wrapper(wrapper, perform)
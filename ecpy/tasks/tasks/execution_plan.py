@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Flat execution plans built from a hierarchy of tasks.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from functools import partial
+
+from .decorators import handle_stop_pause
+
+
+#: Step calling a task.
+CALL = 0
+
+#: Step entering a task whose children are inlined in the plan.
+NODE = 1
+
+#: Step evaluating the condition of a task whose children are inlined in the
+#: plan and executed only if the condition is true.
+BRANCH = 2
+
+
+class ExecutionPlan(object):
+    """Flat sequence of pre-bound steps executing a list of tasks.
+
+    Tasks relying on ComplexTask.perform and ConditionalTask are lowered into
+    the plan : a NODE or BRANCH step is followed by the steps of their
+    children. Other tasks are called through a CALL step bound to their
+    perform method, without the wrappers built in prepare, the plan taking
+    care of the interruption checks and of the waits. The tasks whose
+    perform_ involves more than that (parallel execution, members
+    pre-resolution, profiling) are called through perform_. Loops execute
+    their children using their own plan.
+
+    Each step is a tuple (kind, stoppable, wait, call, size) where size is the
+    number of steps of the node starting with the step, which are skipped if
+    the execution of the node is interrupted or if the condition of a branch
+    is false.
+
+    Parameters
+    ----------
+    root : RootTask
+        Root of the hierarchy.
+
+    tasks : iterable(BaseTask)
+        Prepared tasks to execute.
+
+    """
+
+    __slots__ = ('root', 'steps')
+
+    def __init__(self, root, tasks):
+        self.root = root
+        steps = []
+        for task in tasks:
+            lower_task(task, steps)
+        self.steps = tuple(steps)
+
+    def run(self):
+        """Execute all the steps of the plan.
+
+        Loop exceptions are propagated to the caller.
+
+        """
+        root = self.root
+        interruption_requested = root.interruption_requested
+        steps = self.steps
+        length = len(steps)
+        i = 0
+        while i < length:
+            kind, stoppable, wait, call, size = steps[i]
+            if (stoppable and interruption_requested() and
+                    handle_stop_pause(root)):
+                i += size
+                continue
+
+            if wait is not None:
+                wait()
+
+            if kind == CALL:
+                call()
+            elif kind == BRANCH and not call():
+                i += size
+                continue
+            i += 1
+
+
+def lower_task(task, steps):
+    """Append to a list the steps executing a task.
+
+    """
+    if (task.is_parallel() or task.preresolve_members or
+            getattr(task.root, 'profiler', None) is not None):
+        steps.append((CALL, False, None, task.perform_, 1))
+        return
+
+    wait = build_wait(task)
+    condition = get_inlined_condition(task)
+    if condition is None:
+        steps.append((CALL, task.stoppable, wait, task.perform, 1))
+        return
+
+    start = len(steps)
+    if condition is True:
+        steps.append((NODE, task.stoppable, wait, None, 1))
+    else:
+        steps.append((BRANCH, task.stoppable, wait, condition, 1))
+    for child in task.children:
+        lower_task(child, steps)
+    kind, stoppable, wait, call, _ = steps[start]
+    steps[start] = (kind, stoppable, wait, call, len(steps) - start)
+
+
+def get_inlined_condition(task):
+    """Determine whether the children of a task can be inlined.
+
+    Returns
+    -------
+    condition : callable, bool or None
+        None if the task cannot be inlined, True if its children should always
+        be executed and otherwise a callable evaluating the condition under
+        which the children are executed.
+
+    """
+    from .base_tasks import ComplexTask
+    from .logic.conditional_task import ConditionalTask
+
+    perform = getattr(type(task).perform, '__func__', type(task).perform)
+    if perform is getattr(ComplexTask.perform, '__func__',
+                          ComplexTask.perform):
+        return True
+
+    if perform is getattr(ConditionalTask.perform, '__func__',
+                          ConditionalTask.perform):
+        try:
+            return task.compile_evaluation(task.condition)
+        except Exception:
+            return partial(task.format_and_eval_string, task.condition)
+
+    return None
+
+
+def build_wait(task):
+    """Build the function waiting on the pools before executing a task.
+
+    Returns
+    -------
+    wait : callable or None
+        None if the task does not wait.
+
+    """
+    wait = task.wait
+    if not wait.get('activated'):
+        return None
+
+    pools = task.root.resources['threads']
+    if wait.get('wait'):
+        return partial(pools.wait, pools=wait['wait'])
+    elif wait.get('no_wait'):
+        return partial(pools.wait, exclude=wait['no_wait'])
+    return pools.wait
@@ -32,5 +32,4 @@ class ConditionalTask(ComplexTask):
 
         """
         if self.format_and_eval_string(self.condition):
-            for child in self.children:
-                child.perform_()
+            self._get_children_runner()()
@@ -16,18 +16,28 @@ from atom.api import Unicode
 from collections import Iterable
 
 from ..task_interface import TaskInterface
+from .loop_task import length_hint
 
 
 class IterableLoopInterface(TaskInterface):
     """Interface used to loop on a Python iterable.
 
     """
-    #: Iterable on which to iterate.
+    #: Iterable on which to iterate. It can be lazily generated (a generator
+    #: for example) in which case it is consumed one point at a time.
     iterable = Unicode('0.0').tag(pref=True, feval=True)
 
+    #: Optional formula giving the number of points of the loop. Useful when
+    #: the iterable has no length (generators), otherwise the length (or
+    #: length hint) of the iterable is used.
+    length = Unicode().tag(pref=True, feval='Skip_empty')
+
     def check(self, *args, **kwargs):
         """Check that the iterable member evaluation does yield an iterable.
 
+        Lazy iterables are not consumed (no value is written in the database
+        for them) as evaluating them can be expensive or have side effects.
+
         """
         test, traceback = super(IterableLoopInterface,
                                 self).check(*args, **kwargs)
@@ -36,14 +46,27 @@ class IterableLoopInterface(TaskInterface):
 
         task = self.task
         iterable = task.format_and_eval_string(self.iterable)
-        if isinstance(iterable, Iterable):
-            task.write_in_database('point_number', len(iterable))
-            if 'value' in task.database_entries:
-                task.write_in_database('value', next(iter(iterable)))
+        err_path = task.path + '/' + task.name
+        if not isinstance(iterable, Iterable):
+            traceback[err_path] = 'The computed iterable is not iterable.'
+            return False, traceback
+
+        if self.length:
+            try:
+                length = int(task.format_and_eval_string(self.length))
+            except Exception as e:
+                mess = 'Loop task did not succeed to compute the length: {}'
+                traceback[err_path + '-length'] = mess.format(e)
+                return False, traceback
         else:
-            test = False
-            traceback[task.path + '/' + task.name] = \
-                'The computed iterable is not iterable.'
+            length = length_hint(iterable, 0)
+        task.write_in_database('point_number', length)
+
+        # Only peek at containers, iterators would be consumed.
+        if 'value' in task.database_entries and iter(iterable) is not iterable:
+            for value in iterable:
+                task.write_in_database('value', value)
+                break
 
         return test, traceback
 
@@ -53,5 +76,7 @@ class IterableLoopInterface(TaskInterface):
         """
         task = self.task
         iterable = task.format_and_eval_string(self.iterable)
+        length = (int(task.format_and_eval_string(self.length))
+                  if self.length else None)
 
-        task.perform_loop(iterable)
+        task.perform_loop(iterable, length)
@@ -12,12 +12,103 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from atom.api import Unicode
-from numpy import linspace
+from ast import literal_eval
+try:
+    from collections.abc import Sequence
+except ImportError:  # Python 2
+    from collections import Sequence
+
+import numpy as np
+from atom.api import Unicode, Dict
 
 from ..task_interface import TaskInterface
 
 
+class LinearProgression(Sequence):
+    """Lazy equivalent of numpy.linspace.
+
+    The points are computed on demand so that the memory footprint does not
+    depend on the number of points. The last point is always exactly equal to
+    stop.
+
+    Parameters
+    ----------
+    start : float
+        First point of the progression.
+
+    stop : float
+        Last point of the progression (included).
+
+    num : int
+        Number of points of the progression.
+
+    """
+    __slots__ = ('start', 'stop', 'step', 'num')
+
+    def __init__(self, start, stop, num):
+        num = int(num)
+        if num < 0:
+            msg = 'Number of samples, {}, must be non-negative.'
+            raise ValueError(msg.format(num))
+        dtype = np.result_type(start, stop, float)
+        self.start = dtype.type(start)
+        self.stop = dtype.type(stop)
+        self.step = ((self.stop - self.start)/(num - 1) if num > 1 else
+                     0*self.start)
+        self.num = num
+
+    def __len__(self):
+        return self.num
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._points(*index.indices(self.num))
+
+        num = self.num
+        if index < 0:
+            index += num
+        if not 0 <= index < num:
+            raise IndexError('LinearProgression index out of range')
+        if index == num - 1 and num > 1:
+            return self.stop
+        return self.start + index*self.step
+
+    def __iter__(self):
+        start, step, last = self.start, self.step, self.num - 1
+        for i in range(last):
+            yield start + i*step
+        if last > 0:
+            yield self.stop
+        elif last == 0:
+            yield start
+
+    def __array__(self, dtype=None):
+        points = self._points(0, self.num, 1)
+        return points if dtype is None else points.astype(dtype)
+
+    def __repr__(self):
+        return 'LinearProgression({!r}, {!r}, {!r})'.format(self.start,
+                                                            self.stop,
+                                                            self.num)
+
+    def _points(self, start, stop, step):
+        """Compute the points whose indexes are in range(start, stop, step).
+
+        """
+        indexes = np.arange(start, stop, step)
+        points = self.start + indexes*self.step
+        if self.num > 1:
+            points[indexes == self.num - 1] = self.stop
+        return points
+
+
+def linspace(start, stop, num):
+    """Build a lazy linspace.
+
+    """
+    return LinearProgression(start, stop, num)
+
+
 class LinspaceLoopInterface(TaskInterface):
     """ Common logic for all loop tasks.
 
@@ -48,7 +139,7 @@ class LinspaceLoopInterface(TaskInterface):
         step = task.format_and_eval_string(self.step)
 
         try:
-            num = int(abs((stop - start)/step)) + 1
+            num = self._point_number(start, stop, step)
             task.write_in_database('point_number', num)
         except Exception as e:
             test = False
@@ -65,15 +156,59 @@ class LinspaceLoopInterface(TaskInterface):
 
         return test, traceback
 
+    def prepare(self):
+        """Evaluate once the parameters which are simple literals.
+
+        Other parameters, even if they do not reference the database, are
+        evaluated each time the loop is performed. If all parameters are
+        literals the linspace itself is built on the first execution and
+        shared between all the following ones.
+
+        """
+        super(LinspaceLoopInterface, self).prepare()
+        cache = {}
+        for name in ('start', 'stop', 'step'):
+            try:
+                cache[name] = literal_eval(getattr(self, name).strip())
+            except (ValueError, SyntaxError):
+                continue
+
+        self._cache = cache
+
     def perform(self):
         """Build the linspace and pass it to the LoopTask.
 
         """
         task = self.task
-        start = task.format_and_eval_string(self.start)
-        stop = task.format_and_eval_string(self.stop)
-        step = task.format_and_eval_string(self.step)
-        num = int(round(abs(((stop - start)/step)))) + 1
+        cache = self._cache
+        iterable = cache.get('linspace')
+        if iterable is None:
+            values = [cache[name] if name in cache else
+                      task.format_and_eval_string(getattr(self, name))
+                      for name in ('start', 'stop', 'step')]
+            iterable = self._build_linspace(*values)
+            if len(cache) == 3:
+                cache['linspace'] = iterable
 
-        iterable = linspace(start, stop, num)
         task.perform_loop(iterable)
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Values of the literal parameters evaluated when preparing the
+    #: interface and linspace built from them.
+    _cache = Dict()
+
+    @staticmethod
+    def _point_number(start, stop, step):
+        """Compute the number of points between start and stop (included).
+
+        """
+        return int(round(abs(((stop - start)/step)))) + 1
+
+    def _build_linspace(self, start, stop, step):
+        """Build a lazy linspace from the values of the parameters.
+
+        """
+        return linspace(start, stop, self._point_number(start, stop, step))
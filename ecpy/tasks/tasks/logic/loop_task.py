@@ -12,15 +12,37 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from atom.api import (Typed, Bool, set_default)
+from atom.api import (Typed, Bool, Int, set_default)
 
 from timeit import default_timer
+from itertools import islice
+try:
+    from collections.abc import Sequence
+except ImportError:  # Python 2
+    from collections import Sequence
+import numpy as np
 
 from ..base_tasks import (SimpleTask, ComplexTask)
 from ..task_interface import InterfaceableTaskMixin
 from ..decorators import handle_stop_pause
 from .loop_exceptions import BreakException, ContinueException
 
+try:
+    from operator import length_hint
+except ImportError:  # Python 2
+    def length_hint(obj, default=0):
+        """Return an estimate of the number of items in obj.
+
+        """
+        try:
+            return len(obj)
+        except TypeError:
+            try:
+                hint = type(obj).__length_hint__(obj)
+            except (AttributeError, TypeError):
+                return default
+            return default if hint is NotImplemented else hint
+
 
 class LoopTask(InterfaceableTaskMixin, ComplexTask):
     """Complex task which, at each iteration, call all its child tasks.
@@ -36,6 +58,16 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
     #: is simply a convenience and can be set to None.
     task = Typed(SimpleTask).tag(child=50)
 
+    #: Number of points to process at once in batch mode. If zero or if some
+    #: children cannot process a block of points (see BaseTask.perform_batch_)
+    #: the loop is performed point by point.
+    #: In batch mode, the index and value entries and the entries of the
+    #: children hold arrays during the execution of the children. Once the
+    #: loop is over they hold the values of the last point as after a point by
+    #: point loop. elapsed_time holds the mean time needed to process one point
+    #: of the last block.
+    batch_size = Int().tag(pref=True)
+
     database_entries = set_default({'point_number': 11, 'index': 1,
                                     'value': 0})
 
@@ -58,7 +90,7 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
 
         return test, traceback
 
-    def perform_loop(self, iterable):
+    def perform_loop(self, iterable, length=None):
         """Perform the loop on the iterable calling all child tasks at each
         iteration.
 
@@ -67,10 +99,22 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
         Parameters
         ----------
         iterable : iterable
-            Iterable on which the loop should be performed.
+            Iterable on which the loop should be performed. It does not need
+            to have a length (generators for example) and is consumed lazily.
+
+        length : int, optional
+            Number of points of the loop. If None, it is determined from the
+            length of the iterable or its length hint, and set to zero if
+            neither is available.
 
         """
-        if self.timing:
+        if length is None:
+            length = length_hint(iterable, 0)
+        self.write_in_database('point_number', length)
+
+        if self.batch_size > 0 and self._can_batch():
+            self._perform_loop_batch(iterable)
+        elif self.timing:
             if self.task:
                 self._perform_loop_timing_task(iterable)
             else:
@@ -89,9 +133,8 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
         """Perform the loop when there is no child and timing is not required.
 
         """
-        self.write_in_database('point_number', len(iterable))
-
         root = self.root
+        run_children = self._get_children_runner()
         for i, value in enumerate(iterable):
 
             if handle_stop_pause(root):
@@ -100,8 +143,7 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
             self.write_in_database('index', i+1)
             self.write_in_database('value', value)
             try:
-                for child in self.children:
-                    child.perform_()
+                run_children()
             except BreakException:
                 break
             except ContinueException:
@@ -111,9 +153,8 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
         """Perform the loop when there is a child and timing is not required.
 
         """
-        self.write_in_database('point_number', len(iterable))
-
         root = self.root
+        run_children = self._get_children_runner()
         for i, value in enumerate(iterable):
 
             if handle_stop_pause(root):
@@ -122,8 +163,7 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
             self.write_in_database('index', i+1)
             self.task.perform_(value)
             try:
-                for child in self.children:
-                    child.perform_()
+                run_children()
             except BreakException:
                 break
             except ContinueException:
@@ -133,9 +173,8 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
         """Perform the loop when there is no child and timing is required.
 
         """
-        self.write_in_database('point_number', len(iterable))
-
         root = self.root
+        run_children = self._get_children_runner()
         for i, value in enumerate(iterable):
 
             if handle_stop_pause(root):
@@ -145,8 +184,7 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
             self.write_in_database('value', value)
             tic = default_timer()
             try:
-                for child in self.children:
-                    child.perform_()
+                run_children()
             except BreakException:
                 self.write_in_database('elapsed_time', default_timer()-tic)
                 break
@@ -159,9 +197,8 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
         """Perform the loop when there is a child and timing is required.
 
         """
-        self.write_in_database('point_number', len(iterable))
-
         root = self.root
+        run_children = self._get_children_runner()
         for i, value in enumerate(iterable):
 
             if handle_stop_pause(root):
@@ -171,8 +208,7 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
             tic = default_timer()
             self.task.perform_(value)
             try:
-                for child in self.children:
-                    child.perform_()
+                run_children()
             except BreakException:
                 self.write_in_database('elapsed_time', default_timer()-tic)
                 break
@@ -181,6 +217,83 @@ class LoopTask(InterfaceableTaskMixin, ComplexTask):
                 continue
             self.write_in_database('elapsed_time', default_timer()-tic)
 
+    def _can_batch(self):
+        """Check whether all the children can process blocks of points.
+
+        """
+        children = list(self.children)
+        if self.task:
+            children.append(self.task)
+        return all(c.perform_batch_ for c in children)
+
+    def _iter_blocks(self, iterable):
+        """Split the iterable in numpy arrays of batch_size points.
+
+        """
+        size = self.batch_size
+        if isinstance(iterable, (np.ndarray, Sequence)):
+            for start in range(0, len(iterable), size):
+                yield np.asarray(iterable[start:start+size])
+        else:
+            iterator = iter(iterable)
+            while True:
+                block = np.array(list(islice(iterator, size)))
+                if not len(block):
+                    break
+                yield block
+
+    def _perform_loop_batch(self, iterable):
+        """Perform the loop by blocks of points.
+
+        Each child is called once per block with the values of the points
+        as argument.
+
+        """
+        root = self.root
+        timing = self.timing
+        children = list(self.children)
+        if self.task:
+            children.insert(0, self.task)
+        index = 1
+        values = None
+        for values in self._iter_blocks(iterable):
+
+            if handle_stop_pause(root):
+                return
+
+            length = len(values)
+            self.write_in_database('index', np.arange(index, index+length))
+            if not self.task:
+                self.write_in_database('value', values)
+            tic = default_timer()
+            for child in children:
+                child.perform_batch_(values)
+            if timing:
+                self.write_in_database('elapsed_time',
+                                       (default_timer()-tic)/length)
+            index += length
+
+        # Leave the entries in the same state as after a point by point loop.
+        if values is not None and len(values):
+            self.write_in_database('index', index - 1)
+            if not self.task:
+                self.write_in_database('value', values[-1])
+            for child in children:
+                self._keep_last_point(child, len(values))
+
+    def _keep_last_point(self, child, length):
+        """Replace the blocks written by a child by their last point.
+
+        Only the arrays whose first dimension matches the length of the last
+        block are considered as having been computed for a block of points.
+
+        """
+        for entry in child.database_entries:
+            value = child.get_from_database(child._task_entry(entry))
+            if (isinstance(value, np.ndarray) and value.ndim and
+                    len(value) == length):
+                child.write_in_database(entry, value[-1])
+
     def _post_setattr_task(self, old, new):
         """Keep the database entries in sync with the task member.
 
@@ -40,6 +40,7 @@ class WhileTask(ComplexTask):
         """
         i = 1
         root = self.root
+        run_children = self._get_children_runner()
         while True:
             self.write_in_database('index', i)
             i += 1
@@ -50,8 +51,7 @@ class WhileTask(ComplexTask):
                 return
 
             try:
-                for child in self.children:
-                    child.perform_()
+                run_children()
             except BreakException:
                 break
             except ContinueException:
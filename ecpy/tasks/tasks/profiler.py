@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Tools to measure the time spent executing each task.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from math import frexp
+from threading import Lock, local
+
+from configobj import ConfigObj
+
+
+#: Number of bins of the latency histograms.
+HISTOGRAM_BINS = 32
+
+
+class TaskStats(object):
+    """Execution statistics of a task.
+
+    Durations are expressed in seconds. The latency histogram uses power of
+    two bins expressed in µs : the bin i > 0 counts the calls which lasted
+    between 2**(i-1) and 2**i µs, the bin 0 the calls shorter than 1 µs and
+    the last bin also counts all the longer calls.
+
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.histogram = [0]*HISTOGRAM_BINS
+
+    @property
+    def mean(self):
+        """Mean duration of a call.
+
+        """
+        return self.total/self.count if self.count else 0.0
+
+    def add(self, duration):
+        """Account for a call of the given duration.
+
+        """
+        self.count += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        exponent = frexp(duration*1e6)[1]
+        self.histogram[min(max(exponent, 0), HISTOGRAM_BINS - 1)] += 1
+
+    def merge(self, other):
+        """Add the statistics of another object to this one.
+
+        """
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram,
+                                                other.histogram)]
+
+    def to_dict(self):
+        """Convert the statistics to a dictionary of builtin types.
+
+        """
+        return {'count': self.count, 'total': self.total, 'mean': self.mean,
+                'min': self.min if self.count else 0.0, 'max': self.max,
+                'histogram': list(self.histogram)}
+
+
+class ExecutionProfiler(object):
+    """Collect the execution statistics of tasks.
+
+    Each thread records its measurements in its own statistics so that
+    recording never requires to acquire a lock. The statistics of all threads
+    are merged once the execution is over.
+
+    """
+
+    __slots__ = ('_local', '_records', '_lock')
+
+    def __init__(self):
+        self._local = local()
+        self._records = []
+        self._lock = Lock()
+
+    def record(self, path, duration):
+        """Record the duration of a call.
+
+        Parameters
+        ----------
+        path : unicode
+            Path identifying the task which was called.
+
+        duration : float
+            Duration of the call in seconds.
+
+        """
+        try:
+            stats = self._local.stats
+        except AttributeError:
+            stats = self._local.stats = {}
+            with self._lock:
+                self._records.append(stats)
+
+        task_stats = stats.get(path)
+        if task_stats is None:
+            task_stats = stats[path] = TaskStats()
+        task_stats.add(duration)
+
+    def merge(self):
+        """Merge the statistics recorded by all threads.
+
+        Returns
+        -------
+        stats : dict
+            Statistics of the tasks as TaskStats by task path.
+
+        """
+        with self._lock:
+            records = list(self._records)
+
+        merged = {}
+        for stats in records:
+            for path, task_stats in list(stats.items()):
+                if path not in merged:
+                    merged[path] = TaskStats()
+                merged[path].merge(task_stats)
+
+        return merged
+
+
+def write_profile(profile, path):
+    """Save execution statistics in a file.
+
+    Parameters
+    ----------
+    profile : dict
+        Statistics of the tasks as dictionaries (see TaskStats.to_dict) by
+        task path.
+
+    path : unicode
+        Path of the file to write, the statistics of each task are stored in
+        a section named after the task path.
+
+    """
+    config = ConfigObj(indent_type='    ', encoding='utf-8')
+    for task_path in sorted(profile):
+        config[task_path] = {k: repr(v)
+                             for k, v in sorted(profile[task_path].items())}
+    config.filename = path
+    config.write()
@@ -12,21 +12,60 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
+import os
 import logging
+from traceback import format_exc
 from contextlib import contextmanager
 from collections import defaultdict
-from threading import RLock, Lock
+from time import time
+from threading import RLock, Lock, Thread, Event, Condition, local
+from queue import Queue, Empty  # This is allowed thanks to the future package
 
-from atom.api import Atom, Instance, Value, Int
+from atom.api import (Atom, Instance, Value, Int, Unicode, Dict, List, Bool,
+                      Typed, Float)
+
+
+#: Thread local storage holding, for worker threads, the pool to which the
+#: thread belongs and the future of the job being executed.
+_WORKER_STATE = local()
+
+
+def current_job():
+    """Get the pool and the future of the job executed by the current thread.
+
+    Returns
+    -------
+    pool : WorkerPool | None
+        Pool to which the current thread belongs or None if the current thread
+        is not a worker thread.
+
+    future : TaskFuture | None
+        Future of the job currently executed by the worker thread.
+
+    """
+    return (getattr(_WORKER_STATE, 'pool', None),
+            getattr(_WORKER_STATE, 'future', None))
 
 
 class SharedCounter(Atom):
     """ Thread-safe counter object.
 
+    Parameters
+    ----------
+    condition : Condition, optional
+        Condition used to protect the counter and to notify that the count
+        reached zero. Sharing a condition between several counters allows to
+        wait on all of them at once.
+
     """
     #: Current count of the counter. User should not manipulate this directly.
     count = Int()
 
+    def __init__(self, condition=None, **kwargs):
+        super(SharedCounter, self).__init__(**kwargs)
+        if condition is not None:
+            self._lock = condition
+
     def increment(self):
         """Increment the counter by one.
 
@@ -40,9 +79,41 @@ class SharedCounter(Atom):
         """
         with self._lock:
             self.count += -1
+            if not self.count:
+                self._lock.notify_all()
 
-    #: Simple lock to ensure the thread safety of operations.
-    _lock = Value(factory=Lock)
+    def wait_for_zero(self, timeout=None):
+        """Block till the count reaches zero.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximal time to wait in seconds.
+
+        Returns
+        -------
+        result : bool
+            Whether the count is zero.
+
+        """
+        condition = self._lock
+        with condition:
+            if timeout is None:
+                while self.count:
+                    condition.wait()
+            else:
+                end = time() + timeout
+                while self.count:
+                    remaining = end - time()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+
+            return not self.count
+
+    #: Condition ensuring the thread safety of operations and used to notify
+    #: that the count reached zero.
+    _lock = Value(factory=Condition)
 
 
 class SharedDict(Atom):
@@ -156,15 +227,269 @@ class ResourceHolder(SharedDict):
         pass
 
 
+class TaskFuture(Atom):
+    """Object tracking the completion of a job submitted to a WorkerPool.
+
+    The API mimics the one of threads (join, is_alive) so that futures can be
+    manipulated in place of threads.
+
+    """
+
+    def join(self, timeout=None):
+        """Wait for the job to complete.
+
+        """
+        self._done.wait(timeout)
+
+    def is_alive(self):
+        """Check whether the job is still pending or running.
+
+        """
+        return not self._done.is_set()
+
+    def done(self):
+        """Check whether the job is over.
+
+        """
+        return self._done.is_set()
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Event set once the job is over.
+    _done = Value(factory=Event)
+
+    def _set_done(self):
+        """Mark the job as done.
+
+        """
+        self._done.set()
+
+
+class WorkerPool(Atom):
+    """Bounded pool of reusable worker threads.
+
+    Workers are created lazily when a job is submitted and no worker is idle,
+    up to max_workers. Then jobs are queued till a worker becomes available.
+
+    """
+    #: Name of the pool, used to name the worker threads.
+    name = Unicode()
+
+    #: Maximal number of worker threads.
+    max_workers = Int(8)
+
+    #: Number of jobs submitted and not yet completed.
+    pending = Typed(SharedCounter, ())
+
+    def submit(self, func, *args, **kwargs):
+        """Execute a function in a worker thread.
+
+        If the calling thread is itself a worker of the pool, the function is
+        executed immediately in the calling thread. Otherwise a job submitting
+        to its own pool and waiting on it could never be scheduled once all
+        the workers are busy.
+
+        Returns
+        -------
+        future : TaskFuture
+            Future tracking the completion of the job.
+
+        """
+        future = TaskFuture()
+        if current_job()[0] is self:
+            try:
+                func(*args, **kwargs)
+            finally:
+                future._set_done()
+            return future
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit a job to a shut down pool.')
+            if self._idle:
+                self._idle -= 1
+            elif len(self._workers) < self.max_workers:
+                name = '{}-worker-{}'.format(self.name, len(self._workers))
+                worker = Thread(name=name, target=self._work)
+                worker.daemon = True
+                self._workers.append(worker)
+                worker.start()
+            self.pending.increment()
+            self._queue.put((future, func, args, kwargs))
+
+        return future
+
+    def shutdown(self):
+        """Stop all the workers once the queued jobs have been processed.
+
+        """
+        with self._lock:
+            self._shutdown = True
+            workers = self._workers
+            self._workers = []
+
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Queue of jobs waiting to be executed.
+    _queue = Value(factory=Queue)
+
+    #: Worker threads of the pool.
+    _workers = List()
+
+    #: Number of workers waiting for a job and not yet reserved by a submit.
+    _idle = Int()
+
+    #: Flag indicating that the pool has been shut down.
+    _shutdown = Bool()
+
+    #: Lock protecting the workers and the idle count.
+    _lock = Value(factory=Lock)
+
+    def _work(self):
+        """Process jobs till receiving None.
+
+        """
+        queue = self._queue
+        _WORKER_STATE.pool = self
+        while True:
+            job = queue.get()
+            if job is None:
+                break
+
+            future, func, args, kwargs = job
+            _WORKER_STATE.future = future
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                log = logging.getLogger(__name__)
+                log.exception('Unhandled exception in pool %s', self.name)
+            finally:
+                _WORKER_STATE.future = None
+                future._set_done()
+
+            with self._lock:
+                self._idle += 1
+            self.pending.decrement()
+
+
 class ThreadPoolResource(ResourceHolder):
-    """Resource holder specialized to handle threads grouped in pools.
+    """Resource holder specialized to handle parallel jobs grouped in pools.
+
+    Each pool executes its jobs using a WorkerPool and the values stored are
+    the futures of the jobs submitted to the pool. The pending jobs of each
+    pool are counted using counters sharing a single condition so that
+    waiting on any set of pools does not require to inspect the jobs.
 
     """
+    #: Maximal number of worker threads used by a pool.
+    max_workers = Int(8)
+
+    #: Maximal number of worker threads for specific pools, overriding
+    #: max_workers.
+    pool_sizes = Dict()
+
     def __init__(self, default=list):
         super(ThreadPoolResource, self).__init__(default)
 
+    def submit(self, pool, func, *args, **kwargs):
+        """Execute a function in a worker thread of a pool.
+
+        Parameters
+        ----------
+        pool : unicode
+            Name of the pool in which to execute the function.
+
+        func : callable
+            Function to execute, additional arguments are passed to it.
+
+        Returns
+        -------
+        future : TaskFuture
+            Future tracking the completion of the job.
+
+        """
+        with self.locked():
+            workers = self._workers.get(pool)
+            if workers is None:
+                size = self.pool_sizes.get(pool, self.max_workers)
+                counter = SharedCounter(self._condition)
+                workers = WorkerPool(name=pool, max_workers=size,
+                                     pending=counter)
+                with self._condition:
+                    self._workers[pool] = workers
+
+        # Submit outside of the lock as the job may be executed inline.
+        future = workers.submit(func, *args, **kwargs)
+
+        with self.locked():
+            # Discard the references to the completed jobs from time to time
+            # to avoid accumulating them when nobody waits on the pool.
+            futures = self._dict[pool]
+            futures.append(future)
+            if len(futures) >= self._prune_threshold:
+                futures[:] = [f for f in futures if f.is_alive()]
+                self._prune_threshold = max(2*len(futures), 64)
+
+        return future
+
+    def in_pool(self, pool):
+        """Check whether the current thread is a worker of a pool.
+
+        Jobs submitted to a pool from one of its workers are executed inline.
+
+        """
+        return (pool in self._workers and
+                current_job()[0] is self._workers[pool])
+
+    def wait(self, pools=None, exclude=()):
+        """Wait for the jobs of some pools to complete.
+
+        Jobs submitted while waiting are also waited upon. When called from a
+        job executed by one of the pools, that job is not waited upon.
+
+        Parameters
+        ----------
+        pools : iterable, optional
+            Names of the pools to wait on. If None all pools are waited on.
+
+        exclude : iterable, optional
+            Names of the pools not to wait on when pools is None.
+
+        """
+        # The job calling wait (if any) is still pending and must not be
+        # counted.
+        own_pool, own_job = current_job()
+        if own_job is None:
+            own_pool = None
+
+        condition = self._condition
+        with condition:
+            while True:
+                names = (pools if pools is not None else
+                         [p for p in self._workers if p not in exclude])
+                workers = self._workers
+                if not any(workers[p].pending.count -
+                           (workers[p] is own_pool)
+                           for p in names if p in workers):
+                    break
+                condition.wait()
+
+        # Discard the references to the completed jobs.
+        with self.locked():
+            for p in names:
+                self._dict[p] = [f for f in self._dict[p] if f.is_alive()]
+
     def release(self):
-        """Join all the threads still alive.
+        """Wait for all the jobs and stop all the worker threads.
 
         """
         for _, pool in self.items():
@@ -176,6 +501,27 @@ class ThreadPoolResource(ResourceHolder):
                     mes = 'Failed to join thread %s from pool %s'
                     log.exception(mes, thread, pool)
 
+        with self.locked():
+            workers = list(self._workers.values())
+            self._workers = {}
+
+        for pool in workers:
+            pool.shutdown()
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Worker pools by name.
+    _workers = Dict()
+
+    #: Condition shared by the counters of pending jobs of all pools.
+    _condition = Value(factory=Condition)
+
+    #: Number of futures stored for a pool above which the completed ones
+    #: are discarded on submission.
+    _prune_threshold = Int(64)
+
 
 class InstrsResource(ResourceHolder):
     """Resource holder specialized to handle instruments.
@@ -222,3 +568,204 @@ class FilesResource(ResourceHolder):
                 log = logging.getLogger(__name__)
                 mes = 'Failed to close file handler : %s'
                 log.exception(mes, self[file_id])
+
+
+class _FlushRequest(object):
+    """Request to flush an AsyncFileSink sent to its writer thread.
+
+    """
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = Event()
+
+
+class AsyncFileSink(Atom):
+    """File whose writes are performed by a dedicated thread.
+
+    The data passed to write are queued and written in the background so that
+    the thread calling write does not wait on the disk. When the queue is
+    full, write blocks till the writer thread catches up. The file is flushed
+    once no data has been received for flush_interval, so that the data
+    written before a pause quickly reach the disk.
+
+    Errors occuring in the writer thread are reported by the next call to
+    write, flush or close.
+
+    Parameters
+    ----------
+    path : unicode
+        Path of the file to open.
+
+    mode : unicode, optional
+        Mode in which to open the file.
+
+    """
+    #: Path of the file.
+    path = Unicode()
+
+    #: Mode in which the file is opened.
+    mode = Unicode('a')
+
+    #: Maximal number of pending writes.
+    queue_size = Int(1000)
+
+    #: Time (in s) without writes after which the file is flushed. If zero,
+    #: the file is flushed after each write.
+    flush_interval = Float(1.0)
+
+    #: Whether to ask the OS to commit the data to the disk on each flush.
+    fsync = Bool()
+
+    def __init__(self, path, mode='a', **kwargs):
+        super(AsyncFileSink, self).__init__(path=path, mode=mode, **kwargs)
+        self._file = open(path, mode)
+        self._queue = Queue(self.queue_size)
+        name = 'file-sink-' + os.path.basename(path)
+        self._thread = Thread(name=name, target=self._write_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def closed(self):
+        """Whether the sink has been closed.
+
+        """
+        return self._closed
+
+    def write(self, data):
+        """Queue data to be written in the file.
+
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError('I/O operation on closed file.')
+            self._check_error()
+            self._queue.put(data)
+
+    def flush(self):
+        """Wait for the pending writes to be performed and flush the file.
+
+        """
+        request = _FlushRequest()
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.put(request)
+        request.done.wait()
+        self._check_error()
+
+    def close(self):
+        """Wait for the pending writes to be performed and close the file.
+
+        This method is safe to call on an already closed sink.
+
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._check_error()
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Underlying file object, only manipulated by the writer thread.
+    _file = Value()
+
+    #: Queue of the data to write.
+    _queue = Value()
+
+    #: Thread writing into the file.
+    _thread = Value()
+
+    #: Flag indicating whether the sink was closed.
+    _closed = Bool()
+
+    #: Traceback of the first error which occured in the writer thread.
+    _error = Unicode()
+
+    #: Lock preventing to queue data after the sink was closed.
+    _lock = Value(factory=Lock)
+
+    def _check_error(self):
+        """Raise an IOError if writing to the file failed.
+
+        """
+        if self._error:
+            msg = 'Writing in {} failed :\n{}'
+            raise IOError(msg.format(self.path, self._error))
+
+    def _commit(self):
+        """Flush the file and commit it to the disk if requested.
+
+        """
+        try:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except Exception:
+            if not self._error:
+                self._error = format_exc()
+
+    def _write_loop(self):
+        """Write the queued data till receiving None.
+
+        Flush requests are signaled as done once the file is flushed.
+
+        """
+        queue = self._queue
+        interval = self.flush_interval
+        dirty = False
+        while True:
+            try:
+                item = queue.get(timeout=interval if dirty else None)
+            except Empty:
+                self._commit()
+                dirty = False
+                continue
+
+            if item is None or isinstance(item, _FlushRequest):
+                if dirty:
+                    self._commit()
+                    dirty = False
+                if item is None:
+                    break
+                item.done.set()
+                continue
+
+            if not self._error:
+                try:
+                    self._file.write(item)
+                except Exception:
+                    self._error = format_exc()
+            if interval:
+                dirty = True
+            else:
+                self._commit()
+
+        try:
+            self._file.close()
+        except Exception:
+            if not self._error:
+                self._error = format_exc()
+
+
+class AsyncFilesResource(FilesResource):
+    """Resource holder specialized in handling AsyncFileSink.
+
+    """
+    def reset(self):
+        """Wait for all the pending writes to be performed.
+
+        """
+        for file_id in self:
+            try:
+                self[file_id].flush()
+            except Exception:
+                log = logging.getLogger(__name__)
+                mes = 'Failed to flush file sink : %s'
+                log.exception(mes, self[file_id])
@@ -48,3 +48,62 @@ def safe_eval(expr, local_var):
         return expr
 
     return eval(expr, globals(), local_var)
+
+
+def compile_expression(expr, values):
+    """Compile an expression into a function evaluating it.
+
+    Parameters
+    ----------
+    expr : unicode
+        Expression to compile. Database values should be referred to as
+        _db[i] where i is the index of the entry in the flat database.
+
+    values : sequence
+        Flat database values to which the function is bound.
+
+    Returns
+    -------
+    func : callable
+        Function taking no argument and returning the value of the
+        expression. As for safe_eval, expressions containing only letters are
+        returned as is.
+
+    """
+    if expr.isalpha():
+        return lambda: expr
+
+    # Compile the expression alone first so that invalid expressions raise
+    # the same errors as when using eval.
+    compile(expr.lstrip(' \t'), '<string>', 'eval')
+    source = 'lambda _db=_db: (\n' + expr + '\n)'
+    return eval(source, globals(), {'_db': values})
+
+
+def compile_formatter(template, indexes, values):
+    """Build a function formatting a string using the flat database values.
+
+    Parameters
+    ----------
+    template : unicode
+        String to format in which the database values are replaced by '{}'.
+
+    indexes : list(int)
+        Indexes in the flat database of the values to use in the formatting,
+        in order of appearance in the template.
+
+    values : sequence
+        Flat database values to which the function is bound.
+
+    Returns
+    -------
+    func : callable
+        Function taking no argument and returning the formatted string.
+
+    """
+    if not indexes:
+        return lambda: template
+
+    args = ', '.join('_db[%d]' % i for i in indexes)
+    source = 'lambda _db=_db, _fmt=_fmt: _fmt(%s)' % args
+    return eval(source, {}, {'_db': values, '_fmt': template.format})
@@ -79,6 +79,14 @@ class InterfaceableMixin(Atom):
         else:
             return self.i_perform(*args, **kwargs)
 
+    def prepare(self):
+        """Prepare the interface after the next parent class in the mro.
+
+        """
+        super(InterfaceableMixin, self).prepare()
+        if self.interface:
+            self.interface.prepare()
+
     def traverse(self, depth=-1):
         """First yield self then interface and finally next values.
 
@@ -290,7 +298,8 @@ class BaseInterface(HasPrefAtom):
 
         By default tries to format all members tagged with 'fmt' and try to
         eval all members tagged with 'feval'. If the tag value is 'Warn', the
-        test will considered passed but a traceback entry will be filled.
+        test will considered passed but a traceback entry will be filled. If
+        it is 'Skip_empty', empty strings are not evaluated.
 
         """
         res = True
@@ -309,8 +318,11 @@ class BaseInterface(HasPrefAtom):
                 traceback[err_path + '-' + n] = msg
 
         for n, m in tagged_members(self, 'feval').items():
+            string = getattr(self, n)
+            if not string and m.metadata['feval'] == 'Skip_empty':
+                continue
             try:
-                val = task.format_and_eval_string(getattr(self, n))
+                val = task.format_and_eval_string(string)
                 if n in self.database_entries:
                     task.write_in_database(n, val)
             except Exception:
@@ -321,6 +333,20 @@ class BaseInterface(HasPrefAtom):
 
         return res, traceback
 
+    def prepare(self):
+        """Prepare the interface to be performed.
+
+        This method is called when preparing the object this interface is
+        linked to. By default it compiles the members tagged with 'fmt' and
+        'feval'.
+
+        """
+        task = self.task
+        if task.database and task.database.running:
+            for tag in ('fmt', 'feval'):
+                for name in tagged_members(self, tag):
+                    task.compile_string(getattr(self, name), tag)
+
     def perform(self, *args, **kwargs):
         """Method called by the parent perform method.
 
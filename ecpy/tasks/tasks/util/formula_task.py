@@ -45,6 +45,24 @@ class FormulaTask(SimpleTask):
             value = self.format_and_eval_string(v)
             self.write_in_database(k, value)
 
+    def perform_batch(self, values=None):
+        """Evaluate all formulas for a block of loop points.
+
+        In batch mode the loop entries hold arrays, so formulas relying on
+        numpy compatible operations are evaluated for all points at once.
+
+        """
+        self.perform()
+
+    def prepare(self):
+        """Compile the formulas ahead of time.
+
+        """
+        super(FormulaTask, self).prepare()
+        if self.database.running:
+            for formula in self.formulas.values():
+                self.compile_string(formula)
+
     def check(self, *args, **kwargs):
         """Validate that all formulas can be evaluated.
 
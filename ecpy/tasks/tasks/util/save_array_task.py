@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Task saving values into a binary array file.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import os
+from numbers import Integral
+from collections import OrderedDict
+from traceback import format_exc
+
+import numpy as np
+from atom.api import (Unicode, Int, Typed, List, set_default)
+
+from ....utils.atom_util import (ordered_dict_from_pref, ordered_dict_to_pref)
+from ....utils.npy_writer import NpyArrayWriter
+
+from ..base_tasks import SimpleTask
+
+
+class SaveArrayTask(SimpleTask):
+    """Save values in a .npy file each time the task is performed. Loopable.
+
+    The values are stored as a structured array whose fields are the names of
+    the saved values. The file is created the first time the task is
+    performed and preallocated for the number of points of the enclosing
+    loops. It is closed when the resources of the root task are released.
+
+    The type and shape of each field are determined from the first value.
+    Boolean, integer and float values are saved as float64 and complex ones as
+    complex128, so that the kind of a numeric value can change from one point
+    to the next. A value which cannot be safely cast to its field or whose
+    shape changes leads to an error.
+
+    """
+    #: Class attribute marking this task as being logical, used in filtering.
+    util_task = True
+
+    #: Folder in which to save the file.
+    folder = Unicode('{default_path}').tag(pref=True, fmt=True)
+
+    #: Name of the file (the .npy extension is added if missing).
+    filename = Unicode().tag(pref=True, fmt=True)
+
+    #: Values to save, as a mapping between field names and formulas.
+    #: To modify it (add/remove entry) the dictionary must be copied, modified
+    #: and then reassigned.
+    saved_values = Typed(OrderedDict, ()).tag(pref=[ordered_dict_to_pref,
+                                                    ordered_dict_from_pref])
+
+    #: Number of points for which to preallocate the file. If empty the
+    #: product of the number of points of the enclosing loops is used.
+    array_size = Unicode().tag(pref=True)
+
+    #: Number of points to accumulate in memory before writing them.
+    chunk_size = Int(1000).tag(pref=True)
+
+    loopable = True
+    database_entries = set_default({'file': ''})
+
+    wait = set_default({'activated': True})  # Wait on all pools by default.
+
+    def check(self, *args, **kwargs):
+        """Check that the folder exists and that the values can be saved.
+
+        """
+        test, traceback = super(SaveArrayTask, self).check(*args, **kwargs)
+        err_path = self.get_error_path()
+        if not test:
+            return test, traceback
+
+        folder = self.format_string(self.folder)
+        if not os.path.isdir(folder):
+            test = False
+            traceback[err_path + '-folder'] = \
+                'Folder {} does not exist.'.format(folder)
+        if not self.filename:
+            test = False
+            traceback[err_path + '-filename'] = 'No file name was specified.'
+        if not self.saved_values:
+            test = False
+            traceback[err_path] = 'No value to save was specified.'
+
+        if self.array_size:
+            try:
+                int(self.format_and_eval_string(self.array_size))
+            except Exception:
+                test = False
+                traceback[err_path + '-array_size'] = \
+                    'Failed to eval the array size : ' + format_exc()
+
+        for k, v in self.saved_values.items():
+            try:
+                value = np.asarray(self.format_and_eval_string(v))
+            except Exception:
+                test = False
+                traceback[err_path + '-' + k] = \
+                    "Failed to eval the value {}: {}".format(k, format_exc())
+                continue
+            if value.dtype.hasobject:
+                test = False
+                traceback[err_path + '-' + k] = \
+                    'The value {} cannot be stored in an array.'.format(k)
+
+        return test, traceback
+
+    def prepare(self):
+        """Compile the saved values ahead of time.
+
+        """
+        super(SaveArrayTask, self).prepare()
+        self._writer = None
+        self._evaluators = []
+        if self.database.running:
+            self._evaluators = [self.compile_string(formula)
+                                for formula in self.saved_values.values()]
+
+    def perform(self):
+        """Evaluate the values and add them to the file.
+
+        """
+        values = tuple(evaluate() for evaluate in self._get_evaluators())
+        writer = self._writer
+        if writer is None or writer.closed:
+            writer = self._open_writer([(np.asarray(v), False)
+                                        for v in values])
+        self._check_values(values)
+        writer.append(values)
+
+    def perform_batch(self, values=None):
+        """Evaluate the values for a block of loop points and add them to the
+        file at once.
+
+        """
+        if values is None:
+            self.perform()
+            return
+
+        length = len(values)
+        columns = [np.asarray(evaluate())
+                   for evaluate in self._get_evaluators()]
+        writer = self._writer
+        if writer is None or writer.closed:
+            writer = self._open_writer([(c, c.shape[:1] == (length,))
+                                        for c in columns])
+        self._check_values(columns, length)
+        writer.extend(columns, length)
+
+    # =========================================================================
+    # --- Private API ---------------------------------------------------------
+    # =========================================================================
+
+    #: Writer used to save the values during a measure.
+    _writer = Typed(NpyArrayWriter)
+
+    #: Functions evaluating the saved values.
+    _evaluators = List()
+
+    #: Name, data type and shape of the fields of the file.
+    _fields = List()
+
+    def _get_evaluators(self):
+        """Get the functions evaluating the saved values.
+
+        """
+        if not self._evaluators:
+            self._evaluators = [self._make_evaluator(v)
+                                for v in self.saved_values.values()]
+        return self._evaluators
+
+    def _make_evaluator(self, formula):
+        """Build a function evaluating a formula at each call.
+
+        """
+        return lambda: self.format_and_eval_string(formula)
+
+    def _open_writer(self, samples):
+        """Create the file and register its writer in the files resource.
+
+        Parameters
+        ----------
+        samples : list(tuple)
+            Pairs of value and boolean indicating whether the first dimension
+            of the value corresponds to the points of a block.
+
+        """
+        fields = []
+        for name, (value, block) in zip(self.saved_values, samples):
+            dtype = value.dtype
+            if dtype.kind in 'biuf':
+                dtype = np.dtype('float64')
+            elif dtype.kind == 'c':
+                dtype = np.dtype('complex128')
+            fields.append((str(name), dtype,
+                           value.shape[1:] if block else value.shape))
+
+        filename = self.format_string(self.filename)
+        if not filename.endswith('.npy'):
+            filename += '.npy'
+        path = os.path.join(self.format_string(self.folder), filename)
+
+        files = self.root.resources['files']
+        used = files.get(path)
+        if used is not None and used is not self._writer and not used.closed:
+            msg = 'Cannot save into {} which is already used by another task.'
+            raise RuntimeError(msg.format(path))
+        writer = NpyArrayWriter(path, fields,
+                                expected=self._expected_points(),
+                                chunk_size=self.chunk_size)
+        files[path] = writer
+        self._writer = writer
+        self._fields = fields
+        self.write_in_database('file', path)
+        return writer
+
+    def _check_values(self, values, length=None):
+        """Check that the values can be stored in the fields of the file.
+
+        Parameters
+        ----------
+        values : iterable
+            Values to store in each field.
+
+        length : int, optional
+            Number of points of the block when the values are given for a
+            block of points, in which case a value can either be an array
+            whose first dimension is the number of points or a value shared
+            by all points.
+
+        """
+        for (name, dtype, shape), value in zip(self._fields, values):
+            value = np.asarray(value)
+            if not np.can_cast(value.dtype, dtype):
+                msg = ('The value {} of type {} cannot be saved in a field of '
+                       'type {} (determined from its first value).')
+                raise ValueError(msg.format(name, value.dtype, dtype))
+            if value.shape != shape and (length is None or
+                                         value.shape != (length,) + shape):
+                msg = 'The shape of the value {} changed from {} to {}.'
+                raise ValueError(msg.format(name, shape, value.shape))
+
+    def _expected_points(self):
+        """Determine the number of points for which to preallocate the file.
+
+        """
+        if self.array_size:
+            return int(self.format_and_eval_string(self.array_size))
+
+        points = 1
+        parent = self.parent
+        while parent is not None and parent is not self.root:
+            if 'point_number' in parent.database_entries:
+                entry = parent.name + '_point_number'
+                number = parent.get_from_database(entry)
+                if not isinstance(number, Integral) or number < 0:
+                    return 0
+                points *= number
+            parent = parent.parent
+        return points
@@ -6,13 +6,16 @@
 #
 # The full license is in the file LICENCE, distributed with this software.
 # -----------------------------------------------------------------------------
-"""Thread safe bit flag with convenient interface.
+"""Thread (and process) safe bit flags with convenient interface.
 
 """
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
+from time import time
 from threading import Event, RLock
+from multiprocessing import Condition
+from multiprocessing.sharedctypes import RawValue
 
 
 class BitFlag(object):
@@ -104,3 +107,195 @@ class BitFlag(object):
                 res &= e.wait(timeout)
 
         return res
+
+
+class SharedBitFlag(object):
+    """Bit flag whose state is shared between processes.
+
+    The state is stored in a shared memory word so that testing flags is a
+    single memory read. Modifications are protected by a multiprocessing
+    condition which is used to wake up the threads and processes waiting for
+    a change. The flag should be passed to the processes using it when they
+    are created.
+
+    Parameters
+    ----------
+    flags : iterable[unicode]
+        Name of the flags that this flag understand.
+
+    """
+
+    __slots__ = ('flags', '_flags', '_state', '_condition')
+
+    def __init__(self, flags):
+        self.flags = tuple(flags)
+        self._flags = {f: 2**i for i, f in enumerate(self.flags)}
+        self._state = RawValue('l', 0)
+        self._condition = Condition()
+
+    def set(self, *flags):
+        """Set specified flags and notify the waiters.
+
+        """
+        mask = self._mask(flags)
+        with self._condition:
+            self._state.value |= mask
+            self._condition.notify_all()
+
+    def clear(self, *flags):
+        """Clear the specified flags (all flags if none is specified) and
+        notify the waiters.
+
+        """
+        mask = self._mask(flags if flags else self.flags)
+        with self._condition:
+            self._state.value &= ~mask
+            self._condition.notify_all()
+
+    def test(self, *flags):
+        """Test if all specified flags are set.
+
+        """
+        mask = self._mask(flags)
+        return self._state.value & mask == mask
+
+    def test_any(self, *flags):
+        """Test if any of the specified flags is set.
+
+        """
+        return bool(self._state.value & self._mask(flags))
+
+    def any_tester(self, *flags):
+        """Build a function testing if any of the specified flags is set.
+
+        The returned function performs a single read of the shared state.
+
+        """
+        state = self._state
+        mask = self._mask(flags)
+        return lambda: state.value & mask
+
+    def wait_for(self, predicate, timeout=None):
+        """Wait till a predicate on the flag becomes true.
+
+        Parameters
+        ----------
+        predicate : callable
+            Function taking no argument, evaluated each time the state
+            changes.
+
+        timeout : float|None
+            Maximum time to wait. If None waits forever.
+
+        Returns
+        -------
+        result : bool
+            Last value of the predicate.
+
+        """
+        condition = self._condition
+        with condition:
+            res = predicate()
+            if timeout is not None:
+                end = time() + timeout
+            while not res:
+                if timeout is None:
+                    condition.wait()
+                else:
+                    remaining = end - time()
+                    if remaining <= 0:
+                        break
+                    condition.wait(remaining)
+                res = predicate()
+
+        return bool(res)
+
+    def wait(self, timeout, *flags):
+        """Wait till some flags are set.
+
+        Parameters
+        ----------
+        timeout : float|None
+            Maximum time to wait. If None waits forever.
+
+        flags : iterable[unicode]
+            Flags upon which to wait.
+
+        Returns
+        -------
+        result : bool
+            False if the method returned because of the timeout.
+
+        """
+        return self.wait_for(lambda: self.test(*flags), timeout)
+
+    def event(self, flag):
+        """Build an object mimicking an Event API for a single flag.
+
+        """
+        return SharedFlagEvent(self, flag)
+
+    def _mask(self, flags):
+        """Compute the mask corresponding to some flags.
+
+        """
+        mask = 0
+        for f in flags:
+            mask |= self._flags[f]
+        return mask
+
+    def __getstate__(self):
+        return (self.flags, self._flags, self._state, self._condition)
+
+    def __setstate__(self, state):
+        self.flags, self._flags, self._state, self._condition = state
+
+
+class SharedFlagEvent(object):
+    """Event like view on a single flag of a SharedBitFlag.
+
+    Parameters
+    ----------
+    shared_flag : SharedBitFlag
+        Flag holding the state.
+
+    flag : unicode
+        Name of the flag this object reflects.
+
+    """
+
+    __slots__ = ('shared_flag', 'flag')
+
+    def __init__(self, shared_flag, flag):
+        self.shared_flag = shared_flag
+        self.flag = flag
+
+    def is_set(self):
+        """Check whether the flag is set.
+
+        """
+        return self.shared_flag.test(self.flag)
+
+    def set(self):
+        """Set the flag.
+
+        """
+        self.shared_flag.set(self.flag)
+
+    def clear(self):
+        """Clear the flag.
+
+        """
+        self.shared_flag.clear(self.flag)
+
+    def wait(self, timeout=None):
+        """Wait for the flag to be set.
+
+        """
+        return self.shared_flag.wait(timeout, self.flag)
+
+    def __getstate__(self):
+        return (self.shared_flag, self.flag)
+
+    def __setstate__(self, state):
+        self.shared_flag, self.flag = state
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Writer streaming records into a .npy file.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import struct
+
+import numpy as np
+
+
+class NpyArrayWriter(object):
+    """Writer appending records to a .npy file by blocks.
+
+    The file is preallocated for the expected number of records and the
+    records are accumulated in memory before being written by chunks. The
+    header of the file, whose size does not depend on the number of records,
+    is updated when the writer is closed so that the file can be read using
+    numpy.load.
+
+    Parameters
+    ----------
+    path : unicode
+        Path of the file to create (any existing file is overwritten).
+
+    dtype : numpy.dtype
+        Data type of the records.
+
+    shape : tuple, optional
+        Shape of the records, the array stored in the file has a shape
+        (count,) + shape.
+
+    expected : int, optional
+        Number of records for which to preallocate the file.
+
+    chunk_size : int, optional
+        Number of records to accumulate before writing them in the file.
+
+    """
+
+    __slots__ = ('path', 'dtype', 'shape', 'count', '_file', '_buffer',
+                 '_buffered', '_header_size', '_record_size')
+
+    def __init__(self, path, dtype, shape=(), expected=0, chunk_size=1000):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.count = 0
+        self._buffer = np.empty((max(chunk_size, 1),) + self.shape,
+                                self.dtype)
+        self._record_size = self._buffer[0].nbytes
+        self._buffered = 0
+        # Leave room in the header for the largest possible record number.
+        size = len(self._format_header(2**64)) + 11
+        self._header_size = size + (-size % 64)
+        self._file = open(path, 'wb')
+        self._file.write(self._header(0))
+        if expected > 0:
+            self._file.truncate(self._header_size +
+                                expected*self._record_size)
+
+    @property
+    def closed(self):
+        """Whether the file has been closed.
+
+        """
+        return self._file.closed
+
+    def append(self, record):
+        """Append a single record.
+
+        For structured data types, the record is a tuple of field values.
+
+        """
+        self._buffer[self._buffered] = record
+        self._buffered += 1
+        self.count += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def extend(self, columns, length):
+        """Append a block of records given as a list of field values.
+
+        Each field value is either an array whose first dimension is the
+        number of records or a value shared by all records.
+
+        """
+        block = np.empty(length, self.dtype)
+        for name, column in zip(self.dtype.names, columns):
+            block[name] = column
+        self.write_block(block)
+
+    def write_block(self, block):
+        """Append a block of records given as an array.
+
+        The array is written without being buffered, it must have the data
+        type of the writer and a shape (length,) + shape.
+
+        """
+        self.flush()
+        self._file.write(np.ascontiguousarray(block, self.dtype).tobytes())
+        self.count += len(block)
+
+    def flush(self):
+        """Write the buffered records in the file.
+
+        """
+        if self._buffered:
+            self._file.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+
+    def close(self):
+        """Flush the records, strip the unused preallocated space and write
+        the final header.
+
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.truncate(self._header_size +
+                            self.count*self._record_size)
+        self._file.seek(0)
+        self._file.write(self._header(self.count))
+        self._file.close()
+
+    def _format_header(self, count):
+        """Format the dictionary describing the array.
+
+        """
+        descr = np.lib.format.dtype_to_descr(self.dtype)
+        return repr({'descr': descr, 'fortran_order': False,
+                     'shape': (count,) + self.shape}).encode('latin1')
+
+    def _header(self, count):
+        """Build the header of the file, padded to a constant size.
+
+        """
+        magic = np.lib.format.magic(1, 0)
+        header = self._format_header(count)
+        length = self._header_size - len(magic) - 2
+        return (magic + struct.pack(str('<H'), length) + header +
+                b' '*(length - len(header) - 1) + b'\n')
@@ -64,6 +64,15 @@ class PriorityHeap(object):
             self._counter = 0
         return obj
 
+    def peek(self):
+        """Get the task with the highest priority without removing it.
+
+        """
+        heap = self._heap
+        while heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+        return heap[0][2]
+
     def remove(self, obj):
         """Mark a task as being outdated.
 
@@ -72,3 +72,42 @@ def ids_to_unique_names(ids, name_formatter=basic_name_formatter,
         return OrderedDict(((names[i], ids_mapping[i]) for i in ids))
     else:
         return OrderedDict(((names[i], i) for i in ids))
+
+
+def sizes_to_str(sizes):
+    """Format a mapping between names and sizes as a human readable string.
+
+    Parameters
+    ----------
+    sizes : dict
+        Mapping between names (such as database entries paths) and integers.
+
+    Returns
+    -------
+    text : unicode
+        Comma separated 'name: size' pairs sorted by name.
+
+    """
+    return ', '.join('{}: {}'.format(k, v) for k, v in sorted(sizes.items()))
+
+
+def str_to_sizes(text):
+    """Parse a string built by sizes_to_str.
+
+    Raises
+    ------
+    ValueError :
+        Raised if the text is not made of 'name: size' pairs with positive
+        sizes.
+
+    """
+    sizes = {}
+    for pair in text.split(','):
+        if not pair.strip():
+            continue
+        name, sep, size = pair.rpartition(':')
+        name = name.strip()
+        if not sep or not name or int(size) <= 0:
+            raise ValueError('Invalid name size pair : {}'.format(pair))
+        sizes[name] = int(size)
+    return sizes
@@ -31,11 +31,13 @@ setup(
         'Programming Language :: Python :: 3.5',
         ],
     zip_safe=False,
-    packages=find_packages(exclude=['tests', 'tests.*']),
+    packages=find_packages(exclude=['tests', 'tests.*', 'benchmarks',
+                                    'benchmarks.*']),
     package_data={'': ['*.enaml']},
     requires=['future', 'pyqt4', 'atom', 'enaml', 'kiwisolver', 'configobj',
               'watchdog', 'setuptools', 'numpy'],
     install_requires=['setuptools', 'future', 'atom', 'enaml', 'kiwisolver',
                       'configobj', 'watchdog'],
-    entry_points={'gui_scripts': 'ecpy = ecpy.__main__:main'}
+    entry_points={'gui_scripts': 'ecpy = ecpy.__main__:main',
+                  'console_scripts': 'ecpy-run = ecpy.headless:main'}
 )
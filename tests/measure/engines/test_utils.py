@@ -12,11 +12,17 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from multiprocessing import Queue
+import os
+from multiprocessing import Queue, Process
+
+import numpy as np
 
 from ecpy.tasks.tasks.database import TaskDatabase
 from ecpy.measure.engines.api import BaseEngine
-from ecpy.measure.engines.utils import MeasureSpy, ThreadMeasureMonitor
+from ecpy.measure.engines.utils import (MeasureSpy, ThreadMeasureMonitor,
+                                        ThreadMirrorMonitor,
+                                        SharedDatabaseMirror,
+                                        MeasureRecorder)
 
 
 def test_spy():
@@ -25,17 +31,34 @@ def test_spy():
     """
     q = Queue()
     data = TaskDatabase()
+    data.set_value('root', 'test', 0)
+    data.set_value('root', 'test2', 0)
+    data.prepare_to_run()
     spy = MeasureSpy(queue=q, observed_database=data,
-                     observed_entries=('test',))
+                     observed_entries=('root/test',))
 
-    data.notifier(('test', 1))
-    assert q.get()
+    data.set_value('root', 'test', 1)
+    assert q.get() == ('root/test', 1)
 
-    data.notifier(('test2', 1))
+    data.set_value('root', 'test2', 1)
+    assert q.empty()
+
+    data.leave_running_mode()
+    data.notifications_window = 10
+    data.prepare_to_run()
+    data.set_value('root', 'test', 2)
+    data.set_value('root', 'test2', 2)
+    data.flush_notifications(stop=True)
+    assert q.get() == [('root/test', 2)]
+
+    data.set_value('root', 'test2', 1)
+    data.flush_notifications()
     assert q.empty()
 
     spy.close()
     assert q.get() == ('', '')
+    data.set_value('root', 'test', 3)
+    assert q.empty()
 
 
 def test_monitor_thread():
@@ -61,3 +84,203 @@ def test_monitor_thread():
     m.join()
 
     assert e.test == 'test'
+
+
+def publish_in_mirror(mirror, slot, value):
+    """Publish a value in a mirror (used in a subprocess).
+
+    """
+    mirror.publish(slot, value)
+
+
+def test_shared_database_mirror():
+    """Test writing and reading values from a shared memory mirror.
+
+    """
+    mirror = SharedDatabaseMirror(4)
+    assert mirror.read(0) == (0, None)
+    assert mirror.publish(0, 1.5)
+    assert mirror.publish(1, 2)
+    assert mirror.publish(2, True)
+    assert not mirror.publish(3, 'a')
+    assert not mirror.publish(3, 2**70)
+    assert mirror.read(0) == (2, 1.5)
+    assert mirror.read(1) == (2, 2) and type(mirror.read(1)[1]) is int
+    assert mirror.read(2) == (2, True)
+    assert list(mirror.versions()) == [2, 2, 2, 0]
+
+    # Simulate a write in progress.
+    mirror._get_views()[0][0] = 3
+    assert mirror.read(0) is None
+
+    # The memory is shared with the processes to which the mirror is passed.
+    p = Process(target=publish_in_mirror, args=(mirror, 1, 5))
+    p.start()
+    p.join()
+    assert mirror.read(1) == (4, 5)
+
+    mirror.clear()
+    assert list(mirror.versions()) == [0]*4
+
+
+def test_spy_with_mirror():
+    """Test that numeric values are sent through the mirror.
+
+    """
+    q = Queue()
+    mirror = SharedDatabaseMirror(1)
+    data = TaskDatabase()
+    data.set_value('root', 'test', 0)
+    data.set_value('root', 'test2', 0)
+    data.prepare_to_run()
+    spy = MeasureSpy(q, ('root/test', 'root/test2'), data, mirror,
+                     {'root/test': 0})
+
+    data.set_value('root', 'test', 1)
+    data.set_value('root', 'test', 'a')
+    data.set_value('root', 'test2', 2)
+    assert mirror.read(0) == (2, 1)
+    assert q.get() == ('root/test', 'a')
+    assert q.get() == ('root/test2', 2)
+
+    # Once an entry was sent through the queue the mirror is no longer used.
+    news = spy._publish([('root/test', 3), ('root/test2', 3)])
+    assert news == [('root/test', 3), ('root/test2', 3)]
+    assert mirror.read(0) == (2, 1)
+
+
+def test_mirror_monitor_thread():
+    """Test the thread sampling the mirror and sending news to the engine.
+
+    """
+    from atom.api import List
+
+    class E(BaseEngine):
+
+        news = List()
+
+        def _observe_progress(self, val):
+            self.news.append(val)
+
+    mirror = SharedDatabaseMirror(2)
+    e = E()
+    m = ThreadMirrorMonitor(e, mirror, {0: 'root/a', 1: 'root/b'}, 10)
+    m.start()
+    mirror.publish(1, 1.0)
+    mirror.publish(1, 2.0)
+    m.stop()
+    m.join()
+
+    assert e.news == [[('root/b', 2.0)]]
+
+
+def test_retiring_mirror_entries():
+    """Test that entries received through the queue are no longer sampled.
+
+    """
+    from atom.api import List
+
+    class E(BaseEngine):
+
+        news = List()
+
+        def _observe_progress(self, val):
+            self.news.append(val)
+
+    mirror = SharedDatabaseMirror(2)
+    e = E()
+    sampler = ThreadMirrorMonitor(e, mirror, {0: 'root/a', 1: 'root/b'}, 10)
+    q = Queue()
+    m = ThreadMeasureMonitor(e, q)
+    m.mirror_monitor = sampler
+    m.start()
+    mirror.publish(0, 1.0)
+    mirror.publish(1, 1.0)
+    q.put(('root/a', 'a'))
+    q.put((None, None))
+    m.join()
+
+    sampler.start()
+    sampler.stop()
+    sampler.join()
+    assert e.news == [('root/a', 'a'), [('root/b', 1.0)]]
+
+
+def test_recorder(tmpdir):
+    """Test recording all the values written in some entries.
+
+    """
+    path = str(tmpdir.join('test.npz'))
+    data = TaskDatabase()
+    for name in ('float', 'complex', 'array', 'text', 'mixed', 'unused'):
+        data.set_value('root', name, 0)
+    recorder = MeasureRecorder(path, ['root/float', 'root/complex',
+                                      'root/array', 'root/text', 'root/mixed',
+                                      'root/unused'], data, chunk_size=2)
+    data.prepare_to_run()
+    for i in range(5):
+        data.set_value('root', 'float', i)
+        data.set_value('root', 'complex', 1j*i)
+        data.set_value('root', 'array', np.arange(3)*i)
+        data.set_value('root', 'text', 'a')
+        data.set_value('root', 'mixed', 'a' if i > 2 else i)
+    data.leave_running_mode()
+    data.set_value('root', 'float', 10)
+    issues = recorder.finalize()
+    assert sorted(issues) == ['root/mixed', 'root/text']
+    assert 'after 3 values' in issues['root/mixed']
+    assert recorder.finalize() == {}
+
+    assert os.listdir(str(tmpdir)) == ['test.npz']
+    with np.load(path) as f:
+        assert sorted(f.files) == ['root/array', 'root/complex',
+                                   'root/float', 'root/mixed']
+        assert f['root/float'].tolist() == list(range(5))
+        assert f['root/float'].dtype == np.int64
+        assert f['root/complex'].tolist() == [1j*i for i in range(5)]
+        assert f['root/array'].shape == (5, 3)
+        assert f['root/array'][-1].tolist() == [0, 4, 8]
+        assert f['root/mixed'].tolist() == [0, 1, 2]
+
+    data.prepare_to_run()
+    data.set_value('root', 'float', 10)
+    assert recorder._columns[0].writer.count == 5
+
+
+def test_recorder_promotion(tmpdir):
+    """Test that the recorded values are converted to wider kinds.
+
+    """
+    path = str(tmpdir.join('test.npz'))
+    data = TaskDatabase()
+    for name in ('scalar', 'large', 'array'):
+        data.set_value('root', name, 0)
+    recorder = MeasureRecorder(path, ['root/scalar', 'root/large',
+                                      'root/array'], data, chunk_size=2)
+    data.prepare_to_run()
+    for value in (2**40 + 1, True, 3, 0.5, 1j):
+        data.set_value('root', 'scalar', value)
+    for value in (1, 2**64):
+        data.set_value('root', 'large', value)
+    for value in (np.arange(2), np.ones(2), np.ones(2)*1j):
+        data.set_value('root', 'array', value)
+    data.leave_running_mode()
+    assert recorder.finalize() == {}
+
+    with np.load(path) as f:
+        assert f['root/scalar'].dtype == np.complex128
+        assert f['root/scalar'].tolist() == [2**40 + 1, 1, 3, 0.5, 1j]
+        assert f['root/large'].tolist() == [1, 2**64]
+        assert f['root/array'].tolist() == [[0, 1], [1, 1], [1j, 1j]]
+
+
+def test_recorder_no_value(tmpdir):
+    """Test that no file is created if no value was recorded.
+
+    """
+    data = TaskDatabase()
+    data.set_value('root', 'test', 0)
+    recorder = MeasureRecorder(str(tmpdir.join('test.npz')), ['root/test'],
+                               data)
+    recorder.finalize()
+    assert not os.listdir(str(tmpdir))
@@ -76,6 +76,26 @@ def test_creating_tools(measure_workbench):
         plugin.create('monitor', '')
 
 
+def test_engines_preferences(measure_workbench):
+    """Test saving the preferences of an engine and using them on creation.
+
+    """
+    plugin = measure_workbench.get_plugin('ecpy.measure')
+
+    engine = plugin.create('engine', 'ecpy.process_engine')
+    engine.shared_memory_monitoring = True
+    engine.mirror_size = 12
+    plugin.save_engine_preferences(engine)
+
+    new = plugin.create('engine', 'ecpy.process_engine', default=False)
+    assert new.shared_memory_monitoring
+    assert new.mirror_size == 12
+
+    default = plugin.create('engine', 'ecpy.process_engine')
+    assert not default.shared_memory_monitoring
+    assert default.mirror_size == 256
+
+
 def test_selecting_engine(measure_workbench):
     """Test selecting and unselecting an engine.
 
@@ -146,3 +166,6 @@ def test_find_next_measure(measure_workbench):
 
     m1.status = 'COMPLETED'
     assert plugin.find_next_measure() is m2
+
+    m3.priority = 1
+    assert plugin.find_next_measure() is m3
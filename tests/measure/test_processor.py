@@ -20,6 +20,7 @@ from future.builtins import str
 from threading import Thread
 
 from ecpy.measure.measure import Measure
+from ecpy.measure.processor import HeadlessMeasureProcessor
 from ecpy.tasks.api import RootTask
 
 from ecpy.testing.util import ErrorDialogException, process_app_events
@@ -664,3 +665,154 @@ def test_monitor_creation(processor, measure, dialog_sleep):
 
     processor.plugin.stop()
     assert not processor.monitors_window
+
+
+def create_concurrent_measures(processor, tmpdir, number=2):
+    """Enqueue measures which can be run concurrently without checks.
+
+    """
+    plugin = processor.plugin
+    plugin.max_concurrent_measures = number
+    measures = []
+    for i in range(number):
+        root = RootTask(default_path=str(tmpdir))
+        measure = Measure(plugin=plugin, root_task=root, name='Dummy',
+                          id='00%d' % i, forced_enqueued=True)
+        plugin.enqueued_measures.add(measure)
+        measures.append(measure)
+    return measures
+
+
+@pytest.mark.timeout(60)
+def test_running_measures_concurrently(processor, tmpdir):
+    """Test running two measures simultaneously on separate engines.
+
+    """
+    measures = create_concurrent_measures(processor, tmpdir)
+    processor.start_measure(measures[0])
+
+    def wait_for_workers(timeout):
+        sleep(timeout)
+        return len(processor._running_workers) == 2
+    wait_and_process(wait_for_workers)
+
+    workers = list(processor._running_workers.values())
+    assert workers[0].engine is not workers[1].engine
+    for worker in workers:
+        assert worker.engine.waiting.wait(10)
+    for measure in measures:
+        assert measure.status == 'RUNNING'
+
+    for worker in workers:
+        worker.engine.go_on.set()
+
+    processor._thread.join()
+    process_app_events()
+    for measure in measures:
+        assert measure.status == 'COMPLETED'
+    assert len(processor._idle_workers) == 2
+    assert not processor.running_measure
+    assert not processor.active
+
+
+@pytest.mark.timeout(60)
+def test_running_measures_concurrently_unavailable_runtimes(processor,
+                                                            tmpdir,
+                                                            monkeypatch):
+    """Test that a measure whose runtimes are in use waits for them.
+
+    """
+    measures = create_concurrent_measures(processor, tmpdir)
+    deps_cls = type(measures[1].dependencies)
+    collect = deps_cls.collect_runtimes
+    calls = []
+
+    def collect_runtimes(self):
+        if self.measure is measures[1] and not calls:
+            calls.append(True)
+            return False, 'Some dependencies are currently unavailable.', {}
+        return collect(self)
+
+    monkeypatch.setattr(deps_cls, 'collect_runtimes', collect_runtimes)
+    processor.start_measure(measures[0])
+
+    def wait_for_worker(timeout):
+        sleep(timeout)
+        return len(processor._running_workers) == 1 and calls
+    wait_and_process(wait_for_worker)
+
+    worker = list(processor._running_workers.values())[0]
+    assert worker.engine.waiting.wait(10)
+    assert measures[1].status == 'READY'
+    worker.engine.go_on.set()
+
+    def wait_for_second_measure(timeout):
+        sleep(timeout)
+        return measures[1] in processor._running_workers
+    wait_and_process(wait_for_second_measure)
+
+    worker = processor._running_workers[measures[1]]
+    assert worker.engine.waiting.wait(10)
+    worker.engine.go_on.set()
+
+    processor._thread.join()
+    process_app_events()
+    for measure in measures:
+        assert measure.status == 'COMPLETED'
+
+
+@pytest.fixture
+def headless_processor(measure_workbench, measure):
+    """Fixture creating a headless processor using the dummy engine.
+
+    """
+    measure_workbench.register(TasksManagerManifest())
+    plugin = measure_workbench.get_plugin('ecpy.measure')
+    plugin.selected_engine = 'dummy'
+    processor = HeadlessMeasureProcessor(plugin=plugin)
+    processor.engine = plugin.create('engine', 'dummy')
+    return processor
+
+
+@pytest.mark.timeout(60)
+def test_running_measure_headless(headless_processor, measure_with_tools):
+    """Test running a complete measure without event loop.
+
+    """
+    processor = headless_processor
+    measure = measure_with_tools
+    measure.pre_hooks['dummy'].go_on.set()
+    measure.post_hooks['dummy'].go_on.set()
+    processor.engine.go_on.set()
+
+    status, infos = processor.run_measure(measure)
+    assert status == 'COMPLETED'
+    assert measure.status == 'COMPLETED'
+    assert measure.task_execution_result
+    assert not measure.monitors['dummy'].received_news
+    assert not processor.running_measure
+    assert not processor.active
+    m = processor.plugin.workbench.get_manifest('test.measure')
+    assert not m.find('runtime_dummy1').collected
+
+
+@pytest.mark.timeout(60)
+def test_stopping_measure_headless(headless_processor, measure_with_tools):
+    """Test stopping a measure run without event loop from another thread.
+
+    """
+    processor = headless_processor
+    measure = measure_with_tools
+    measure.pre_hooks['dummy'].go_on.set()
+    measure.post_hooks['dummy'].go_on.set()
+
+    result = []
+    t = Thread(target=lambda: result.extend(processor.run_measure(measure)))
+    t.start()
+    assert processor.engine.waiting.wait(10)
+    processor.stop_measure()
+    processor.engine.go_on.set()
+    t.join()
+
+    assert result[0] == 'INTERRUPTED'
+    assert measure.status == 'INTERRUPTED'
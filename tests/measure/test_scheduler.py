@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test the scheduler ordering the enqueued measures.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import pytest
+from atom.api import Atom, Unicode, Enum, Int, Float, Dict
+
+from ecpy.measure.container import MeasureContainer
+from ecpy.measure.scheduler import MeasureScheduler
+
+
+class FalseMeasure(Atom):
+    """Object exposing the members of a measure used by the scheduler.
+
+    """
+    name = Unicode('M')
+
+    id = Unicode()
+
+    status = Enum('READY', 'RUNNING', 'EDITING', 'COMPLETED')
+
+    priority = Int()
+
+    estimated_duration = Float()
+
+
+class FalseInstrPlugin(Atom):
+    """Object exposing the profiles used by the instrument plugin.
+
+    """
+    used_profiles = Dict()
+
+
+class FalseWorkbench(object):
+    """Workbench giving access to the false instrument plugin.
+
+    """
+    def __init__(self):
+        self.plugin = FalseInstrPlugin()
+
+    def get_plugin(self, plugin_id, force_create=True):
+        assert plugin_id == 'ecpy.instruments'
+        return self.plugin
+
+
+@pytest.fixture
+def container():
+    cont = MeasureContainer()
+    for i in range(3):
+        cont.add(FalseMeasure(id='%d' % i))
+    return cont
+
+
+@pytest.fixture
+def scheduler(container):
+    sched = MeasureScheduler(container=container,
+                             workbench=FalseWorkbench())
+    sched.start()
+    return sched
+
+
+def ids(measures):
+    return [m.id for m in measures]
+
+
+def test_queue_order(scheduler, container):
+    """Test that by default the order of the queue is respected.
+
+    """
+    assert scheduler.next_measure() is container.measures[0]
+    assert ids(scheduler.list_measures()) == ['0', '1', '2']
+
+    container.add(FalseMeasure(id='3'))
+    container.move(3, 0)
+    assert scheduler.next_measure() is container.measures[0]
+    assert ids(scheduler.list_measures()) == ['3', '0', '1', '2']
+
+    container.remove(container.measures[0])
+    container.add(FalseMeasure(id='4'), 0)
+    assert ids(scheduler.list_measures()) == ['4', '0', '1', '2']
+
+
+def test_priority_and_duration(scheduler, container):
+    """Test that priority and estimated durations are taken into account.
+
+    """
+    m0, m1, m2 = container.measures
+    m2.priority = 1
+    assert scheduler.next_measure() is m2
+    m0.estimated_duration = 10
+    m1.estimated_duration = 1
+    assert ids(scheduler.list_measures()) == ['2', '1', '0']
+
+    m2.estimated_duration = 5
+    m2.priority = 0
+    assert ids(scheduler.list_measures()) == ['1', '2', '0']
+    assert scheduler.next_measure() is m1
+
+
+def test_status_changes(scheduler, container):
+    """Test that only READY measures are proposed.
+
+    """
+    m0, m1, m2 = container.measures
+    m0.status = 'EDITING'
+    assert scheduler.next_measure() is m1
+    m1.status = 'RUNNING'
+    m1.status = 'COMPLETED'
+    assert scheduler.next_measure() is m2
+    assert ids(scheduler.list_measures()) == ['2']
+
+    m0.status = 'READY'
+    assert scheduler.next_measure() is m0
+
+    m0.status = 'COMPLETED'
+    m2.status = 'COMPLETED'
+    assert scheduler.next_measure() is None
+
+
+def test_blocking_measures(scheduler, container):
+    """Test setting aside a measure whose runtimes are unavailable.
+
+    """
+    m0, m1, m2 = container.measures
+    scheduler.block(m0)
+    assert scheduler.next_measure() is m1
+    assert ids(scheduler.list_measures()) == ['1', '2', '0']
+    assert scheduler.has_runnable_measure()
+    assert not scheduler.has_runnable_measure((m1, m2))
+
+    # When only blocked measures remain the best one is proposed.
+    scheduler.block(m1)
+    m2.status = 'COMPLETED'
+    assert scheduler.next_measure() is m0
+
+    scheduler.reevaluate()
+    assert ids(scheduler.list_measures()) == ['0', '1']
+
+
+def test_reevaluating_on_profiles_release(scheduler, container):
+    """Test that blocked measures are reconsidered when profiles are released.
+
+    """
+    m0 = container.measures[0]
+    instr_plugin = scheduler.workbench.plugin
+    instr_plugin.used_profiles = {'p1': 'ecpy.measure'}
+    scheduler.block(m0)
+
+    instr_plugin.used_profiles = {'p1': 'ecpy.measure', 'p2': 'ecpy.measure'}
+    assert scheduler.next_measure() is container.measures[1]
+
+    instr_plugin.used_profiles = {'p2': 'ecpy.measure'}
+    assert scheduler.next_measure() is m0
+
+
+def test_stop(scheduler, container):
+    """Test that stopping the scheduler removes all observers.
+
+    """
+    m0 = container.measures[0]
+    scheduler.block(m0)
+    scheduler.stop()
+    assert scheduler.next_measure() is None
+    container.add(FalseMeasure(id='3'))
+    m0.priority = 2
+    assert scheduler.next_measure() is None
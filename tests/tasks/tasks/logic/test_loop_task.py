@@ -14,16 +14,19 @@ from __future__ import (division, unicode_literals, print_function,
 
 import pytest
 import enaml
+import numpy as np
 from multiprocessing import Event
+from collections import OrderedDict
 
 from ecpy.testing.tasks.util import CheckTask
 from ecpy.testing.util import show_and_close_widget
 from ecpy.tasks.api import RootTask
 from ecpy.tasks.tasks.logic.loop_task import LoopTask
+from ecpy.tasks.tasks.util.formula_task import FormulaTask
 from ecpy.tasks.tasks.logic.loop_iterable_interface\
     import IterableLoopInterface
 from ecpy.tasks.tasks.logic.loop_linspace_interface\
-    import LinspaceLoopInterface
+    import LinspaceLoopInterface, LinearProgression
 from ecpy.tasks.tasks.logic.loop_exceptions_tasks\
     import BreakTask, ContinueTask
 
@@ -57,6 +60,27 @@ def iterable_interface(request):
     return interface
 
 
+def test_linear_progression():
+    """Test that the lazy linspace matches numpy.linspace.
+
+    """
+    progression = LinearProgression(1, 2, 11)
+    reference = np.linspace(1, 2, 11)
+    assert len(progression) == 11
+    assert progression[-1] == 2.0
+    assert progression[3] == reference[3]
+    np.testing.assert_array_equal(list(progression), reference)
+    np.testing.assert_array_equal(progression[2::3], reference[2::3])
+    np.testing.assert_array_equal(np.asarray(progression), reference)
+    with pytest.raises(IndexError):
+        progression[11]
+
+    assert list(LinearProgression(1, 2, 1)) == [1.0]
+    assert list(LinearProgression(1, 2, 0)) == []
+    with pytest.raises(ValueError):
+        LinearProgression(1, 2, -1)
+
+
 class TestLoopTask(object):
     """Test Loop task with and without included child.
 
@@ -285,6 +309,39 @@ class TestLoopTask(object):
         assert len(traceback) == 1
         assert 'root/Test' in traceback
 
+    def test_check_iterable_interface4(self, iterable_interface):
+        """Test checking a lazy iterable with and without a length.
+
+        """
+        iterable_interface.iterable = '(i for i in range(5))'
+        self.task.interface = iterable_interface
+
+        test, traceback = self.task.check()
+        assert test
+        assert self.task.get_from_database('Test_point_number') == 0
+
+        progress = []
+
+        def record(task, value):
+            progress.append(task.get_from_database('Test_index') /
+                            task.get_from_database('Test_point_number'))
+
+        self.task.add_child_task(0, CheckTask(name='check', custom=record))
+        iterable_interface.length = '2 + 3'
+        test, traceback = self.task.check()
+        assert test
+        assert self.task.get_from_database('Test_point_number') == 5
+
+        self.root.prepare()
+        self.task.perform()
+        assert progress == [0.2, 0.4, 0.6, 0.8, 1.0]
+        self.root.leave_running_mode()
+
+        iterable_interface.length = '*2'
+        test, traceback = self.task.check()
+        assert not test
+        assert 'root/Test-length' in traceback
+
     def test_check_execution_order(self, iterable_interface):
         """Test that the interface checks are run before the children checks.
 
@@ -309,6 +366,19 @@ class TestLoopTask(object):
         self.task.perform()
         assert self.root.get_from_database('Test_value') == 10
 
+    def test_perform_lazy(self, iterable_interface):
+        """Test performing a loop on a generator.
+
+        """
+        iterable_interface.iterable = '(i for i in range(11))'
+        iterable_interface.length = '11'
+        self.task.interface = iterable_interface
+        self.root.prepare()
+
+        self.task.perform()
+        assert self.root.get_from_database('Test_value') == 10
+        assert self.root.get_from_database('Test_point_number') == 11
+
     def test_perform2(self, linspace_interface):
         """Test performing a simple loop no timing. Linspace interface.
 
@@ -319,6 +389,34 @@ class TestLoopTask(object):
         self.task.perform()
         assert self.root.get_from_database('Test_value') == 2.0
 
+    def test_perform_linspace_cache(self, linspace_interface):
+        """Test that literal linspace parameters are evaluated only once.
+
+        """
+        linspace_interface.stop = '{Test_index} + 1.0'
+        linspace_interface.step = 'abs(-0.1)'
+        self.task.interface = linspace_interface
+        self.root.prepare()
+        assert linspace_interface._cache == {'start': 1.0}
+
+        self.task.perform()
+        assert self.root.get_from_database('Test_value') == 2.0
+        assert 'linspace' not in linspace_interface._cache
+
+        linspace_interface.stop = '2.0'
+        linspace_interface.step = ' 0.1'
+        linspace_interface.prepare()
+        assert linspace_interface._cache == {'start': 1.0, 'stop': 2.0,
+                                             'step': 0.1}
+
+        self.task.perform()
+        linspace = linspace_interface._cache['linspace']
+        assert isinstance(linspace, LinearProgression)
+
+        self.task.perform()
+        assert self.root.get_from_database('Test_value') == 2.0
+        assert linspace_interface._cache['linspace'] is linspace
+
     def test_perform3(self, iterable_interface):
         """Test performing a simple loop no timing. Break.
 
@@ -407,6 +505,68 @@ class TestLoopTask(object):
         assert self.root.get_from_database('Test_value') == 10
         assert self.root.get_from_database('Test_elapsed_time') != 1.0
 
+    def test_perform_batch1(self, iterable_interface):
+        """Test performing a loop by blocks of points.
+
+        """
+        self.task.interface = iterable_interface
+        self.task.batch_size = 4
+        self.task.timing = True
+        formula = FormulaTask(name='formula',
+                              formulas=OrderedDict([('sq',
+                                                     '{Test_value}**2')]))
+        self.task.add_child_task(0, formula)
+        self.root.prepare()
+
+        self.task.perform()
+        assert self.root.get_from_database('Test_index') == 11
+        assert self.root.get_from_database('Test_value') == 10
+        assert formula.get_from_database('formula_sq') == 100
+        assert np.isscalar(formula.get_from_database('formula_sq'))
+        assert np.isscalar(self.root.get_from_database('Test_elapsed_time'))
+
+    def test_perform_batch_last_point(self, iterable_interface):
+        """Test that a task following a batched loop reads the scalar value
+        computed for the last point.
+
+        """
+        self.task.interface = iterable_interface
+        self.task.batch_size = 4
+        formula = FormulaTask(name='formula',
+                              formulas=OrderedDict([('sq',
+                                                     '{Test_value}**2')]),
+                              access_exs={'sq': 1})
+        self.task.add_child_task(0, formula)
+        after = FormulaTask(name='after',
+                            formulas=OrderedDict([('res',
+                                                   '{formula_sq} + 1')]))
+        self.root.add_child_task(1, after)
+        self.root.prepare()
+
+        self.task.perform()
+        after.perform()
+        assert after.get_from_database('after_res') == 101
+        assert not isinstance(after.get_from_database('after_res'),
+                              np.ndarray)
+
+    def test_perform_batch2(self, iterable_interface):
+        """Test that the loop is performed point by point if a child cannot
+        handle blocks.
+
+        """
+        self.task.interface = iterable_interface
+        self.task.batch_size = 4
+        formula = FormulaTask(name='formula',
+                              formulas=OrderedDict([('sq',
+                                                     '{Test_value}**2')]))
+        self.task.add_child_task(0, formula)
+        self.task.add_child_task(1, CheckTask(name='check'))
+        self.root.prepare()
+
+        self.task.perform()
+        assert self.task.children[1].perform_called == 11
+        assert formula.get_from_database('formula_sq') == 100
+
     def test_perform_timing2(self, iterable_interface):
         """Test performing a simple loop timing. Break.
 
@@ -13,6 +13,7 @@ from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
 import pytest
+from multiprocessing import Event
 from atom.api import Value, List
 from ecpy.tasks.tasks.base_tasks import RootTask, SimpleTask, ComplexTask
 
@@ -61,6 +62,49 @@ def test_database_operation():
         root.get_from_database('test')
 
 
+def test_database_operation_running():
+    """Test setting and getting values through the handle built at prepare.
+
+    """
+    root = RootTask(should_stop=Event(), should_pause=Event())
+    task = SimpleTask(name='task', database_entries={'val': 1})
+    root.add_child_task(0, task)
+    root.prepare()
+    assert task._entry_slots
+
+    notifications = []
+    root.database.observe('notifier', lambda n: notifications.append(n))
+    assert not task.write_in_database('val', 2)
+    assert task.get_from_database('task_val') == 2
+    assert root.get_from_database('task_val') == 2
+    assert task.get_from_database('default_path') == ''
+    assert notifications == [('added', 'root/task_val', 2)]
+
+    with pytest.raises(KeyError):
+        task.get_from_database('task_val2')
+
+
+def test_leaving_running_mode():
+    """Test going back to edition mode after preparing the tasks.
+
+    """
+    root = RootTask(should_stop=Event(), should_pause=Event())
+    task = SimpleTask(name='task', database_entries={'val': 1})
+    root.add_child_task(0, task)
+    root.prepare()
+    task.write_in_database('val', 2)
+    assert task.format_string('{task_val}') == '2'
+
+    root.leave_running_mode()
+    assert not root.database.running
+    assert not task._entry_slots and not task._format_cache
+    task.write_in_database('val', 3)
+    assert task.format_string('{task_val}') == '3'
+
+    root.prepare()
+    assert task.get_from_database('task_val') == 3
+
+
 def test_database_update():
     """Test that replacing the database_entries members refreshes the database.
 
@@ -14,7 +14,8 @@ from __future__ import (division, unicode_literals, print_function,
 
 from pytest import raises
 
-from ecpy.tasks.tasks.database import TaskDatabase
+import numpy as np
+from ecpy.tasks.tasks.database import TaskDatabase, EntryHistory
 
 # TODO add tests checking that the notifiers did run properly
 # =============================================================================
@@ -214,6 +215,60 @@ def test_list_nodes():
     assert 'root/node2' in nodes
 
 
+def test_nodes_registry():
+    """Test that nodes are reachable by path after being moved around.
+
+    """
+    database = TaskDatabase()
+    database.create_node('root', 'node1')
+    database.create_node('root/node1', 'node2')
+    database.set_value('root/node1/node2', 'val1', 1)
+
+    database.rename_node('root', 'node1', 'n1')
+    assert database.get_value('root/n1/node2', 'val1') == 1
+    assert sorted(database.list_nodes()) == ['root', 'root/n1',
+                                             'root/n1/node2']
+    with raises(KeyError):
+        database.go_to_path('root/node1/node2')
+
+    database.delete_node('root', 'n1')
+    assert list(database.list_nodes()) == ['root']
+    assert database.list_all_entries() == []
+
+
+def test_accessible_entries_cache():
+    """Test that the listing of accessible entries follows the database.
+
+    """
+    database = TaskDatabase()
+    database.create_node('root', 'node1')
+    database.create_node('root/node1', 'node2')
+    assert database.list_accessible_entries('root/node1/node2') == []
+
+    database.set_value('root', 'val1', 1)
+    database.set_value('root/node1/node2', 'val2', 1)
+    assert database.list_accessible_entries('root/node1/node2') ==\
+        ['val1', 'val2']
+    assert database.list_accessible_entries('root/node1') == ['val1']
+
+    database.add_access_exception('root/node1', 'root/node1/node2', 'val2')
+    assert database.list_accessible_entries('root/node1') == ['val1', 'val2']
+
+    database.rename_values('root/node1/node2', ['val2'], ['val3'],
+                           {'val2': 1})
+    assert database.list_accessible_entries('root/node1') == ['val1', 'val3']
+    assert database.list_accessible_entries('root/node1/node2') ==\
+        ['val1', 'val3']
+
+    database.remove_access_exception('root/node1', 'val3')
+    database.delete_value('root', 'val1')
+    assert database.list_accessible_entries('root/node1') == []
+    assert database.list_accessible_entries('root/node1/node2') == ['val3']
+
+    database.rename_node('root/node1', 'node2', 'n2')
+    assert database.list_accessible_entries('root/node1/n2') == ['val3']
+
+
 # =============================================================================
 # --- Running mode tests ------------------------------------------------------
 # =============================================================================
@@ -358,3 +413,241 @@ def test_get_set_on_flat_database3():
 
     assert not database.set_value('root/node1', 'val2', 2)
     assert database.get_value('root/node1', 'val2') == 2
+
+
+def test_database_handle():
+    """Test accessing entries through a handle resolved ahead of time.
+
+    """
+    database = TaskDatabase()
+    database.set_value('root', 'val1', 1)
+    database.create_node('root', 'node1')
+    database.set_value('root/node1', 'val2', 'a')
+    database.prepare_to_run()
+
+    handle = database.create_handle('root/node1', {'v': 'val2'})
+    slot = handle.slots['v']
+    assert handle.get(slot) == 'a'
+
+    notifications = []
+    database.observe('notifier', lambda n: notifications.append(n))
+    handle.set(slot, 'b')
+    assert database.get_value('root/node1', 'val2') == 'b'
+    assert notifications == [('added', 'root/node1/val2', 'b')]
+
+    # Entries not declared are resolved on first access.
+    slot = handle.slot('val1')
+    assert handle.slot('val1') == slot
+    assert handle.get(slot) == 1
+    with raises(KeyError):
+        handle.slot('val3')
+
+
+def test_leaving_running_mode():
+    """Test going back to edition mode and reusing the layout.
+
+    """
+    database = TaskDatabase()
+    database.set_value('root', 'val1', 1)
+    database.create_node('root', 'node1')
+    database.set_value('root/node1', 'val2', 'a')
+    database.add_access_exception('root', 'root/node1', 'val2')
+
+    database.prepare_to_run()
+    layout = database._layout
+    database.set_value('root/node1', 'val2', 'b')
+    database.leave_running_mode()
+    assert not database.running
+    assert database.get_value('root', 'val2') == 'b'
+
+    # Unchanged structure : the layout is reused.
+    database.set_value('root', 'val1', 2)
+    database.prepare_to_run()
+    assert database._layout is layout
+    assert database.get_value('root', 'val1') == 2
+
+    # Modified structure : a new layout is built.
+    database.leave_running_mode()
+    database.set_value('root', 'val3', 3)
+    database.prepare_to_run()
+    assert database._layout is not layout
+    assert database.get_value('root/node1', 'val3') == 3
+
+    # Identical structure in another database : the layout is shared.
+    other = TaskDatabase()
+    other.set_value('root', 'val1', 1)
+    other.create_node('root', 'node1')
+    other.set_value('root/node1', 'val2', 'a')
+    other.add_access_exception('root', 'root/node1', 'val2')
+    other.prepare_to_run()
+    assert other._layout is layout
+    assert other.get_value('root', 'val2') == 'a'
+
+    # Same structure built in another order : the layout is shared.
+    rebuilt = TaskDatabase()
+    rebuilt.create_node('root', 'node1')
+    rebuilt.set_value('root/node1', 'val2', 'c')
+    rebuilt.set_value('root', 'val1', 1)
+    rebuilt.add_access_exception('root', 'root/node1', 'val2')
+    rebuilt.prepare_to_run()
+    assert rebuilt._layout is layout
+    assert rebuilt.get_value('root', 'val2') == 'c'
+
+
+def test_subscriptions():
+    """Test that only the subscribed entries are notified to a subscriber.
+
+    """
+    database = TaskDatabase()
+    database.set_value('root', 'val1', 1)
+    database.create_node('root', 'node1')
+    database.set_value('root/node1', 'val2', 'a')
+    database.add_access_exception('root', 'root/node1', 'val2')
+
+    news = []
+    database.subscribe(['root/node1/val2', 'root/val3'], news.append)
+    database.set_value('root', 'val3', 1)
+    assert news == [('root/val3', 1)]
+
+    database.prepare_to_run()
+    del news[:]
+    database.set_value('root', 'val1', 2)
+    database.set_value('root', 'val2', 'b')
+    assert news == [('root/node1/val2', 'b')]
+
+    database.unsubscribe(news.append, ['root/node1/val2'])
+    database.set_value('root/node1', 'val2', 'c')
+    database.set_value('root', 'val3', 2)
+    assert news == [('root/node1/val2', 'b'), ('root/val3', 2)]
+
+    database.unsubscribe(news.append)
+    database.set_value('root', 'val3', 3)
+    assert len(news) == 2
+    assert not database._path_subscribers
+
+
+def test_entry_history():
+    """Test the ring buffer storing the history of an entry.
+
+    """
+    history = EntryHistory(3, 1)
+    assert len(history) == 0
+    assert len(history[:][0]) == 0
+    for i in range(4):
+        history.append(i, float(i))
+    assert len(history) == 3
+    times, values = history[:]
+    assert list(times) == [1.0, 2.0, 3.0]
+    assert list(values) == [1, 2, 3]
+    assert history[-1] == (3.0, 3)
+    assert list(history[1:][1]) == [2, 3]
+
+    history.append('a')
+    assert list(history[:][1]) == [2, 3, 'a']
+
+    history = EntryHistory(2, 1j)
+    history.append(2)
+    history.append(1 + 1j)
+    assert history.values.dtype == np.complex128
+
+    history = EntryHistory(2, 2**62)
+    history.append(2**62 + 1)
+    assert history.values.dtype == np.int64
+    assert history[-1][1] == 2**62 + 1
+    history.append(0.5)
+    assert history.values.dtype == np.float64
+    assert list(history[:][1]) == [2**62 + 1, 0.5]
+
+    history = EntryHistory(2, True)
+    history.append(False)
+    assert history.values.dtype == np.bool_
+    history.append(2)
+    assert history.values.dtype == np.int64
+    assert list(history[:][1]) == [0, 2]
+
+
+def test_database_history():
+    """Test keeping the history of some entries in running mode.
+
+    """
+    database = TaskDatabase(history_sizes={'root/node1/val2': 10})
+    database.set_value('root', 'val1', 1)
+    database.create_node('root', 'node1')
+    database.set_value('root/node1', 'val2', 1.0)
+    database.add_access_exception('root', 'root/node1', 'val2')
+    database.prepare_to_run()
+
+    for i in range(5):
+        database.set_value('root', 'val2', i)
+    database.set_value('root', 'val1', 2)
+    history = database.get_history('root/node1/val2')
+    assert list(history[-2:][1]) == [3.0, 4.0]
+    with raises(KeyError):
+        database.get_history('root/val1')
+
+    database.leave_running_mode()
+    assert database.get_history('root/node1/val2') is history
+
+
+def test_database_history_unknown_entry():
+    """Test that the entries which do not exist are skipped.
+
+    """
+    database = TaskDatabase(history_sizes={'root/val2': 10, 'root/val1': 2})
+    database.set_value('root', 'val1', 1)
+    database.prepare_to_run()
+    assert database.has_history('root/val1')
+    assert not database.has_history('root/val2')
+
+
+def test_database_recorders():
+    """Test attaching and detaching recorders to some entries.
+
+    """
+    database = TaskDatabase()
+    database.set_value('root', 'val1', 1)
+    database.set_value('root', 'val2', 1)
+    rec1, rec2 = [], []
+    database.attach_recorder('root/val1', rec1)
+    database.attach_recorder('root/dummy', [])
+    database.set_value('root', 'val1', 2)
+    database.prepare_to_run()
+
+    database.set_value('root', 'val1', 3)
+    database.attach_recorder('root/val2', rec2)
+    database.set_value('root', 'val2', 4)
+    database.detach_recorder('root/val1')
+    database.set_value('root', 'val1', 5)
+    assert rec1 == [3]
+    assert rec2 == [4]
+
+    database.leave_running_mode()
+    database.prepare_to_run()
+    database.set_value('root', 'val2', 6)
+    assert rec2 == [4, 6]
+
+
+def test_coalesced_notifications():
+    """Test that updates are notified in batch when using a window.
+
+    """
+    database = TaskDatabase(notifications_window=10)
+    database.set_value('root', 'val1', 1)
+    database.set_value('root', 'val2', 1)
+    database.prepare_to_run()
+
+    notifications = []
+    database.observe('notifier', lambda n: notifications.append(n))
+    database.set_value('root', 'val1', 2)
+    database.set_value('root', 'val1', 3)
+    database.set_value('root', 'val2', 4)
+    assert not notifications
+
+    database.flush_notifications(stop=True)
+    assert database._flusher is None
+    assert len(notifications) == 1
+    assert sorted(notifications[0]) == [('added', 'root/val1', 3),
+                                        ('added', 'root/val2', 4)]
+
+    database.flush_notifications()
+    assert len(notifications) == 1
@@ -20,6 +20,7 @@ from atom.api import Unicode, set_default
 from enaml.application import deferred_call
 
 from ecpy.tasks.tasks.base_tasks import RootTask, ComplexTask
+from ecpy.utils.flags import SharedBitFlag
 
 from ecpy.testing.tasks.util import CheckTask, ExceptionTask
 from ecpy.testing.util import process_app_events
@@ -133,6 +134,30 @@ class TestTaskExecution(object):
         assert not root.should_stop.is_set()
         assert aux.perform_called == 1
 
+    def test_root_perform_preresolved(self):
+        """Test running a task whose members are resolved before perform.
+
+        """
+        class Resolved(CheckTask):
+
+            preresolve_members = True
+
+            fmt = Unicode('{default_path}/1').tag(fmt=True)
+
+            feval = Unicode('2*{test_val}').tag(feval=True)
+
+            database_entries = set_default({'val': 2})
+
+        root = self.root
+        aux = Resolved(name='test',
+                       custom=lambda t, x: t.write_in_database('val', 3))
+        root.add_child_task(0, aux)
+        root.check()
+        root.perform()
+
+        assert aux.perform_called == 1
+        assert aux.resolved_values == {'fmt': 'toto/1', 'feval': 4}
+
     @pytest.mark.timeout(10)
     def test_root_perform_complex(self):
         """Test running a simple task.
@@ -150,6 +175,56 @@ class TestTaskExecution(object):
         assert not root.should_stop.is_set()
         assert aux.perform_called == 1
 
+    def test_root_perform_profiled(self):
+        """Test recording the execution time of the tasks.
+
+        """
+        root = self.root
+        root.profile = True
+        task = ComplexTask(name='comp')
+        aux = CheckTask(name='test')
+        aux.parallel = {'activated': True, 'pool': 'test'}
+        root.add_child_task(0, task)
+        task.add_child_task(0, aux)
+        task.add_child_task(1, CheckTask(name='test2',
+                                         custom=lambda t, v: sleep(0.01)))
+        root.check()
+        root.perform()
+
+        profile = root.execution_profile
+        assert sorted(profile) == ['root/comp', 'root/comp/test',
+                                   'root/comp/test2']
+        assert all(p['count'] == 1 for p in profile.values())
+        assert profile['root/comp/test2']['min'] >= 0.01
+        assert (profile['root/comp']['total'] >=
+                profile['root/comp/test2']['total'])
+
+        root.profile = False
+        root.perform()
+        assert not root.execution_profile
+
+    def test_root_perform_history(self):
+        """Test keeping the history of some entries during perform.
+
+        """
+        root = self.root
+        root.history_sizes = {'root/test_val': 3, 'root/unknown': 2}
+
+        def write(task, value):
+            for i in range(5):
+                task.write_in_database('val', i)
+
+        root.add_child_task(0, CheckTask(name='test',
+                                         database_entries={'val': 0},
+                                         custom=write))
+        root.check()
+        root.perform()
+
+        assert sorted(root.entries_history) == ['root/test_val']
+        times, values = root.entries_history['root/test_val']
+        assert list(values) == [2, 3, 4]
+        assert len(times) == 3
+
     @pytest.mark.timeout(10)
     def test_root_perform_parallel(self):
         """Test running a simple task in parallel.
@@ -176,6 +251,75 @@ class TestTaskExecution(object):
         assert aux.perform_called == 1
         assert root.resources['threads']['test']
 
+    @pytest.mark.timeout(10)
+    def test_root_perform_parallel_queued_jobs_counted(self):
+        """Test that jobs waiting for a worker are counted as active.
+
+        """
+        root = self.root
+        root.threads_per_pool = 1
+        event = threading.Event()
+        counts = []
+
+        par1 = CheckTask(name='test1', custom=lambda t, x: event.wait())
+        par1.parallel = {'activated': True, 'pool': 'test'}
+        par2 = CheckTask(name='test2')
+        par2.parallel = {'activated': True, 'pool': 'test'}
+        aux = CheckTask(name='aux',
+                        custom=lambda t, x: (
+                            counts.append(root.active_threads_counter.count),
+                            event.set()))
+        root.add_child_task(0, par1)
+        root.add_child_task(1, par2)
+        root.add_child_task(2, aux)
+        root.check()
+        root.perform()
+
+        assert counts == [3]
+        assert par2.perform_called == 1
+        assert root.active_threads_counter.count == 1
+
+    @pytest.mark.timeout(10)
+    def test_root_perform_nested_parallel(self):
+        """Test submitting to a bounded pool from a job of that pool.
+
+        """
+        root = self.root
+        root.threads_per_pool = 1
+        comp = ComplexTask(name='comp',
+                           parallel={'activated': True, 'pool': 'test'})
+        par = CheckTask(name='par')
+        par.parallel = {'activated': True, 'pool': 'test'}
+        wait = CheckTask(name='wait')
+        wait.wait = {'activated': True, 'wait': ['test']}
+        comp.add_child_task(0, par)
+        comp.add_child_task(1, wait)
+        root.add_child_task(0, comp)
+        root.check()
+        root.perform()
+
+        assert not root.should_stop.is_set()
+        assert par.perform_called == 1
+        assert wait.perform_called == 1
+
+    @pytest.mark.timeout(10)
+    def test_root_perform_wait_in_parallel_complex(self):
+        """Test waiting on all pools from a child of a parallel task.
+
+        """
+        root = self.root
+        comp = ComplexTask(name='comp',
+                           parallel={'activated': True, 'pool': 'test'})
+        wait = CheckTask(name='wait')
+        wait.wait = {'activated': True}
+        comp.add_child_task(0, wait)
+        root.add_child_task(0, comp)
+        root.check()
+        root.perform()
+
+        assert not root.should_stop.is_set()
+        assert wait.perform_called == 1
+
     def test_handle_task_exception_in_thread(self):
         """Test handling an exception occuring in a thread (test smooth_crash).
 
@@ -431,6 +575,42 @@ class TestTaskExecution(object):
         assert not par2.perform_called
         assert not par3.perform_called
 
+    @pytest.mark.timeout(10)
+    def test_pause_shared_flags(self):
+        """Test pausing and resuming the execution using shared flags.
+
+        """
+        flags = SharedBitFlag(('pause', 'paused', 'resumed', 'stop'))
+        root = self.root
+        root.should_pause = flags.event('pause')
+        root.paused = flags.event('paused')
+        root.resumed = flags.event('resumed')
+        root.should_stop = flags.event('stop')
+
+        def pause(task, value):
+            """Pause and resume shortly after.
+
+            """
+            threading.Timer(0.05, task.root.should_pause.clear).start()
+            task.root.should_pause.set()
+
+        par = CheckTask(name='test', custom=pause)
+        comp = ComplexTask(name='comp', stoppable=False,
+                           parallel={'activated': True, 'pool': 'test'})
+        par2 = CheckTask(name='test2')
+        comp.add_child_task(0, par2)
+        par3 = CheckTask(name='test3')
+        for i, c in enumerate([par, comp, par3]):
+            root.add_child_task(i, c)
+        root.check()
+        root.perform()
+
+        assert not root.should_pause.is_set()
+        assert not root.should_stop.is_set()
+        assert par2.perform_called == 1
+        assert par3.perform_called == 1
+        assert root.resumed.is_set()
+
     def test_handle_finalisation_issues(self):
         """Test the handling of issues in cleaning ressources in root.
 
@@ -486,3 +666,13 @@ class TestTaskExecution(object):
         assert thread.called == 1
         assert instr.called == 1
         assert stream.called == 1
+
+
+class TestCompiledTaskExecution(TestTaskExecution):
+    """Test the execution of a hierarchy of tasks using execution plans.
+
+    """
+
+    def setup(self):
+        super(TestCompiledTaskExecution, self).setup()
+        self.root.compiled_execution = True
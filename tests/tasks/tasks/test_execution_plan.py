@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test the flat execution plans built from hierarchies of tasks.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from multiprocessing import Event
+
+from ecpy.tasks.tasks.base_tasks import RootTask, ComplexTask
+from ecpy.tasks.tasks.execution_plan import ExecutionPlan, CALL, NODE, BRANCH
+from ecpy.tasks.tasks.logic.conditional_task import ConditionalTask
+from ecpy.tasks.tasks.logic.loop_task import LoopTask
+from ecpy.tasks.tasks.logic.loop_iterable_interface\
+    import IterableLoopInterface
+from ecpy.tasks.tasks.logic.loop_exceptions_tasks\
+    import BreakTask, ContinueTask
+
+from ecpy.testing.tasks.util import CheckTask
+
+
+class TestExecutionPlan(object):
+    """Test building and running execution plans.
+
+    """
+
+    def setup(self):
+        root = RootTask()
+        root.should_pause = Event()
+        root.should_stop = Event()
+        root.paused = Event()
+        root.resumed = Event()
+        root.compiled_execution = True
+        self.root = root
+
+    def test_lowering(self):
+        """Test that complex and conditional tasks are inlined.
+
+        """
+        root = self.root
+        comp = ComplexTask(name='comp')
+        comp.wait = {'activated': True}
+        cond = ConditionalTask(name='cond', condition='True')
+        loop = LoopTask(name='loop',
+                        interface=IterableLoopInterface(iterable='[]'))
+        par = CheckTask(name='par')
+        par.parallel = {'activated': True, 'pool': 'test'}
+        root.add_child_task(0, comp)
+        comp.add_child_task(0, CheckTask(name='a'))
+        comp.add_child_task(1, cond)
+        cond.add_child_task(0, CheckTask(name='b'))
+        root.add_child_task(1, loop)
+        loop.add_child_task(0, CheckTask(name='c'))
+        root.add_child_task(2, par)
+        root.prepare()
+
+        steps = root._plan.steps
+        assert [s[0] for s in steps] == [NODE, CALL, BRANCH, CALL, CALL, CALL]
+        assert [s[4] for s in steps] == [4, 1, 2, 1, 1, 1]
+        assert steps[0][2] is not None
+        assert steps[1][3] == comp.children[0].perform
+        assert steps[4][3] == loop.perform
+        assert steps[5][3] is par.perform_
+        assert loop._plan.steps[0][3] == loop.children[0].perform
+
+    def test_branch(self):
+        """Test that the children of a false branch are skipped.
+
+        """
+        root = self.root
+        cond = ConditionalTask(name='cond', condition='{default_path}')
+        check = CheckTask(name='a')
+        root.add_child_task(0, cond)
+        cond.add_child_task(0, check)
+        root.add_child_task(1, CheckTask(name='b'))
+
+        root.perform()
+        assert check.perform_called == 0
+        assert root.children[1].perform_called == 1
+
+        root.write_in_database('default_path', 'test')
+        root.perform()
+        assert check.perform_called == 1
+
+    def test_loop_break_continue(self):
+        """Test that break and continue are handled inside loops.
+
+        """
+        root = self.root
+        loop = LoopTask(name='loop',
+                        interface=IterableLoopInterface(iterable='range(10)'))
+        comp = ComplexTask(name='comp')
+        check = CheckTask(name='check')
+        root.add_child_task(0, loop)
+        loop.add_child_task(0, comp)
+        comp.add_child_task(0, ContinueTask(name='cont',
+                                            condition='{loop_value} < 3'))
+        comp.add_child_task(1, BreakTask(name='break',
+                                         condition='{loop_value} == 6'))
+        loop.add_child_task(1, check)
+
+        root.perform()
+        assert check.perform_called == 3
+        assert root.get_from_database('loop_value') == 6
+
+    def test_stop_in_node(self):
+        """Test that stopping skips the inlined children of a node but not the
+        following unstoppable tasks.
+
+        """
+        root = self.root
+        comp = ComplexTask(name='comp')
+        stop = CheckTask(name='stop',
+                         custom=lambda t, x: t.root.should_stop.set())
+        skipped = CheckTask(name='skipped', stoppable=False)
+        unstoppable = CheckTask(name='unstoppable', stoppable=False)
+        root.add_child_task(0, stop)
+        root.add_child_task(1, comp)
+        comp.add_child_task(0, skipped)
+        root.add_child_task(2, unstoppable)
+        root.prepare()
+
+        ExecutionPlan(root, root.children).run()
+        assert stop.perform_called == 1
+        assert skipped.perform_called == 0
+        assert unstoppable.perform_called == 1
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test the tools used to profile the execution of tasks.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from threading import Thread
+from ast import literal_eval
+
+from configobj import ConfigObj
+
+from ecpy.tasks.tasks.profiler import (TaskStats, ExecutionProfiler,
+                                       write_profile, HISTOGRAM_BINS)
+
+
+def test_task_stats():
+    """Test accumulating and merging statistics.
+
+    """
+    stats = TaskStats()
+    assert stats.mean == 0
+    assert stats.to_dict()['min'] == 0
+
+    stats.add(0.5e-6)
+    stats.add(1.5e-6)
+    stats.add(3e-6)
+    stats.add(1e6)
+    assert stats.count == 4
+    assert stats.min == 0.5e-6 and stats.max == 1e6
+    assert stats.histogram[:3] == [1, 1, 1]
+    assert stats.histogram[-1] == 1
+
+    other = TaskStats()
+    other.add(3.5e-6)
+    stats.merge(other)
+    assert stats.count == 5
+    assert stats.histogram[2] == 2
+    assert stats.mean == stats.total/5
+    assert len(stats.to_dict()['histogram']) == HISTOGRAM_BINS
+
+
+def test_execution_profiler():
+    """Test recording statistics from multiple threads.
+
+    """
+    profiler = ExecutionProfiler()
+
+    def record():
+        for i in range(10):
+            profiler.record('root/a', 1e-3)
+        profiler.record('root/b', 1e-3)
+
+    threads = [Thread(target=record) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    profiler.record('root/a', 1e-3)
+
+    assert len(profiler._records) == 5
+    stats = profiler.merge()
+    assert stats['root/a'].count == 41
+    assert stats['root/b'].count == 4
+
+
+def test_write_profile(tmpdir):
+    """Test saving the statistics in a file.
+
+    """
+    stats = TaskStats()
+    stats.add(1e-3)
+    path = str(tmpdir.join('test.profile.ini'))
+    write_profile({'root/a': stats.to_dict()}, path)
+
+    config = ConfigObj(path, encoding='utf-8')
+    assert literal_eval(config['root/a']['count']) == 1
+    assert literal_eval(config['root/a']['max']) == 1e-3
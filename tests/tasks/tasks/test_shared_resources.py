@@ -15,7 +15,14 @@ check that in single thread things work.
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from ecpy.tasks.tasks.shared_resources import SharedCounter, SharedDict
+from threading import Event, Condition, Timer
+
+import pytest
+
+from ecpy.tasks.tasks.shared_resources import (SharedCounter, SharedDict,
+                                               WorkerPool, ThreadPoolResource,
+                                               AsyncFileSink,
+                                               AsyncFilesResource)
 
 
 def test_shared_counter():
@@ -31,6 +38,23 @@ def test_shared_counter():
     assert counter.count == 0
 
 
+def test_shared_counter_wait():
+    """Test waiting for counters sharing a condition to reach zero.
+
+    """
+    condition = Condition()
+    counter1 = SharedCounter(condition)
+    counter2 = SharedCounter(condition)
+    counter1.increment()
+    assert not counter1.wait_for_zero(0.01)
+
+    timer = Timer(0.01, counter1.decrement)
+    timer.start()
+    assert counter1.wait_for_zero()
+    assert counter2.wait_for_zero(0)
+    timer.join()
+
+
 def test_shared_dict():
     """Test the shared dict implementation.
 
@@ -54,3 +78,169 @@ def test_shared_dict():
 
     for i in sdict:
         pass
+
+
+def test_worker_pool():
+    """Test that the worker pool is bounded and reuses its workers.
+
+    """
+    pool = WorkerPool(name='test', max_workers=2)
+    event = Event()
+    results = []
+
+    futures = [pool.submit(lambda i: (event.wait(), results.append(i)), i)
+               for i in range(5)]
+    assert len(pool._workers) == 2
+    assert all(f.is_alive() for f in futures)
+
+    event.set()
+    for f in futures:
+        f.join()
+    assert sorted(results) == list(range(5))
+    assert all(f.done() for f in futures)
+
+    pool.submit(results.append, 5).join()
+    assert len(pool._workers) == 2
+
+    pool.shutdown()
+    assert not pool._workers
+
+
+def test_worker_pool_nested_submission():
+    """Test that a job submitted from a worker of the pool runs inline.
+
+    """
+    pool = WorkerPool(name='test', max_workers=1)
+    results = []
+
+    def job():
+        pool.submit(results.append, 1).join()
+        results.append(2)
+
+    pool.submit(job).join(1)
+    assert results == [1, 2]
+    assert len(pool._workers) == 1
+    pool.shutdown()
+
+
+def test_thread_pool_resource():
+    """Test submitting jobs to named pools and waiting on them.
+
+    """
+    pools = ThreadPoolResource()
+    pools.pool_sizes = {'single': 1}
+    event = Event()
+    pools.submit('single', event.wait)
+    future = pools.submit('other', lambda: None)
+    future.join()
+    assert pools._workers['single'].max_workers == 1
+    assert pools._workers['other'].max_workers == pools.max_workers
+
+    pools.wait(pools=['other', 'unknown'])
+    assert not pools['other']
+    assert pools._workers['single'].pending.count == 1
+    pools.wait(exclude=['single'])
+    assert pools['single']
+
+    event.set()
+    pools.wait()
+    assert not pools['single']
+
+    pools.release()
+    assert not pools._workers
+
+
+def test_thread_pool_resource_wait_in_job():
+    """Test waiting on the pools from a job of one of the pools.
+
+    """
+    pools = ThreadPoolResource()
+    results = []
+
+    def job():
+        assert pools.in_pool('test')
+        pools.submit('other', results.append, 1)
+        pools.wait()
+        results.append(2)
+
+    pools.submit('test', job).join(5)
+    assert results == [1, 2]
+    assert not pools.in_pool('test')
+    pools.release()
+
+
+def test_async_file_sink(tmpdir):
+    """Test writing in a file through a background thread.
+
+    """
+    path = str(tmpdir.join('test.txt'))
+    sink = AsyncFileSink(path, 'w', queue_size=2, flush_interval=10,
+                         fsync=True)
+    for i in range(10):
+        sink.write('{}\n'.format(i))
+    sink.flush()
+    with open(path) as f:
+        assert f.read().split() == [str(i) for i in range(10)]
+
+    sink.write('end')
+    sink.close()
+    assert sink.closed
+    assert sink._file.closed
+    sink.close()
+    sink.flush()
+    with open(path) as f:
+        assert f.read().split()[-2:] == ['9', 'end']
+
+    with pytest.raises(ValueError):
+        sink.write('a')
+
+
+def test_async_file_sink_flush_interval(tmpdir):
+    """Test that the file is flushed once no data is received.
+
+    """
+    path = str(tmpdir.join('test.txt'))
+    sink = AsyncFileSink(path, 'w', flush_interval=0.01)
+    sink.write('test')
+    event = Event()
+    for _ in range(100):
+        with open(path) as f:
+            if f.read() == 'test':
+                break
+        event.wait(0.01)
+    else:
+        raise AssertionError('File was not flushed.')
+    sink.close()
+
+
+def test_async_file_sink_error(tmpdir):
+    """Test that errors in the writer thread are reported.
+
+    """
+    sink = AsyncFileSink(str(tmpdir.join('test.txt')), 'w',
+                         flush_interval=0)
+    sink.write(1)
+    with pytest.raises(IOError):
+        sink.flush()
+    with pytest.raises(IOError):
+        sink.write('a')
+    with pytest.raises(IOError):
+        sink.close()
+
+
+def test_async_files_resource(tmpdir):
+    """Test flushing the sinks on reset and closing them on release.
+
+    """
+    path = str(tmpdir.join('test.txt'))
+    files = AsyncFilesResource()
+    files[path] = AsyncFileSink(path, flush_interval=10)
+    files[path].write('test')
+    files.reset()
+    with open(path) as f:
+        assert f.read() == 'test'
+
+    files['b'] = AsyncFileSink(str(tmpdir.join('b.txt')), flush_interval=0)
+    files['b'].write(1)
+    files.release()
+    assert files[path].closed and files['b'].closed
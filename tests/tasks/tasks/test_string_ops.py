@@ -12,6 +12,8 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
+from pytest import raises
+
 from ecpy.tasks.tasks.base_tasks import RootTask
 from math import cos
 import numpy
@@ -271,3 +273,42 @@ class TestEvaluation(object):
         test = 'np.abs({val1})[{val2}]'
         formatted = self.root.format_and_eval_string(test)
         assert formatted == 2.0
+
+    def test_eval_running_mode5(self):
+        """Test eval expression using a comprehension.
+
+        """
+        self.root.database.prepare_to_run()
+        test = '[{val1}*i for i in range(2)]'
+        formatted = self.root.format_and_eval_string(test)
+        assert formatted == [0, 1]
+        self.root.database.set_value('root', 'val1', 2)
+        formatted = self.root.format_and_eval_string(test)
+        assert formatted == [0, 2]
+
+    def test_eval_running_mode_errors(self):
+        """Test that invalid expressions are reported and not cached.
+
+        """
+        self.root.database.prepare_to_run()
+        for test in ('', '{val1}*', ' 1 +'):
+            with raises(SyntaxError):
+                self.root.format_and_eval_string(test)
+            assert test not in self.root._eval_cache
+
+        assert self.root.format_and_eval_string(' 2*{val1}') == 2
+
+    def test_compile_string(self, caplog):
+        """Test compiling strings and falling back on the uncompiled version.
+
+        """
+        self.root.database.prepare_to_run()
+        formatter = self.root.compile_string('a{val1}', 'fmt')
+        assert formatter() == 'a1'
+        assert self.root.compile_string('2*{val1}')() == 2
+
+        with caplog.at_level('DEBUG', 'ecpy.tasks.tasks.base_tasks'):
+            evaluator = self.root.compile_string('{val1}*')
+        assert 'Failed to compile' in caplog.text
+        with raises(SyntaxError):
+            evaluator()
@@ -232,6 +232,17 @@ class TestInterfaceableTaskMixin(object):
         assert 'root/Simple-fmt' in traceback
         assert 'root/Simple-feval' in traceback
 
+    def test_prepare(self):
+        """Test that preparing the task compiles the interface feval members.
+
+        """
+        self.mixin.interface = InterfaceTest2(feval='2*{Simple_test}')
+        self.root.database.prepare_to_run()
+
+        self.mixin.prepare()
+        assert '2*{Simple_test}' in self.mixin._eval_cache
+        assert self.mixin.format_and_eval_string('2*{Simple_test}') == 4.0
+
     def test_perform1(self):
         """Test perform does call interface if present.
 
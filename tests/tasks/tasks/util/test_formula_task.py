@@ -48,6 +48,17 @@ class TestFormulaTask(object):
         assert (self.task.get_from_database('Test_key1') == 4.0 and
                 self.task.get_from_database('Test_key2') == 7.0)
 
+    def test_prepare(self):
+        """Test that the formulas are compiled when preparing the task.
+
+        """
+        self.task.formulas = OrderedDict([('key1', "1.0+3.0"),
+                                          ('key2', '3.0+')])
+        self.root.prepare()
+
+        assert '1.0+3.0' in self.task._eval_cache
+        assert '3.0+' not in self.task._eval_cache
+
     def test_perform_from_load(self):
         """Test checking for correct loading from pref and that we can still
         recall values from the database
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test of the SaveArray task.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import pytest
+import enaml
+import numpy as np
+from multiprocessing import Event
+from collections import OrderedDict
+
+from ecpy.testing.util import show_and_close_widget
+from ecpy.tasks.tasks.base_tasks import RootTask
+from ecpy.tasks.tasks.logic.loop_task import LoopTask
+from ecpy.tasks.tasks.logic.loop_iterable_interface\
+    import IterableLoopInterface
+from ecpy.tasks.tasks.util.save_array_task import SaveArrayTask
+with enaml.imports():
+    from ecpy.tasks.tasks.util.views.save_array_view import SaveArrayView
+
+
+class TestSaveArrayTask(object):
+    """Test SaveArrayTask.
+
+    """
+
+    def setup(self):
+        self.root = RootTask(should_stop=Event(), should_pause=Event())
+        self.task = SaveArrayTask(name='Test')
+        self.root.add_child_task(0, self.task)
+
+    def test_check1(self, tmpdir):
+        """Test checking a correctly configured task.
+
+        """
+        self.task.folder = str(tmpdir)
+        self.task.filename = 'test'
+        self.task.saved_values = OrderedDict([('a', '1.0')])
+
+        test, traceback = self.task.check()
+        assert test
+        assert not traceback
+
+    def test_check2(self, tmpdir):
+        """Test checking a task with a missing folder and file name.
+
+        """
+        self.task.folder = str(tmpdir.join('dummy'))
+        self.task.saved_values = OrderedDict([('a', '1.0')])
+
+        test, traceback = self.task.check()
+        assert not test
+        assert 'root/Test-folder' in traceback
+        assert 'root/Test-filename' in traceback
+
+    def test_check3(self, tmpdir):
+        """Test checking values which cannot be evaluated or saved.
+
+        """
+        self.task.folder = str(tmpdir)
+        self.task.filename = 'test'
+        self.task.array_size = '1+'
+        self.task.saved_values = OrderedDict([('a', '1.0+'),
+                                              ('b', 'object()')])
+
+        test, traceback = self.task.check()
+        assert not test
+        assert len(traceback) == 3
+        assert 'root/Test-a' in traceback
+        assert 'root/Test-b' in traceback
+        assert 'root/Test-array_size' in traceback
+
+    def test_perform1(self, tmpdir):
+        """Test saving values outside of a loop.
+
+        """
+        self.task.folder = str(tmpdir)
+        self.task.filename = 'test'
+        self.task.write_in_database('val', 2)
+        self.task.saved_values = OrderedDict([('a', '{Test_val}*2'),
+                                              ('b', '[1, 2]')])
+        self.root.prepare()
+
+        self.task.perform()
+        self.task.perform()
+        path = str(tmpdir.join('test.npy'))
+        assert self.task.get_from_database('Test_file') == path
+
+        self.root.release_resources()
+        data = np.load(path)
+        assert list(data['a']) == [4, 4]
+        assert data['b'].tolist() == [[1, 2], [1, 2]]
+
+    def test_perform2(self, tmpdir):
+        """Test saving values in a loop, point by point and by blocks.
+
+        """
+        self.task.folder = str(tmpdir)
+        loop = LoopTask(name='Loop',
+                        interface=IterableLoopInterface(iterable='range(10)'))
+        self.root.add_child_task(0, loop)
+        self.root.remove_child_task(1)
+        loop.add_child_task(0, self.task)
+        self.task.filename = 'test.npy'
+        self.task.chunk_size = 3
+        self.task.saved_values = OrderedDict([('v', '{Loop_value}'),
+                                              ('sq', '{Loop_value}**2'),
+                                              ('c', '1.5')])
+
+        for batch_size in (0, 4):
+            loop.batch_size = batch_size
+            self.root.prepare()
+            loop.perform()
+            self.root.release_resources()
+
+            data = np.load(str(tmpdir.join('test.npy')))
+            assert list(data['v']) == list(range(10))
+            assert list(data['sq']) == [i**2 for i in range(10)]
+            assert list(data['c']) == [1.5]*10
+
+    def test_perform_kind_changes(self, tmpdir):
+        """Test that integer values can later become floats but that
+        incompatible kinds and shape changes are reported.
+
+        """
+        self.task.folder = str(tmpdir)
+        self.task.filename = 'test'
+        self.task.write_in_database('val', 2)
+        self.task.saved_values = OrderedDict([('a', '{Test_val}')])
+        self.root.prepare()
+
+        self.task.perform()
+        self.task.write_in_database('val', 2.5)
+        self.task.perform()
+        self.task.write_in_database('val', 1j)
+        with pytest.raises(ValueError):
+            self.task.perform()
+        self.task.write_in_database('val', [1.0, 2.0])
+        with pytest.raises(ValueError):
+            self.task.perform()
+
+        self.root.release_resources()
+        data = np.load(str(tmpdir.join('test.npy')))
+        assert list(data['a']) == [2.0, 2.5]
+
+    def test_perform_file_in_use(self, tmpdir):
+        """Test that a file opened by another task is not replaced.
+
+        """
+        self.task.folder = str(tmpdir)
+        self.task.filename = 'test'
+        self.task.saved_values = OrderedDict([('a', '1')])
+        other = SaveArrayTask(name='Other', folder=str(tmpdir),
+                              filename='test.npy',
+                              saved_values=OrderedDict([('b', '2')]))
+        self.root.add_child_task(1, other)
+        self.root.prepare()
+
+        self.task.perform()
+        with pytest.raises(RuntimeError):
+            other.perform()
+        self.task.perform()
+
+        self.root.release_resources()
+        data = np.load(str(tmpdir.join('test.npy')))
+        assert list(data['a']) == [1, 1]
+
+    def test_expected_points(self):
+        """Test computing the number of points of the enclosing loops.
+
+        """
+        loop = LoopTask(name='Loop',
+                        interface=IterableLoopInterface(iterable='range(10)'))
+        inner = LoopTask(name='Inner',
+                         interface=IterableLoopInterface(iterable='range(3)'))
+        self.root.add_child_task(0, loop)
+        self.root.remove_child_task(1)
+        loop.add_child_task(0, inner)
+        inner.add_child_task(0, self.task)
+        loop.write_in_database('point_number', 10)
+        inner.write_in_database('point_number', 3)
+        assert self.task._expected_points() == 30
+
+        self.task.array_size = '{Loop_point_number}'
+        assert self.task._expected_points() == 10
+
+
+@pytest.mark.ui
+def test_view(windows):
+    """Test the SaveArrayTask view.
+
+    """
+    show_and_close_widget(SaveArrayView(task=SaveArrayTask(name='Test')))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test the script running measures without user interface.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+from threading import Event
+
+import pytest
+
+from ecpy.headless import build_parser, run_measure
+
+
+def test_parser():
+    """Test parsing the command line arguments.
+
+    """
+    args = build_parser().parse_args(['-n', '-e', 'ecpy.process_engine',
+                                      'a.meas.ini', 'b.meas.ini'])
+    assert args.measures == ['a.meas.ini', 'b.meas.ini']
+    assert args.no_checks
+    assert args.engine == 'ecpy.process_engine'
+    assert not args.exitfirst
+
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+
+
+class FalseProcessor(object):
+    """Processor whose measures run till they are stopped.
+
+    """
+    def __init__(self):
+        self.stopped = Event()
+        self.force = None
+
+    def run_measure(self, measure):
+        self.stopped.wait()
+        return 'INTERRUPTED', 'Stopped'
+
+    def stop_measure(self, force=False):
+        self.force = force
+        self.stopped.set()
+
+
+def test_run_measure_interrupted(monkeypatch):
+    """Test that a keyboard interruption stops the running measure.
+
+    """
+    import ecpy.headless as eh
+
+    class InterruptedThread(eh.Thread):
+
+        def join(self, timeout=None):
+            if self.interrupt:
+                self.interrupt = False
+                raise KeyboardInterrupt()
+            super(InterruptedThread, self).join(timeout)
+
+        interrupt = True
+
+    monkeypatch.setattr(eh, 'Thread', InterruptedThread)
+    processor = FalseProcessor()
+    assert run_measure(processor, None) == ['INTERRUPTED', 'Stopped']
+    assert processor.force is False
+
+
+def test_run_measure_crashing():
+    """Test handling an unexpected error when running a measure.
+
+    """
+    class CrashingProcessor(object):
+
+        def run_measure(self, measure):
+            raise RuntimeError()
+
+    status, _ = run_measure(CrashingProcessor(), None)
+    assert status == 'FAILED'
@@ -14,12 +14,13 @@ The thread safety is ensured by the lock and is not explicitely tested.
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from threading import Thread
+from threading import Thread, Timer
+from multiprocessing import Process
 from time import sleep
 
 import pytest
 
-from ecpy.utils.flags import BitFlag
+from ecpy.utils.flags import BitFlag, SharedBitFlag
 
 
 @pytest.fixture
@@ -81,3 +82,72 @@ def test_flag_wait(flag):
     sleep(0.02)
 
     thread.join()
+
+
+def set_in_process(flag):
+    """Set the start flag of a shared flag (run in a different process).
+
+    """
+    flag.set('start')
+
+
+def test_shared_flag():
+    """Test setting, clearing and testing a shared flag.
+
+    """
+    flag = SharedBitFlag(('start', 'stop'))
+    tester = flag.any_tester('start', 'stop')
+    assert not flag.test_any('start', 'stop')
+    assert not tester()
+
+    flag.set('stop')
+    assert flag.test('stop')
+    assert not flag.test('start', 'stop')
+    assert flag.test_any('start', 'stop')
+    assert tester()
+
+    flag.set('start')
+    flag.clear('stop')
+    assert flag.test('start')
+    assert not flag.test('stop')
+
+    flag.clear()
+    assert not flag.test_any('start', 'stop')
+
+
+@pytest.mark.timeout(5)
+def test_shared_flag_wait():
+    """Test waiting on a flag set from another thread or process.
+
+    """
+    flag = SharedBitFlag(('start', 'stop'))
+    assert not flag.wait(0.01, 'start')
+
+    timer = Timer(0.01, flag.set, ('stop',))
+    timer.start()
+    assert flag.wait_for(lambda: flag.test('stop'))
+    timer.join()
+
+    process = Process(target=set_in_process, args=(flag,))
+    process.start()
+    assert flag.wait(None, 'start')
+    process.join()
+
+
+def test_shared_flag_event():
+    """Test the event like views on the flags.
+
+    """
+    flag = SharedBitFlag(('start', 'stop'))
+    event = flag.event('stop')
+    assert not event.is_set()
+    assert not event.wait(0.01)
+
+    event.set()
+    assert flag.test('stop')
+    assert event.is_set()
+    assert event.wait()
+
+    event.clear()
+    assert not flag.test('stop')
+
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2015 by Ecpy Authors, see AUTHORS for more details.
+#
+# Distributed under the terms of the BSD license.
+#
+# The full license is in the file LICENCE, distributed with this software.
+# -----------------------------------------------------------------------------
+"""Test the writer streaming records into a .npy file.
+
+"""
+from __future__ import (division, unicode_literals, print_function,
+                        absolute_import)
+
+import os
+
+import numpy as np
+
+from ecpy.utils.npy_writer import NpyArrayWriter
+
+
+def test_writer(tmpdir):
+    """Test writing records by chunks beyond the preallocated size.
+
+    """
+    path = str(tmpdir.join('test.npy'))
+    dtype = np.dtype([(str('a'), float), (str('b'), int, (2,))])
+    writer = NpyArrayWriter(path, dtype, expected=3, chunk_size=2)
+    size = os.path.getsize(path)
+    assert size % 64 == 3*dtype.itemsize % 64
+
+    writer.append((1.0, (1, 2)))
+    writer.append((2.0, (3, 4)))
+    writer.extend([np.array([3.0, 4.0]), (5, 6)], 2)
+    writer.append((5.0, (7, 8)))
+    assert writer.count == 5
+    writer.close()
+    assert writer.closed
+    writer.close()
+
+    data = np.load(path)
+    assert list(data['a']) == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert data['b'].tolist() == [[1, 2], [3, 4], [5, 6], [5, 6], [7, 8]]
+    assert os.path.getsize(path) == size + 2*dtype.itemsize
+
+
+def test_writer_shaped_records(tmpdir):
+    """Test writing records which are arrays.
+
+    """
+    path = str(tmpdir.join('test.npy'))
+    writer = NpyArrayWriter(path, complex, (2,), chunk_size=3)
+    writer.append([1, 2j])
+    writer.write_block(np.ones((4, 2)))
+    writer.append(np.zeros(2))
+    writer.close()
+
+    data = np.load(path)
+    assert data.dtype == complex
+    assert data.shape == (6, 2)
+    assert data[0].tolist() == [1, 2j]
+    assert (data[1:5] == 1).all()
+    assert (data[5] == 0).all()
@@ -43,6 +43,17 @@ class TestPriorityHeap(object):
         self.queue.push(0, 6)
         assert list(self.queue) == [5, 4, 6]
 
+    def test_peek(self):
+
+        self.queue.push(1, 5)
+        self.queue.push(0, 6)
+        self.queue.remove(6)
+        assert self.queue.peek() == 5
+        assert len(self.queue) == 1
+        self.queue.pop()
+        with raises(IndexError):
+            self.queue.peek()
+
     def test_removing(self):
 
         self.queue.push(0, 5)
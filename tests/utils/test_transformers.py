@@ -12,7 +12,10 @@
 from __future__ import (division, unicode_literals, print_function,
                         absolute_import)
 
-from ecpy.utils.transformers import (basic_name_formatter, ids_to_unique_names)
+import pytest
+
+from ecpy.utils.transformers import (basic_name_formatter, ids_to_unique_names,
+                                     sizes_to_str, str_to_sizes)
 
 
 def test_basic_name_formatter():
@@ -44,3 +47,18 @@ def test_ids_to_unique_names2():
             sorted(('test.Dummy 1', 'dummy.Dummy 1', 'Ecpy.test.Tester',
                     'User.test.Tester')))
     assert names['User.test.Tester'] == ids[-1]
+
+
+def test_sizes_conversions():
+    """Test formatting and parsing mappings between names and sizes.
+
+    """
+    sizes = {'root/b': 10, 'root/a': 2}
+    text = sizes_to_str(sizes)
+    assert text == 'root/a: 2, root/b: 10'
+    assert str_to_sizes(text) == sizes
+    assert str_to_sizes(' ') == {}
+
+    for text in ('root/a', 'root/a: b', ': 2', 'root/a: 0'):
+        with pytest.raises(ValueError):
+            str_to_sizes(text)